@@ -5,7 +5,7 @@ import io
 import logging
 import os
 import platform
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Optional, Sequence
 
 from browser_use.agent.views import (
 	AgentHistoryList,
@@ -14,6 +14,8 @@ from browser_use.agent.views import (
 if TYPE_CHECKING:
 	from PIL import Image, ImageFont
 
+	from browser_use.browser.screencast import FrameRingBuffer
+
 logger = logging.getLogger(__name__)
 
 
@@ -31,8 +33,12 @@ def create_history_gif(
 	goal_font_size: int = 44,
 	margin: int = 40,
 	line_spacing: float = 1.5,
+	frames: Sequence[FrameRingBuffer] = (),
 ) -> None:
-	"""Create a GIF from the agent's history with overlaid task and goal text."""
+	"""Create a GIF from the agent's history with overlaid task and goal text.
+
+	Screenshots that are still in one of the screencast frame buffers are taken from there already decoded.
+	"""
 	if not history.history:
 		logger.warning('No history to create GIF from')
 		return
@@ -105,7 +111,7 @@ def create_history_gif(
 			continue
 
 		# Convert base64 screenshot to PIL Image
-		img_data = base64.b64decode(item.state.screenshot)
+		img_data = _decode_screenshot(item.state.screenshot, frames)
 		image = Image.open(io.BytesIO(img_data))
 
 		if show_goals and item.model_output:
@@ -136,6 +142,14 @@ def create_history_gif(
 		logger.warning('No images found in history to create GIF')
 
 
+def _decode_screenshot(screenshot: str, frames: Sequence[FrameRingBuffer]) -> bytes:
+	for buffer in frames:
+		frame = buffer.find(screenshot)
+		if frame is not None:
+			return frame.image_bytes
+	return base64.b64decode(screenshot)
+
+
 def _create_task_frame(
 	task: str,
 	first_screenshot: str,
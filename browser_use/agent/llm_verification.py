@@ -0,0 +1,95 @@
+"""
+Process-wide cache of LLM connection verifications, so agents sharing a provider, model and key
+don't each send a test prompt.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable
+
+from pydantic import SecretStr
+
+# Seconds a successful verification is trusted
+LLM_VERIFICATION_TTL = float(os.environ.get('LLM_VERIFICATION_TTL', '3600'))
+
+_MODEL_ATTRIBUTES = ('model_name', 'model', 'model_id', 'deployment_name')
+_ENDPOINT_ATTRIBUTES = ('openai_api_base', 'base_url', 'anthropic_api_url', 'azure_endpoint', 'endpoint_url', 'endpoint')
+_API_KEY_ATTRIBUTES = ('openai_api_key', 'anthropic_api_key', 'google_api_key', 'api_key')
+
+LLMVerificationKey = tuple[str, str, str, str]
+
+
+def _first_attribute(llm: Any, names: tuple[str, ...]) -> Any:
+	for name in names:
+		value = getattr(llm, name, None)
+		if value:
+			return value
+	return None
+
+
+def get_llm_verification_key(llm: Any) -> LLMVerificationKey:
+	"""(provider class, model, endpoint, API key fingerprint) of an LLM client, the key itself is never kept"""
+	provider = f'{type(llm).__module__}.{type(llm).__qualname__}'
+	model = str(_first_attribute(llm, _MODEL_ATTRIBUTES) or '')
+	endpoint = str(_first_attribute(llm, _ENDPOINT_ATTRIBUTES) or '')
+
+	api_key = _first_attribute(llm, _API_KEY_ATTRIBUTES)
+	if isinstance(api_key, SecretStr):
+		api_key = api_key.get_secret_value()
+	fingerprint = hashlib.sha256(str(api_key).encode()).hexdigest()[:16] if api_key else ''
+	return provider, model, endpoint, fingerprint
+
+
+class LLMVerificationCache:
+	"""Successful verifications per LLM key with a TTL, concurrent verifications of one key share a probe"""
+
+	def __init__(self, ttl: float = LLM_VERIFICATION_TTL):
+		self.ttl = ttl
+		self._verified_at: dict[LLMVerificationKey, float] = {}
+		self._pending: dict[LLMVerificationKey, asyncio.Task] = {}
+		self._lock = threading.Lock()
+
+	def is_verified(self, key: LLMVerificationKey) -> bool:
+		with self._lock:
+			verified_at = self._verified_at.get(key)
+			if verified_at is None:
+				return False
+			if time.monotonic() - verified_at > self.ttl:
+				del self._verified_at[key]
+				return False
+			return True
+
+	def mark_verified(self, key: LLMVerificationKey) -> None:
+		with self._lock:
+			self._verified_at[key] = time.monotonic()
+
+	def clear(self) -> None:
+		with self._lock:
+			self._verified_at.clear()
+
+	async def verify(self, key: LLMVerificationKey, probe: Callable[[], Awaitable[bool]]) -> bool:
+		"""Run the probe unless the key was verified recently or is being verified on this event loop"""
+		if self.is_verified(key):
+			return True
+
+		loop = asyncio.get_running_loop()
+		task = self._pending.get(key)
+		if task is None or task.done() or task.get_loop() is not loop:
+			task = loop.create_task(probe())
+			self._pending[key] = task
+			task.add_done_callback(lambda done: self._finish(key, done))
+		return await asyncio.shield(task)
+
+	def _finish(self, key: LLMVerificationKey, task: asyncio.Task) -> None:
+		if self._pending.get(key) is task:
+			del self._pending[key]
+		if not task.cancelled() and task.exception() is None and task.result():
+			self.mark_verified(key)
+
+
+llm_verification_cache = LLMVerificationCache()
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
-from typing import List, Optional
+import threading
+from typing import TYPE_CHECKING, List, Optional
 
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import (
@@ -9,15 +12,40 @@ from langchain_core.messages import (
 	HumanMessage,
 )
 from langchain_core.messages.utils import convert_to_openai_messages
-from mem0 import Memory as Mem0Memory
 from pydantic import BaseModel
 
 from browser_use.agent.message_manager.service import MessageManager
 from browser_use.agent.message_manager.views import ManagedMessage, MessageMetadata
-from browser_use.utils import time_execution_sync
+from browser_use.utils import time_execution_async, time_execution_sync
+
+if TYPE_CHECKING:
+	from mem0 import Memory as Mem0Memory
 
 logger = logging.getLogger(__name__)
 
+# Backends shared by the agents of this process with the lock that serializes their use, keyed by their config
+_shared_backends: dict[str, tuple['Mem0Memory', threading.Lock]] = {}
+_shared_backends_lock = threading.Lock()
+
+
+def _create_backend(config: dict) -> 'Mem0Memory':
+	from mem0 import Memory as Mem0Memory
+
+	return Mem0Memory.from_config(config_dict=config)
+
+
+def get_shared_backend(config: dict) -> tuple['Mem0Memory', threading.Lock]:
+	"""
+	Backend shared by all agents with the same memory config, memories are kept apart by agent_id.
+
+	The vector store of the backend is not thread safe, hold the returned lock while using it.
+	"""
+	key = json.dumps(config, sort_keys=True, default=str)
+	with _shared_backends_lock:
+		if key not in _shared_backends:
+			_shared_backends[key] = (_create_backend(config), threading.Lock())
+		return _shared_backends[key]
+
 
 class MemorySettings(BaseModel):
 	"""Settings for procedural memory."""
@@ -25,6 +53,8 @@ class MemorySettings(BaseModel):
 	agent_id: str
 	interval: int = 10
 	config: Optional[dict] | None = None
+	# Use one backend per config for all agents of the process instead of one per agent
+	shared: bool = False
 
 
 class Memory:
@@ -47,7 +77,22 @@ class Memory:
 		self.llm = llm
 		self.settings = settings
 		self._memory_config = self.settings.config or {'vector_store': {'provider': 'faiss'}}
-		self.mem0 = Mem0Memory.from_config(config_dict=self._memory_config)
+		# Created on first use, most runs end before the first memory interval
+		self._mem0: Optional[Mem0Memory] = None
+		# Held while adding memories, shared with the other agents of a shared backend
+		self._mem0_lock = threading.Lock()
+		# Procedural memory being created in the background
+		self._task: Optional[asyncio.Task] = None
+
+	@property
+	def mem0(self) -> 'Mem0Memory':
+		"""The memory backend, created or looked up on first use"""
+		if self._mem0 is None:
+			if self.settings.shared:
+				self._mem0, self._mem0_lock = get_shared_backend(self._memory_config)
+			else:
+				self._mem0 = _create_backend(self._memory_config)
+		return self._mem0
 
 	@time_execution_sync('--create_procedural_memory')
 	def create_procedural_memory(self, current_step: int) -> None:
@@ -59,6 +104,72 @@ class Memory:
 		"""
 		logger.info(f'Creating procedural memory at step {current_step}')
 
+		split = self._split_history()
+		if split is None:
+			return
+		kept_messages, messages_to_process = split
+
+		# Create a summary
+		summary = self._create([m.message for m in messages_to_process], current_step)
+		self._apply_summary(summary, kept_messages, messages_to_process)
+
+	async def acreate_procedural_memory(self, current_step: int) -> None:
+		"""
+		Create a procedural memory without blocking the event loop.
+
+		The summary is created in a worker thread and applied to the history once it is done, messages
+		added to the history in the meantime are kept after the summary.
+		"""
+		logger.info(f'Creating procedural memory at step {current_step}')
+
+		split = self._split_history()
+		if split is None:
+			return
+		await self._summarize(split, current_step)
+
+	def schedule_procedural_memory(self, current_step: int) -> Optional[asyncio.Task]:
+		"""
+		Start creating a procedural memory in the background, unless one is still being created.
+
+		The history is split right away, so the state message of the current step, added before the
+		task first runs, is not summarized and stays the last message until the step removes it.
+		"""
+		if self._task is not None and not self._task.done():
+			logger.debug(f'Procedural memory from an earlier step is still being created, skipping step {current_step}')
+			return None
+
+		logger.info(f'Creating procedural memory at step {current_step}')
+		split = self._split_history()
+		if split is None:
+			return None
+
+		self._task = asyncio.create_task(self._summarize(split, current_step))
+		self._task.add_done_callback(self._log_task_error)
+		return self._task
+
+	@time_execution_async('--create_procedural_memory_async')
+	async def _summarize(self, split: tuple[list[ManagedMessage], list[ManagedMessage]], current_step: int) -> None:
+		kept_messages, messages_to_process = split
+		summary = await asyncio.to_thread(self._create, [m.message for m in messages_to_process], current_step)
+		self._apply_summary(summary, kept_messages, messages_to_process)
+
+	async def close(self) -> None:
+		"""Cancel the procedural memory being created, if any"""
+		if self._task is not None and not self._task.done():
+			self._task.cancel()
+			try:
+				await self._task
+			except asyncio.CancelledError:
+				pass
+		self._task = None
+
+	@staticmethod
+	def _log_task_error(task: asyncio.Task) -> None:
+		if not task.cancelled() and task.exception() is not None:
+			logger.error(f'Error creating procedural memory: {task.exception()}')
+
+	def _split_history(self) -> Optional[tuple[list[ManagedMessage], list[ManagedMessage]]]:
+		"""Split the history into messages to keep and messages to summarize, None if there is nothing to summarize"""
 		# Get all messages
 		all_messages = self.message_manager.state.history.messages
 
@@ -74,30 +185,38 @@ class Memory:
 
 		if len(messages_to_process) <= 1:
 			logger.info('Not enough non-memory messages to summarize')
-			return
-
-		# Create a summary
-		summary = self._create([m.message for m in messages_to_process], current_step)
+			return None
+		return new_messages, messages_to_process
 
+	def _apply_summary(
+		self, summary: Optional[str], kept_messages: list[ManagedMessage], messages_to_process: list[ManagedMessage]
+	) -> None:
+		"""Replace the summarized messages with the summary in one update of the history"""
 		if not summary:
 			logger.warning('Failed to create summary')
 			return
 
+		history = self.message_manager.state.history
+		processed_ids = {id(m) for m in messages_to_process}
+		kept_ids = {id(m) for m in kept_messages}
+
 		# Replace the summarized messages with the summary
 		summary_message = HumanMessage(content=summary)
 		summary_tokens = self.message_manager._count_tokens(summary_message)
 		summary_metadata = MessageMetadata(tokens=summary_tokens, message_type='memory')
 
-		# Calculate the total tokens being removed
-		removed_tokens = sum(m.metadata.tokens for m in messages_to_process)
+		# Calculate the total tokens being removed, summarized messages may have been removed since
+		removed_tokens = sum(m.metadata.tokens for m in history.messages if id(m) in processed_ids)
 
-		# Add the summary message
+		# The summary goes after the kept messages, messages added while summarizing follow it
+		new_messages = [m for m in history.messages if id(m) in kept_ids]
 		new_messages.append(ManagedMessage(message=summary_message, metadata=summary_metadata))
+		new_messages.extend(m for m in history.messages if id(m) not in kept_ids and id(m) not in processed_ids)
 
 		# Update the history
-		self.message_manager.state.history.messages = new_messages
-		self.message_manager.state.history.current_tokens -= removed_tokens
-		self.message_manager.state.history.current_tokens += summary_tokens
+		history.messages = new_messages
+		history.current_tokens -= removed_tokens
+		history.current_tokens += summary_tokens
 
 		logger.info(f'Memories summarized: {len(messages_to_process)} messages converted to procedural memory')
 		logger.info(f'Token reduction: {removed_tokens - summary_tokens} tokens')
@@ -105,13 +224,15 @@ class Memory:
 	def _create(self, messages: List[BaseMessage], current_step: int) -> Optional[str]:
 		parsed_messages = convert_to_openai_messages(messages)
 		try:
-			results = self.mem0.add(
-				messages=parsed_messages,
-				agent_id=self.settings.agent_id,
-				llm=self.llm,
-				memory_type='procedural_memory',
-				metadata={'step': current_step},
-			)
+			mem0 = self.mem0
+			with self._mem0_lock:
+				results = mem0.add(
+					messages=parsed_messages,
+					agent_id=self.settings.agent_id,
+					llm=self.llm,
+					memory_type='procedural_memory',
+					metadata={'step': current_step},
+				)
 			if len(results.get('results', [])):
 				return results.get('results', [])[0].get('memory')
 			return None
@@ -10,18 +10,26 @@ from langchain_core.messages import (
 	SystemMessage,
 	ToolMessage,
 )
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
+from browser_use.agent.message_manager.token_counter import (
+	HeuristicTokenCounter,
+	TokenCounter,
+	get_image_url_size,
+)
 from browser_use.agent.message_manager.views import MessageMetadata
 from browser_use.agent.prompts import AgentMessagePrompt
 from browser_use.agent.views import ActionResult, AgentOutput, AgentStepInfo, MessageManagerState
 from browser_use.browser.views import BrowserState
+from browser_use.sensitive_data import SensitiveDataRedactor
 from browser_use.utils import time_execution_sync
 
 logger = logging.getLogger(__name__)
 
 
 class MessageManagerSettings(BaseModel):
+	model_config = ConfigDict(arbitrary_types_allowed=True)
+
 	max_input_tokens: int = 128000
 	estimated_characters_per_token: int = 3
 	image_tokens: int = 800
@@ -29,6 +37,9 @@ class MessageManagerSettings(BaseModel):
 	message_context: Optional[str] = None
 	sensitive_data: Optional[Dict[str, str]] = None
 	available_file_paths: Optional[List[str]] = None
+	# Defaults to estimating tokens with estimated_characters_per_token, a BPETokenCounter counts exactly for
+	# models using its encoding
+	token_counter: Optional[TokenCounter] = None
 
 
 class MessageManager:
@@ -43,6 +54,9 @@ class MessageManager:
 		self.settings = settings
 		self.state = state
 		self.system_prompt = system_message
+		self.token_counter = settings.token_counter or HeuristicTokenCounter(settings.estimated_characters_per_token)
+		# Compiled from settings.sensitive_data when the first message is filtered
+		self._redactor: Optional[SensitiveDataRedactor] = None
 
 		# Only initialize messages if state is empty
 		if len(self.state.history.messages) == 0:
@@ -200,15 +214,9 @@ class MessageManager:
 	@time_execution_sync('--filter_sensitive_data')
 	def _filter_sensitive_data(self, message: BaseMessage) -> BaseMessage:
 		"""Filter out sensitive data from the message"""
-
-		def replace_sensitive(value: str) -> str:
-			if not self.settings.sensitive_data:
-				return value
-			for key, val in self.settings.sensitive_data.items():
-				if not val:
-					continue
-				value = value.replace(val, f'<secret>{key}</secret>')
-			return value
+		if self._redactor is None or self._redactor.sensitive_data is not self.settings.sensitive_data:
+			self._redactor = SensitiveDataRedactor(self.settings.sensitive_data or {})
+		replace_sensitive = self._redactor.redact
 
 		if isinstance(message.content, str):
 			message.content = replace_sensitive(message.content)
@@ -225,7 +233,7 @@ class MessageManager:
 		if isinstance(message.content, list):
 			for item in message.content:
 				if 'image_url' in item:
-					tokens += self.settings.image_tokens
+					tokens += self._count_image_tokens(item)
 				elif isinstance(item, dict) and 'text' in item:
 					tokens += self._count_text_tokens(item['text'])
 		else:
@@ -237,8 +245,15 @@ class MessageManager:
 
 	def _count_text_tokens(self, text: str) -> int:
 		"""Count tokens in a text string"""
-		tokens = len(text) // self.settings.estimated_characters_per_token  # Rough estimate if no tokenizer available
-		return tokens
+		return self.token_counter.count_text(text)
+
+	def _count_image_tokens(self, item: dict) -> int:
+		"""Count tokens of an image content item, image_tokens unless the token counter costs images by their dimensions"""
+		image_url = item['image_url']
+		url = image_url.get('url', '') if isinstance(image_url, dict) else str(image_url)
+		size = get_image_url_size(url)
+		tokens = self.token_counter.count_image(*size) if size is not None else None
+		return self.settings.image_tokens if tokens is None else tokens
 
 	def cut_messages(self):
 		"""Get current message list, potentially trimmed to max tokens"""
@@ -253,12 +268,13 @@ class MessageManager:
 			text = ''
 			for item in msg.message.content:
 				if 'image_url' in item:
+					image_tokens = self._count_image_tokens(item)
 					msg.message.content.remove(item)
-					diff -= self.settings.image_tokens
-					msg.metadata.tokens -= self.settings.image_tokens
-					self.state.history.current_tokens -= self.settings.image_tokens
+					diff -= image_tokens
+					msg.metadata.tokens -= image_tokens
+					self.state.history.current_tokens -= image_tokens
 					logger.debug(
-						f'Removed image with {self.settings.image_tokens} tokens - total tokens now: {self.state.history.current_tokens}/{self.settings.max_input_tokens}'
+						f'Removed image with {image_tokens} tokens - total tokens now: {self.state.history.current_tokens}/{self.settings.max_input_tokens}'
 					)
 				elif 'text' in item and isinstance(item, dict):
 					text += item['text']
@@ -0,0 +1,174 @@
+"""
+Token counting for the message history, used to keep it within max_input_tokens.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import binascii
+import hashlib
+import logging
+import math
+import struct
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Number of texts whose token count is remembered per counter
+TOKEN_COUNT_CACHE_SIZE = 512
+
+
+def get_image_size(data: bytes) -> Optional[tuple[int, int]]:
+	"""Width and height of a PNG, JPEG or WebP image from its header, None if unknown"""
+	if data.startswith(b'\x89PNG\r\n\x1a\n') and len(data) >= 24:
+		return struct.unpack('>II', data[16:24])
+
+	if data.startswith(b'RIFF') and data[8:12] == b'WEBP' and len(data) >= 30:
+		chunk = data[12:16]
+		if chunk == b'VP8 ':
+			width, height = struct.unpack('<HH', data[26:30])
+			return width & 0x3FFF, height & 0x3FFF
+		if chunk == b'VP8L':
+			bits = int.from_bytes(data[21:25], 'little')
+			return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+		if chunk == b'VP8X':
+			return int.from_bytes(data[24:27], 'little') + 1, int.from_bytes(data[27:30], 'little') + 1
+		return None
+
+	if data.startswith(b'\xff\xd8'):
+		# Walk the segments up to the start of frame marker
+		offset = 2
+		while offset + 9 < len(data):
+			if data[offset] != 0xFF:
+				return None
+			marker = data[offset + 1]
+			if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+				offset += 2
+				continue
+			(length,) = struct.unpack('>H', data[offset + 2 : offset + 4])
+			if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+				height, width = struct.unpack('>HH', data[offset + 5 : offset + 9])
+				return width, height
+			offset += 2 + length
+	return None
+
+
+def get_image_url_size(url: str) -> Optional[tuple[int, int]]:
+	"""Width and height of an image in a base64 data URL, None if unknown"""
+	if not url.startswith('data:'):
+		return None
+	_, _, encoded = url.partition(',')
+	try:
+		# The headers of PNG and WebP are at the very start, JPEG needs to be searched
+		size = get_image_size(base64.b64decode(encoded[:64]))
+		if size is None and encoded.startswith('/9j/'):
+			size = get_image_size(base64.b64decode(encoded))
+	except (binascii.Error, ValueError, struct.error):
+		return None
+	return size
+
+
+class TokenCounter(ABC):
+	"""
+	Counts the tokens of texts and images in messages.
+
+	Text counts are memoized by a hash of the text, the state message is counted again whenever the
+	history is trimmed. Subclasses implement _count_text_tokens.
+	"""
+
+	def __init__(self):
+		self._cache: OrderedDict[bytes, int] = OrderedDict()
+
+	def count_text(self, text: str) -> int:
+		"""Number of tokens of a text"""
+		key = hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+		tokens = self._cache.get(key)
+		if tokens is not None:
+			self._cache.move_to_end(key)
+			return tokens
+
+		tokens = self._count_text_tokens(text)
+		self._cache[key] = tokens
+		if len(self._cache) > TOKEN_COUNT_CACHE_SIZE:
+			self._cache.popitem(last=False)
+		return tokens
+
+	def count_image(self, width: int, height: int) -> Optional[int]:
+		"""Number of tokens of an image with the given dimensions, None to use the fixed image_tokens of the settings"""
+		return None
+
+	@abstractmethod
+	def _count_text_tokens(self, text: str) -> int:
+		"""Number of tokens of a text, without the cache"""
+
+
+class HeuristicTokenCounter(TokenCounter):
+	"""Estimates tokens from the number of characters"""
+
+	def __init__(self, characters_per_token: int = 3):
+		super().__init__()
+		self.characters_per_token = characters_per_token
+
+	def _count_text_tokens(self, text: str) -> int:
+		return len(text) // self.characters_per_token
+
+
+_encodings: dict[str, Any] = {}
+_encodings_lock = threading.Lock()
+
+
+def _load_encoding(encoding_name: str) -> Any:
+	"""Load a tiktoken encoding once per process, None if tiktoken or its BPE ranks are not available"""
+	with _encodings_lock:
+		if encoding_name not in _encodings:
+			try:
+				import tiktoken
+
+				_encodings[encoding_name] = tiktoken.get_encoding(encoding_name)
+			except Exception as e:
+				logger.debug(f'Could not load tokenizer {encoding_name}, estimating tokens from characters: {e}')
+				_encodings[encoding_name] = None
+		return _encodings[encoding_name]
+
+
+class BPETokenCounter(TokenCounter):
+	"""
+	Counts tokens with a tiktoken BPE encoding, loaded on first use. The encoding files are downloaded
+	the first time an encoding is used, load_encoding can do that ahead of time off the event loop.
+	Only accurate for models that use this encoding, like the OpenAI models for o200k_base. Images are
+	costed by their dimensions with the tile formula of these models.
+
+	Falls back to the character heuristic if tiktoken is not installed or the encoding can't be loaded.
+	"""
+
+	def __init__(self, encoding_name: str = 'o200k_base', fallback: Optional[TokenCounter] = None):
+		super().__init__()
+		self.encoding_name = encoding_name
+		self.fallback = fallback or HeuristicTokenCounter()
+
+	def count_image(self, width: int, height: int) -> Optional[int]:
+		"""Number of tokens of an image in high detail, as OpenAI models charge it.
+
+		The image is scaled to fit into 2048x2048, then its shortest side to 768 pixels, and costs
+		170 tokens per 512 pixel tile plus 85.
+		"""
+		scale = min(1.0, 2048 / max(width, height))
+		width, height = width * scale, height * scale
+		scale = min(1.0, 768 / min(width, height))
+		width, height = width * scale, height * scale
+		tiles = math.ceil(width / 512) * math.ceil(height / 512)
+		return 170 * tiles + 85
+
+	def _count_text_tokens(self, text: str) -> int:
+		encoding = _load_encoding(self.encoding_name)
+		if encoding is None:
+			return self.fallback._count_text_tokens(text)
+		return len(encoding.encode(text, disallowed_special=()))
+
+	async def load_encoding(self) -> None:
+		"""Load the encoding in a thread, so counting on the event loop never waits for the download"""
+		await asyncio.to_thread(_load_encoding, self.encoding_name)
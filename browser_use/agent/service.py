@@ -23,8 +23,10 @@ from langchain_core.messages import (
 from pydantic import BaseModel, ValidationError
 
 from browser_use.agent.gif import create_history_gif
+from browser_use.agent.llm_verification import get_llm_verification_key, llm_verification_cache
 from browser_use.agent.memory.service import Memory, MemorySettings
 from browser_use.agent.message_manager.service import MessageManager, MessageManagerSettings
+from browser_use.agent.message_manager.token_counter import TokenCounter
 from browser_use.agent.message_manager.utils import convert_input_messages, extract_json_from_model_output, save_conversation
 from browser_use.agent.prompts import AgentMessagePrompt, PlannerPrompt, SystemPrompt
 from browser_use.agent.views import (
@@ -37,6 +39,7 @@ from browser_use.agent.views import (
 	AgentSettings,
 	AgentState,
 	AgentStepInfo,
+	LLMVerificationMode,
 	StepMetadata,
 	ToolCallingMethod,
 )
@@ -121,6 +124,7 @@ class Agent(Generic[Context]):
 		override_system_message: Optional[str] = None,
 		extend_system_message: Optional[str] = None,
 		max_input_tokens: int = 128000,
+		token_counter: Optional[TokenCounter] = None,
 		validate_output: bool = False,
 		message_context: Optional[str] = None,
 		generate_gif: bool | str = False,
@@ -151,6 +155,8 @@ class Agent(Generic[Context]):
 		enable_memory: bool = True,
 		memory_interval: int = 10,
 		memory_config: Optional[dict] = None,
+		shared_memory: bool = False,
+		llm_verification: LLMVerificationMode = 'probe',
 	):
 		if page_extraction_llm is None:
 			page_extraction_llm = llm
@@ -185,6 +191,8 @@ class Agent(Generic[Context]):
 			enable_memory=enable_memory,
 			memory_interval=memory_interval,
 			memory_config=memory_config,
+			shared_memory=shared_memory,
+			llm_verification=llm_verification,
 		)
 
 		# Initialize state
@@ -208,9 +216,6 @@ class Agent(Generic[Context]):
 			logger.error(f'Environment variables not set for {self.llm.__class__.__name__}')
 			raise ValueError('Environment variables not set')
 
-		# Start non-blocking LLM connection verification
-		self.llm._verified_api_keys = self._verify_llm_connection(self.llm)
-
 		# Initialize available actions for system prompt (only non-filtered actions)
 		# These will be used for the system prompt to maintain caching
 		self.unfiltered_actions = self.controller.registry.get_prompt_description()
@@ -234,6 +239,7 @@ class Agent(Generic[Context]):
 				message_context=self.settings.message_context,
 				sensitive_data=sensitive_data,
 				available_file_paths=self.settings.available_file_paths,
+				token_counter=token_counter,
 			),
 			state=self.state.message_manager_state,
 		)
@@ -243,6 +249,7 @@ class Agent(Generic[Context]):
 				agent_id=self.state.agent_id,
 				interval=self.settings.memory_interval,
 				config=self.settings.memory_config,
+				shared=self.settings.shared_memory,
 			)
 
 			# Initialize memory
@@ -391,9 +398,9 @@ class Agent(Generic[Context]):
 			state = await self.browser_context.get_state()
 			active_page = await self.browser_context.get_current_page()
 
-			# generate procedural memory if needed
+			# generate procedural memory if needed, in the background so the step is not held up by it
 			if self.settings.enable_memory and self.memory and self.state.n_steps % self.settings.memory_interval == 0:
-				self.memory.create_procedural_memory(self.state.n_steps)
+				self.memory.schedule_procedural_memory(self.state.n_steps)
 
 			await self._raise_if_stopped_or_paused()
 
@@ -632,7 +639,7 @@ class Agent(Generic[Context]):
 		if self.tool_calling_method == 'raw':
 			logger.debug(f'Using {self.tool_calling_method} for {self.chat_model_library}')
 			try:
-				output = self.llm.invoke(input_messages)
+				output = await self.llm.ainvoke(input_messages)
 			except Exception as e:
 				logger.error(f'Failed to invoke model: {str(e)}')
 				raise LLMException(401, 'LLM API call failed') from e
@@ -703,6 +710,9 @@ class Agent(Generic[Context]):
 		if not (hasattr(self.state, 'paused') and (self.state.paused or self.state.stopped)):
 			log_response(parsed)
 
+		if self.settings.llm_verification == 'lazy':
+			self._mark_llm_verified(self.llm)
+
 		return parsed
 
 	def _log_agent_run(self) -> None:
@@ -766,8 +776,9 @@ class Agent(Generic[Context]):
 		)
 		signal_handler.register()
 
-		# Start non-blocking LLM connection verification
-		assert await self.llm._verified_api_keys, 'Failed to verify LLM API keys'
+		# Verify the LLM connection, in lazy mode the first real call verifies it instead
+		if self.settings.llm_verification == 'probe':
+			assert await self._verify_llm_connection(self.llm), 'Failed to verify LLM API keys'
 
 		try:
 			self._log_agent_run()
@@ -841,6 +852,8 @@ class Agent(Generic[Context]):
 				)
 			)
 
+			# The frame buffers outlive the screencasts, which are stopped when the browser context is closed
+			screencast_frames = self.browser_context.screencast_frames
 			await self.close()
 
 			if self.settings.generate_gif:
@@ -848,7 +861,7 @@ class Agent(Generic[Context]):
 				if isinstance(self.settings.generate_gif, str):
 					output_path = self.settings.generate_gif
 
-				create_history_gif(task=self.task, history=self.state.history, output_path=output_path)
+				create_history_gif(task=self.task, history=self.state.history, output_path=output_path, frames=screencast_frames)
 
 	# @observe(name='controller.multi_act')
 	@time_execution_async('--multi-act (agent)')
@@ -1153,6 +1166,20 @@ class Agent(Generic[Context]):
 			# If the LLM API keys have already been verified during a previous run, skip the test
 			return True
 
+		# Other clients for the same provider, model, endpoint and key verified recently count as well
+		verified = await llm_verification_cache.verify(get_llm_verification_key(llm), lambda: self._probe_llm(llm))
+		if verified:
+			llm._verified_api_keys = True
+		return verified
+
+	def _mark_llm_verified(self, llm: BaseChatModel) -> None:
+		"""Record that a real call to the LLM succeeded, which verifies it as well as the test prompt would"""
+		if getattr(llm, '_verified_api_keys', None) is not True:
+			llm_verification_cache.mark_verified(get_llm_verification_key(llm))
+			llm._verified_api_keys = True
+
+	async def _probe_llm(self, llm: BaseChatModel) -> bool:
+		"""Send a simple test prompt and check that the response contains the expected answer"""
 		test_prompt = 'What is the capital of France? Respond with a single word.'
 		test_answer = 'paris'
 		required_keys = REQUIRED_LLM_API_ENV_VARS.get(llm.__class__.__name__, ['OPENAI_API_KEY'])
@@ -1164,7 +1191,6 @@ class Agent(Generic[Context]):
 				logger.debug(
 					f'🧠 LLM API keys {", ".join(required_keys)} verified, {llm.__class__.__name__} model is connected and responding correctly.'
 				)
-				llm._verified_api_keys = True
 				return True
 			else:
 				logger.debug(
@@ -1253,6 +1279,9 @@ class Agent(Generic[Context]):
 	async def close(self):
 		"""Close all resources"""
 		try:
+			if self.memory:
+				await self.memory.close()
+
 			# First close browser resources
 			if self.browser_context and not self.injected_browser_context:
 				await self.browser_context.close()
@@ -4,6 +4,7 @@ import json
 import traceback
 import uuid
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Literal, Optional, Type
 
@@ -22,6 +23,7 @@ from browser_use.dom.history_tree_processor.service import (
 from browser_use.dom.views import SelectorMap
 
 ToolCallingMethod = Literal['function_calling', 'json_mode', 'raw', 'auto']
+LLMVerificationMode = Literal['probe', 'lazy']
 REQUIRED_LLM_API_ENV_VARS = {
 	'ChatOpenAI': ['OPENAI_API_KEY'],
 	'AzureOpenAI': ['AZURE_ENDPOINT', 'AZURE_OPENAI_API_KEY'],
@@ -73,6 +75,10 @@ class AgentSettings(BaseModel):
 	enable_memory: bool = True
 	memory_interval: int = 10
 	memory_config: Optional[dict] = None
+	shared_memory: bool = False
+
+	# 'probe' sends a test prompt before the first step, 'lazy' treats the first successful step as verification
+	llm_verification: LLMVerificationMode = 'probe'
 
 
 class AgentState(BaseModel):
@@ -151,8 +157,12 @@ class AgentOutput(BaseModel):
 	)
 
 	@staticmethod
+	@lru_cache(maxsize=32)
 	def type_with_custom_actions(custom_actions: Type[ActionModel]) -> Type['AgentOutput']:
-		"""Extend actions with custom actions"""
+		"""Extend actions with custom actions
+
+		Cached per action model, the registry hands out the same model for the same set of actions.
+		"""
 		model_ = create_model(
 			'AgentOutput',
 			__base__=AgentOutput,
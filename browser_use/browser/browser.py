@@ -31,6 +31,7 @@ from browser_use.browser.chrome import (
 	CHROME_HEADLESS_ARGS,
 )
 from browser_use.browser.context import BrowserContext, BrowserContextConfig
+from browser_use.browser.context_pool import BrowserContextPool, WarmContext, can_pool
 from browser_use.browser.utils.screen_resolution import get_screen_resolution, get_window_adjustments
 from browser_use.utils import time_execution_async
 
@@ -77,6 +78,11 @@ class BrowserConfig(BaseModel):
 
 		deterministic_rendering: False
 			Enable deterministic rendering (makes GPU/font rendering consistent across different OS's and docker)
+
+		context_pool_size: 0
+			Keep this many browser contexts with new_context_config initialized in the background. Browser contexts
+			with that config take one instead of creating their own, and give it back wiped when they are closed.
+			Not used with cdp_url or browser_binary_path, or when new_context_config records traces, videos or HARs.
 	"""
 
 	model_config = ConfigDict(
@@ -102,6 +108,7 @@ class BrowserConfig(BaseModel):
 
 	proxy: ProxySettings | None = None
 	new_context_config: BrowserContextConfig = Field(default_factory=BrowserContextConfig)
+	context_pool_size: int = 0
 
 
 # @singleton: TODO - think about id singleton makes sense here
@@ -123,9 +130,26 @@ class Browser:
 		self.playwright: Playwright | None = None
 		self.playwright_browser: PlaywrightBrowser | None = None
 
+		# Created with the Playwright browser if context_pool_size is set
+		self._context_pool: BrowserContextPool | None = None
+
 	async def new_context(self, config: BrowserContextConfig | None = None) -> BrowserContext:
 		"""Create a browser context"""
-		return BrowserContext(config=config or self.config, browser=self)
+		return BrowserContext(config=config or self.config.new_context_config, browser=self)
+
+	async def acquire_warm_context(self, config: BrowserContextConfig) -> WarmContext | None:
+		"""Take an initialized Playwright context for a browser context with this config from the pool, if any"""
+		await self.get_playwright_browser()
+		if self._context_pool is None or not self._context_pool.matches(config):
+			return None
+		return await self._context_pool.acquire()
+
+	async def release_warm_context(self, warm: WarmContext) -> None:
+		"""Return a context taken with acquire_warm_context"""
+		if self._context_pool is not None:
+			await self._context_pool.release(warm)
+		else:
+			await warm.context.close()
 
 	async def get_playwright_browser(self) -> PlaywrightBrowser:
 		"""Get a browser context"""
@@ -143,6 +167,14 @@ class Browser:
 		self.playwright = playwright
 		self.playwright_browser = browser
 
+		if (
+			self.config.context_pool_size > 0
+			and not (self.config.cdp_url or self.config.browser_binary_path)
+			and can_pool(self.config.new_context_config)
+		):
+			self._context_pool = BrowserContextPool(self, self.config.new_context_config, self.config.context_pool_size)
+			self._context_pool.start()
+
 		return self.playwright_browser
 
 	async def _setup_remote_cdp_browser(self, playwright: Playwright) -> PlaywrightBrowser:
@@ -314,6 +346,9 @@ class Browser:
 			return
 
 		try:
+			if self._context_pool is not None:
+				await self._context_pool.close()
+				self._context_pool = None
 			if self.playwright_browser:
 				await self.playwright_browser.close()
 				del self.playwright_browser
@@ -5,6 +5,7 @@ Playwright browser on steroids.
 import asyncio
 import base64
 import gc
+import hashlib
 import json
 import logging
 import os
@@ -12,7 +13,7 @@ import re
 import time
 import uuid
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Awaitable, Literal, Optional, TypeVar
 
 from playwright._impl._errors import TimeoutError
 from playwright.async_api import Browser as PlaywrightBrowser
@@ -27,21 +28,48 @@ from playwright.async_api import (
 from pydantic import BaseModel, ConfigDict, Field
 from typing_extensions import TypedDict
 
+from browser_use.browser.domains import DomainMatcher
+from browser_use.browser.network import NetworkIdleTracker
+from browser_use.browser.screencast import FrameRingBuffer, PageScreencast
+from browser_use.browser.screenshot import PageScreenshotter, ScreenshotFormat, draw_highlights
 from browser_use.browser.views import (
 	BrowserError,
 	BrowserState,
 	TabInfo,
 	URLNotAllowedError,
 )
-from browser_use.dom.service import DomService
-from browser_use.dom.views import DOMElementNode, SelectorMap
+from browser_use.dom.service import DomService, get_build_dom_tree_install_js
+from browser_use.dom.views import DOMElementNode, DOMState, HighlightBox, PageInfo, SelectorMap
 from browser_use.utils import time_execution_async, time_execution_sync
 
 if TYPE_CHECKING:
 	from browser_use.browser.browser import Browser
+	from browser_use.browser.context_pool import WarmContext
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar('T')
+
+# Seconds to wait for the titles of all tabs together
+TAB_TITLE_TIMEOUT = 1
+
+
+async def _timed(timings: dict[str, float], name: str, awaitable: Awaitable[T]) -> T:
+	"""Await and record how long it took under `name`"""
+	start = time.perf_counter()
+	try:
+		return await awaitable
+	finally:
+		timings[name] = time.perf_counter() - start
+
+
+def _selector_map_digest(selector_map: SelectorMap) -> bytes:
+	"""Digest of the interactive elements with their attributes and text, changes with most edits of the page"""
+	digest = hashlib.blake2b(digest_size=16)
+	for index, node in selector_map.items():
+		digest.update(f'{index}\0{node.xpath}\0{node.attributes}\0{node.get_all_text_till_next_clickable_element()}\0'.encode())
+	return digest.digest()
+
 
 class BrowserContextWindowSize(TypedDict):
 	width: int
@@ -96,6 +124,11 @@ class BrowserContextConfig(BaseModel):
 	    highlight_elements: True
 	        Highlight elements in the DOM on the screen
 
+	    highlight_mode: 'dom'
+	        How highlights are drawn. 'dom' adds overlays to the page before the screenshot and removes them again
+	        before actions. 'screenshot' leaves the page untouched and draws the boxes onto the screenshot with Pillow
+	        in a worker thread, avoiding two DOM mutations per step and layout changes on sensitive pages.
+
 	    viewport_expansion: 500
 	        Viewport expansion in pixels. This amount will increase the number of elements which are included in the state what the LLM will see. If set to -1, all elements will be included (this leads to high token usage). If set to 0, only the elements which are visible in the viewport will be included.
 
@@ -106,6 +139,37 @@ class BrowserContextConfig(BaseModel):
 	    include_dynamic_attributes: bool = True
 	        Include dynamic attributes in the CSS selector. If you want to reuse the css_selectors, it might be better to set this to False.
 
+	    incremental_dom_snapshots: False
+	        Keep a MutationObserver in each page and only re-extract the parts of the DOM that changed since the previous step.
+	        Falls back to a full snapshot after navigation, scrolling or resizing.
+
+	    compact_dom_payload: False
+	        Send full DOM snapshots from the page as parallel arrays with a shared string table instead of one object per node.
+	        Smaller to transfer and faster to decode on large pages. Incremental snapshots always use the keyed format.
+
+	    concurrent_state_capture: False
+	        Collect tab information concurrently with the DOM extraction and screenshot when updating the state.
+	        The screenshot is still taken after the highlights are drawn.
+
+	    screenshot_format: 'png'
+	        Image format of screenshots, 'png', 'jpeg' or 'webp'. JPEG and WebP are much smaller, also once base64 encoded.
+
+	    screenshot_quality: 80
+	        Quality of JPEG and WebP screenshots, from 0 to 100.
+
+	    screenshot_max_dimension: None
+	        Downscale screenshots so that their longest side is at most this many pixels, e.g. 768 or 2048 to match
+	        the image tiles of the vision model. Larger screenshots cost tokens without adding detail for the model.
+
+	    skip_unchanged_screenshots: False
+	        Compare a small thumbnail of the page and a digest of its interactive elements with the ones of the
+	        previous screenshot and reuse the previous screenshot if both are the same. Only for Chromium based browsers.
+
+	    screenshot_source: 'capture'
+	        'capture' takes a screenshot whenever one is needed. 'screencast' keeps a DevTools screencast of the
+	        current tab running and returns its latest frame, which doesn't block on a capture. Screencast frames
+	        are JPEG or PNG. Full page screenshots and browsers without screencast support fall back to a capture.
+
 	    is_mobile: None
 	        Whether the meta viewport tag is taken into account and touch events are enabled.
 
@@ -152,9 +216,19 @@ class BrowserContextConfig(BaseModel):
 	)
 
 	highlight_elements: bool = True
+	highlight_mode: Literal['dom', 'screenshot'] = 'dom'
 	viewport_expansion: int = 500
 	allowed_domains: list[str] | None = None
 	include_dynamic_attributes: bool = True
+	incremental_dom_snapshots: bool = False
+	compact_dom_payload: bool = False
+	concurrent_state_capture: bool = False
+
+	screenshot_format: ScreenshotFormat = 'png'
+	screenshot_quality: int = 80
+	screenshot_max_dimension: int | None = None
+	skip_unchanged_screenshots: bool = False
+	screenshot_source: Literal['capture', 'screencast'] = 'capture'
 
 	keep_alive: bool = Field(default=False, alias='_force_keep_context_alive')  # used to be called _force_keep_context_alive
 	is_mobile: bool | None = None
@@ -243,6 +317,33 @@ class BrowserContext:
 		self.session: BrowserSession | None = None
 		self.active_tab: Page | None = None
 
+		# One DomService per page so incremental snapshots can build on the previous one
+		self._dom_services: dict[Page, DomService] = {}
+
+		# Long-lived per page so requests started between steps are not missed
+		self._network_trackers: dict[Page, NetworkIdleTracker] = {}
+
+		# Tab titles kept up to date by navigation events, None while unknown
+		self._tab_titles: dict[Page, str | None] = {}
+
+		# Only used for screenshots that are not plain full size PNGs
+		self._screenshotters: dict[Page, PageScreenshotter] = {}
+
+		# Running screencasts with screenshot_source='screencast', None for pages where it could not be started
+		self._screencasts: dict[Page, PageScreencast | None] = {}
+		# Page of the previous screencast frame and when that page was last changed by us (time.monotonic())
+		self._screencast_page: Page | None = None
+		self._page_changed_at: float | None = None
+		self._highlights_in_page = False
+		# Digest of the DOM of the last captured state, an unchanged screenshot is only reused while it is the same
+		self._dom_digest: bytes | None = None
+
+		# Compiled from config.allowed_domains on first use, with the domains it was compiled from
+		self._allowed_domains_matcher: tuple[tuple[str, ...], DomainMatcher] | None = None
+
+		# Playwright context taken from the pool of the browser, given back on close
+		self._warm_context: 'WarmContext | None' = None
+
 	async def __aenter__(self):
 		"""Async context manager entry"""
 		await self._initialize_session()
@@ -271,6 +372,12 @@ class BrowserContext:
 
 			await self.save_cookies()
 
+			for screenshotter in self._screenshotters.values():
+				await screenshotter.close()
+			for screencast in self._screencasts.values():
+				if screencast is not None:
+					await screencast.stop()
+
 			if self.config.trace_path:
 				try:
 					await self.session.context.tracing.stop(path=os.path.join(self.config.trace_path, f'{self.context_id}.zip'))
@@ -281,14 +388,28 @@ class BrowserContext:
 			if not self.config.keep_alive:
 				logger.debug('Closing browser context')
 				try:
-					await self.session.context.close()
+					if self._warm_context is not None:
+						# Wiped and reused by the next browser context
+						await self.browser.release_warm_context(self._warm_context)
+					else:
+						await self.session.context.close()
 				except Exception as e:
 					logger.debug(f'Failed to close context: {e}')
 
 		finally:
 			# Dereference everything
 			self.active_tab = None
+			self._dom_services.clear()
+			self._screenshotters.clear()
+			self._screencasts.clear()
+			self._screencast_page = None
+			self._dom_digest = None
+			for tracker in self._network_trackers.values():
+				tracker.close()
+			self._network_trackers.clear()
+			self._tab_titles.clear()
 			self.session = None
+			self._warm_context = None
 			self._page_event_handler = None
 
 	def __del__(self):
@@ -311,8 +432,16 @@ class BrowserContext:
 		logger.debug(f'🌎  Initializing new browser context with id: {self.context_id}')
 
 		playwright_browser = await self.browser.get_playwright_browser()
-		context = await self._create_context(playwright_browser)
-		self._page_event_handler = None
+		self._warm_context = await self.browser.acquire_warm_context(self.config)
+		if self._warm_context is not None:
+			logger.debug('♨️  Using a pre-created browser context')
+			context = self._warm_context.context
+		else:
+			context = await self._create_context(playwright_browser)
+
+		# Track the requests of new tabs from their first request, removed again when the context is closed
+		self._page_event_handler = self._get_network_tracker
+		context.on('page', self._page_event_handler)
 
 		# Get or create a page to use
 		pages = context.pages
@@ -368,22 +497,6 @@ class BrowserContext:
 
 		return self.session
 
-	def _add_new_page_listener(self, context: PlaywrightBrowserContext):
-		async def on_page(page: Page):
-			if self.browser.config.cdp_url:
-				await page.reload()  # Reload the page to avoid timeout errors
-			await page.wait_for_load_state()
-			logger.debug(f'📑  New page opened: {page.url}')
-
-			if not page.url.startswith('chrome-extension://') and not page.url.startswith('chrome://'):
-				self.active_tab = page
-
-			if self.session is not None:
-				self.state.target_id = None
-
-		self._page_event_handler = on_page
-		context.on('page', on_page)
-
 	async def get_session(self) -> BrowserSession:
 		"""Lazy initialization of the browser and related components"""
 		if self.session is None:
@@ -472,176 +585,32 @@ class BrowserContext:
             """
 		)
 
+		# Install the DOM extractor once per document instead of sending it on every step
+		await context.add_init_script(get_build_dom_tree_install_js())
+
 		return context
 
 	async def _wait_for_stable_network(self):
 		page = await self.get_current_page()
+		tracker = self._get_network_tracker(page)
 
-		pending_requests = set()
-		last_activity = asyncio.get_event_loop().time()
-
-		# Define relevant resource types and content types
-		RELEVANT_RESOURCE_TYPES = {
-			'document',
-			'stylesheet',
-			'image',
-			'font',
-			'script',
-			'iframe',
-		}
-
-		RELEVANT_CONTENT_TYPES = {
-			'text/html',
-			'text/css',
-			'application/javascript',
-			'image/',
-			'font/',
-			'application/json',
-		}
-
-		# Additional patterns to filter out
-		IGNORED_URL_PATTERNS = {
-			# Analytics and tracking
-			'analytics',
-			'tracking',
-			'telemetry',
-			'beacon',
-			'metrics',
-			# Ad-related
-			'doubleclick',
-			'adsystem',
-			'adserver',
-			'advertising',
-			# Social media widgets
-			'facebook.com/plugins',
-			'platform.twitter',
-			'linkedin.com/embed',
-			# Live chat and support
-			'livechat',
-			'zendesk',
-			'intercom',
-			'crisp.chat',
-			'hotjar',
-			# Push notifications
-			'push-notifications',
-			'onesignal',
-			'pushwoosh',
-			# Background sync/heartbeat
-			'heartbeat',
-			'ping',
-			'alive',
-			# WebRTC and streaming
-			'webrtc',
-			'rtmp://',
-			'wss://',
-			# Common CDNs for dynamic content
-			'cloudfront.net',
-			'fastly.net',
-		}
-
-		async def on_request(request):
-			# Filter by resource type
-			if request.resource_type not in RELEVANT_RESOURCE_TYPES:
-				return
-
-			# Filter out streaming, websocket, and other real-time requests
-			if request.resource_type in {
-				'websocket',
-				'media',
-				'eventsource',
-				'manifest',
-				'other',
-			}:
-				return
-
-			# Filter out by URL patterns
-			url = request.url.lower()
-			if any(pattern in url for pattern in IGNORED_URL_PATTERNS):
-				return
-
-			# Filter out data URLs and blob URLs
-			if url.startswith(('data:', 'blob:')):
-				return
-
-			# Filter out requests with certain headers
-			headers = request.headers
-			if headers.get('purpose') == 'prefetch' or headers.get('sec-fetch-dest') in [
-				'video',
-				'audio',
-			]:
-				return
-
-			nonlocal last_activity
-			pending_requests.add(request)
-			last_activity = asyncio.get_event_loop().time()
-			# logger.debug(f'Request started: {request.url} ({request.resource_type})')
-
-		async def on_response(response):
-			request = response.request
-			if request not in pending_requests:
-				return
-
-			# Filter by content type if available
-			content_type = response.headers.get('content-type', '').lower()
-
-			# Skip if content type indicates streaming or real-time data
-			if any(
-				t in content_type
-				for t in [
-					'streaming',
-					'video',
-					'audio',
-					'webm',
-					'mp4',
-					'event-stream',
-					'websocket',
-					'protobuf',
-				]
-			):
-				pending_requests.remove(request)
-				return
-
-			# Only process relevant content types
-			if not any(ct in content_type for ct in RELEVANT_CONTENT_TYPES):
-				pending_requests.remove(request)
-				return
-
-			# Skip if response is too large (likely not essential for page load)
-			content_length = response.headers.get('content-length')
-			if content_length and int(content_length) > 5 * 1024 * 1024:  # 5MB
-				pending_requests.remove(request)
-				return
-
-			nonlocal last_activity
-			pending_requests.remove(request)
-			last_activity = asyncio.get_event_loop().time()
-			# logger.debug(f'Request resolved: {request.url} ({content_type})')
-
-		# Attach event listeners
-		page.on('request', on_request)
-		page.on('response', on_response)
-
-		try:
-			# Wait for idle time
-			start_time = asyncio.get_event_loop().time()
-			while True:
-				await asyncio.sleep(0.1)
-				now = asyncio.get_event_loop().time()
-				if len(pending_requests) == 0 and (now - last_activity) >= self.config.wait_for_network_idle_page_load_time:
-					break
-				if now - start_time > self.config.maximum_wait_page_load_time:
-					logger.debug(
-						f'Network timeout after {self.config.maximum_wait_page_load_time}s with {len(pending_requests)} '
-						f'pending requests: {[r.url for r in pending_requests]}'
-					)
-					break
+		idle = await tracker.wait_for_idle(
+			idle_time=self.config.wait_for_network_idle_page_load_time,
+			timeout=self.config.maximum_wait_page_load_time,
+		)
+		if idle:
+			logger.debug(f'⚖️  Network stabilized for {self.config.wait_for_network_idle_page_load_time} seconds')
 
-		finally:
-			# Clean up event listeners
-			page.remove_listener('request', on_request)
-			page.remove_listener('response', on_response)
+	def _get_network_tracker(self, page: Page) -> NetworkIdleTracker:
+		"""Get the network tracker of a page, attaching one on first use"""
+		for closed_page in [p for p in self._network_trackers if p.is_closed()]:
+			self._network_trackers.pop(closed_page).close()
 
-		logger.debug(f'⚖️  Network stabilized for {self.config.wait_for_network_idle_page_load_time} seconds')
+		tracker = self._network_trackers.get(page)
+		if tracker is None:
+			tracker = NetworkIdleTracker(page)
+			self._network_trackers[page] = tracker
+		return tracker
 
 	async def _wait_for_page_and_frames_load(self, timeout_overwrite: float | None = None):
 		"""
@@ -680,28 +649,17 @@ class BrowserContext:
 		if not self.config.allowed_domains:
 			return True
 
-		try:
-			from urllib.parse import urlparse
-
-			parsed_url = urlparse(url)
-			domain = parsed_url.netloc.lower()
+		# Special case: Allow 'about:blank' explicitly
+		if url == 'about:blank':
+			return True
 
-			# Special case: Allow 'about:blank' explicitly
-			if url == 'about:blank':
-				return True
+		# Compiled again if the allowed domains were changed since
+		allowed_domains = tuple(self.config.allowed_domains)
+		if self._allowed_domains_matcher is None or self._allowed_domains_matcher[0] != allowed_domains:
+			self._allowed_domains_matcher = (allowed_domains, DomainMatcher.from_allowed_domains(allowed_domains))
 
-			# Remove port number if present
-			if ':' in domain:
-				domain = domain.split(':')[0]
-
-			# Check if domain matches any allowed domain pattern
-			return any(
-				domain == allowed_domain.lower() or domain.endswith('.' + allowed_domain.lower())
-				for allowed_domain in self.config.allowed_domains
-			)
-		except Exception as e:
-			logger.error(f'⛔️  Error checking URL allowlist: {str(e)}')
-			return False
+		# Allowed if the domain is one of the allowed domains or a subdomain of one
+		return self._allowed_domains_matcher[1].matches(url)
 
 	async def _check_and_handle_navigation(self, page: Page) -> None:
 		"""Check if current page URL is allowed and handle if not."""
@@ -855,78 +813,192 @@ class BrowserContext:
 
 		return session.cached_state
 
+	async def _capture_page_state(self, page: Page, focus_element: int = -1) -> tuple[DOMState, PageInfo]:
+		return await self._get_dom_service(page).capture_page_state(
+			focus_element=focus_element,
+			viewport_expansion=self.config.viewport_expansion,
+			highlight_elements=self.config.highlight_elements,
+			incremental=self.config.incremental_dom_snapshots,
+			compact_payload=self.config.compact_dom_payload,
+			highlight_boxes=self.config.highlight_mode == 'screenshot',
+		)
+
+	def _get_dom_service(self, page: Page) -> DomService:
+		"""Get the DomService of a page, creating it on first use"""
+		# DomService holds on to its page, so drop the ones of closed pages
+		for closed_page in [p for p in self._dom_services if p.is_closed()]:
+			del self._dom_services[closed_page]
+
+		dom_service = self._dom_services.get(page)
+		if dom_service is None:
+			dom_service = DomService(page)
+			self._dom_services[page] = dom_service
+		return dom_service
+
+	def _get_screenshotter(self, page: Page) -> PageScreenshotter:
+		"""Get the PageScreenshotter of a page, creating it on first use"""
+		for closed_page in [p for p in self._screenshotters if p.is_closed()]:
+			del self._screenshotters[closed_page]
+
+		screenshotter = self._screenshotters.get(page)
+		if screenshotter is None:
+			screenshotter = PageScreenshotter(
+				page,
+				format=self.config.screenshot_format,
+				quality=self.config.screenshot_quality,
+				max_dimension=self.config.screenshot_max_dimension,
+				skip_unchanged=self.config.skip_unchanged_screenshots,
+			)
+			self._screenshotters[page] = screenshotter
+		return screenshotter
+
+	async def _get_screencast(self, page: Page) -> PageScreencast | None:
+		"""Get the running screencast of a page, starting it on first use. None if the browser can't screencast"""
+		for closed_page in [p for p in self._screencasts if p.is_closed()]:
+			del self._screencasts[closed_page]
+
+		if page in self._screencasts:
+			return self._screencasts[page]
+
+		screencast = PageScreencast(
+			page,
+			format='png' if self.config.screenshot_format == 'png' else 'jpeg',
+			quality=self.config.screenshot_quality,
+			max_dimension=self.config.screenshot_max_dimension,
+		)
+		try:
+			await screencast.start()
+		except Exception as e:
+			logger.debug(f'Screencast not available, capturing screenshots of this page: {e}')
+			screencast = None
+		self._screencasts[page] = screencast
+		return screencast
+
+	@property
+	def screencast_frames(self) -> list[FrameRingBuffer]:
+		"""Frame buffers of the running screencasts"""
+		return [screencast.frames for screencast in self._screencasts.values() if screencast is not None]
+
 	async def _update_state(self, focus_element: int = -1) -> BrowserState:
 		"""Update and return state."""
 		session = await self.get_session()
 
-		# Check if current page is still valid, if not switch to another available page
-		try:
-			page = await self.get_current_page()
-			# Test if page is still accessible
-			await page.evaluate('1')
-		except Exception as e:
-			logger.debug(f'👋  Current page is no longer accessible: {str(e)}')
-			# Get all available pages
-			pages = session.context.pages
-			if pages:
-				self.state.target_id = None
-				page = await self._get_current_page(session)
-				logger.debug(f'🔄  Switched to page: {await page.title()}')
-			else:
-				raise BrowserError('Browser closed: no valid pages available')
+		timings: dict[str, float] = {}
+		start = time.perf_counter()
+
+		# Tabs don't depend on the current page, so in concurrent mode they are collected
+		# while the page is captured. The screenshot always waits for the highlights to be drawn.
+		tabs_task = None
+		if self.config.concurrent_state_capture:
+			tabs_task = asyncio.create_task(_timed(timings, 'tabs', self.get_tabs_info()))
 
 		try:
-			await self.remove_highlights()
-			dom_service = DomService(page)
-			content = await dom_service.get_clickable_elements(
-				focus_element=focus_element,
-				viewport_expansion=self.config.viewport_expansion,
-				highlight_elements=self.config.highlight_elements,
-			)
+			# Check if current page is still valid, if not switch to another available page
+			content = page_info = page = None
+			captured_at = time.monotonic()
+			try:
+				page = await self.get_current_page()
+				# A single evaluation checks that the page is alive, removes old highlights, extracts the DOM
+				# and reads scroll metrics and title
+				captured_at = time.monotonic()
+				content, page_info = await _timed(timings, 'dom', self._capture_page_state(page, focus_element))
+			except Exception as e:
+				if page is not None and not page.is_closed():
+					# The page is still there, the extraction failed or timed out: it is tried once more below
+					logger.debug(f'⚠️  Failed to capture the page state, retrying: {str(e)}')
+				else:
+					page = None
+					logger.debug(f'👋  Current page is no longer accessible: {str(e)}')
+
+			if page is None:
+				# Get all available pages
+				pages = session.context.pages
+				if pages:
+					self.state.target_id = None
+					page = await self._get_current_page(session)
+					logger.debug(f'🔄  Switched to page: {await page.title()}')
+				else:
+					raise BrowserError('Browser closed: no valid pages available')
 
-			tabs_info = await self.get_tabs_info()
-
-			# Get all cross-origin iframes within the page and open them in new tabs
-			# mark the titles of the new tabs so the LLM knows to check them for additional content
-			# unfortunately too buggy for now, too many sites use invisible cross-origin iframes for ads, tracking, youtube videos, social media, etc.
-			# and it distracts the bot by openeing a lot of new tabs
-			# iframe_urls = await dom_service.get_cross_origin_iframes()
-			# for url in iframe_urls:
-			# 	if url in [tab.url for tab in tabs_info]:
-			# 		continue  # skip if the iframe if we already have it open in a tab
-			# 	new_page_id = tabs_info[-1].page_id + 1
-			# 	logger.debug(f'Opening cross-origin iframe in new tab #{new_page_id}: {url}')
-			# 	await self.create_new_tab(url)
-			# 	tabs_info.append(
-			# 		TabInfo(
-			# 			page_id=new_page_id,
-			# 			url=url,
-			# 			title=f'iFrame opened as new tab, treat as if embedded inside page #{self.state.target_id}: {page.url}',
-			# 			parent_page_id=self.state.target_id,
-			# 		)
-			# 	)
-
-			screenshot_b64 = await self.take_screenshot()
-			pixels_above, pixels_below = await self.get_scroll_info(page)
-
-			self.current_state = BrowserState(
-				element_tree=content.element_tree,
-				selector_map=content.selector_map,
-				url=page.url,
-				title=await page.title(),
-				tabs=tabs_info,
-				screenshot=screenshot_b64,
-				pixels_above=pixels_above,
-				pixels_below=pixels_below,
-			)
+			try:
+				if content is None or page_info is None:
+					captured_at = time.monotonic()
+					content, page_info = await _timed(timings, 'dom', self._capture_page_state(page, focus_element))
+
+				# The capture read the current title anyway
+				if page in self._tab_titles:
+					self._tab_titles[page] = page_info.title
+
+				if tabs_task is None:
+					tabs_info = await _timed(timings, 'tabs', self.get_tabs_info())
+
+				# Get all cross-origin iframes within the page and open them in new tabs
+				# mark the titles of the new tabs so the LLM knows to check them for additional content
+				# unfortunately too buggy for now, too many sites use invisible cross-origin iframes for ads, tracking, youtube videos, social media, etc.
+				# and it distracts the bot by openeing a lot of new tabs
+				# iframe_urls = await dom_service.get_cross_origin_iframes()
+				# for url in iframe_urls:
+				# 	if url in [tab.url for tab in tabs_info]:
+				# 		continue  # skip if the iframe if we already have it open in a tab
+				# 	new_page_id = tabs_info[-1].page_id + 1
+				# 	logger.debug(f'Opening cross-origin iframe in new tab #{new_page_id}: {url}')
+				# 	await self.create_new_tab(url)
+				# 	tabs_info.append(
+				# 		TabInfo(
+				# 			page_id=new_page_id,
+				# 			url=url,
+				# 			title=f'iFrame opened as new tab, treat as if embedded inside page #{self.state.target_id}: {page.url}',
+				# 			parent_page_id=self.state.target_id,
+				# 		)
+				# 	)
+
+				if self.config.highlight_elements and self.config.highlight_mode == 'dom':
+					# Drawing or removing highlights repaints the page during the capture, a screencast frame from
+					# before the capture started is outdated. Frames of the repaint may arrive before it returns
+					highlights_in_page = bool(content.selector_map)
+					if highlights_in_page or self._highlights_in_page:
+						self._page_changed_at = captured_at
+					self._highlights_in_page = highlights_in_page
+
+				if self.config.skip_unchanged_screenshots:
+					self._dom_digest = _selector_map_digest(content.selector_map)
+				screenshot_b64 = await _timed(timings, 'screenshot', self.take_screenshot())
+				if content.highlight_boxes:
+					screenshot_b64 = await _timed(
+						timings, 'highlights', self._draw_highlights(screenshot_b64, content.highlight_boxes, page_info)
+					)
+
+				if tabs_task is not None:
+					tabs_info = await tabs_task
+
+				timings['total'] = time.perf_counter() - start
+
+				self.current_state = BrowserState(
+					element_tree=content.element_tree,
+					selector_map=content.selector_map,
+					url=page.url,
+					title=page_info.title,
+					tabs=tabs_info,
+					screenshot=screenshot_b64,
+					pixels_above=page_info.pixels_above,
+					pixels_below=page_info.pixels_below,
+					timings=timings,
+				)
 
-			return self.current_state
-		except Exception as e:
-			logger.error(f'❌  Failed to update state: {str(e)}')
-			# Return last known good state if available
-			if hasattr(self, 'current_state'):
 				return self.current_state
-			raise
+			except Exception as e:
+				logger.error(f'❌  Failed to update state: {str(e)}')
+				# Return last known good state if available
+				if hasattr(self, 'current_state'):
+					return self.current_state
+				raise
+		finally:
+			# Don't leave the tabs task running, or its error unretrieved, when the state could not be captured
+			if tabs_task is not None:
+				if not tabs_task.done():
+					tabs_task.cancel()
+				elif not tabs_task.cancelled():
+					tabs_task.exception()
 
 	# region - Browser Actions
 	@time_execution_async('--take_screenshot')
@@ -939,6 +1011,24 @@ class BrowserContext:
 		await page.bring_to_front()
 		await page.wait_for_load_state()
 
+		if self.config.screenshot_source == 'screencast' and not full_page:
+			screencast = await self._get_screencast(page)
+			if screencast is not None:
+				if page is not self._screencast_page:
+					# Frames of a tab that was in the background may be outdated
+					self._screencast_page = page
+					self._page_changed_at = time.monotonic()
+				frame = await screencast.latest_frame(fresh_after=self._page_changed_at)
+				if frame is not None:
+					return frame.data
+
+		if (
+			self.config.screenshot_format != 'png'
+			or self.config.screenshot_max_dimension
+			or self.config.skip_unchanged_screenshots
+		):
+			return await self._get_screenshotter(page).capture(full_page=full_page, state_key=self._dom_digest)
+
 		screenshot = await page.screenshot(
 			full_page=full_page,
 			animations='disabled',
@@ -950,12 +1040,33 @@ class BrowserContext:
 
 		return screenshot_b64
 
+	async def _draw_highlights(self, screenshot_b64: str, boxes: list[HighlightBox], page_info: PageInfo) -> str:
+		"""Draw the highlight boxes onto the screenshot in a worker thread, the raw screenshot if Pillow is missing"""
+		try:
+			screenshot = await asyncio.to_thread(
+				draw_highlights,
+				base64.b64decode(screenshot_b64),
+				boxes,
+				page_info.viewport_width,
+				self.config.screenshot_quality,
+			)
+		except ImportError:
+			logger.warning(
+				'Pillow is not installed, screenshots are sent without highlights. Install it with: pip install pillow'
+			)
+			return screenshot_b64
+		return base64.b64encode(screenshot).decode('utf-8')
+
 	@time_execution_async('--remove_highlights')
 	async def remove_highlights(self):
 		"""
 		Removes all highlight overlays and labels created by the highlightElement function.
 		Handles cases where the page might be closed or inaccessible.
 		"""
+		if self.config.highlight_mode == 'screenshot':
+			# Nothing was drawn into the page
+			return
+
 		try:
 			page = await self.get_current_page()
 			await page.evaluate(
@@ -977,6 +1088,7 @@ class BrowserContext:
                 }
                 """
 			)
+			self._highlights_in_page = False
 		except Exception as e:
 			logger.debug(f'⚠  Failed to remove highlights (this is usually ok): {str(e)}')
 			# Don't raise the error since this is not critical functionality
@@ -1373,20 +1485,66 @@ class BrowserContext:
 	async def get_tabs_info(self) -> list[TabInfo]:
 		"""Get information about all tabs"""
 		session = await self.get_session()
+		pages = session.context.pages
+
+		for page in pages:
+			self._track_tab_title(page)
+
+		# Titles are read concurrently and share a single deadline. Pages can change document.title without
+		# navigating, so cached titles are read again too and only used for tabs that don't answer in time
+		titles = {page: asyncio.create_task(page.title()) for page in pages}
+		if titles:
+			_, pending = await asyncio.wait(titles.values(), timeout=TAB_TITLE_TIMEOUT)
+			for task in pending:
+				task.cancel()
 
 		tabs_info = []
-		for page_id, page in enumerate(session.context.pages):
-			try:
-				tab_info = TabInfo(page_id=page_id, url=page.url, title=await asyncio.wait_for(page.title(), timeout=1))
-			except asyncio.TimeoutError:
+		for page_id, page in enumerate(pages):
+			title = self._tab_titles.get(page)
+			task = titles[page]
+			if task.done() and not task.cancelled() and task.exception() is None:
+				title = task.result()
+				if page in self._tab_titles:
+					self._tab_titles[page] = title
+
+			if title is None:
 				# page.title() can hang forever on tabs that are crashed/dissapeared/about:blank
 				# we dont want to try automating those tabs because they will hang the whole script
 				logger.debug('⚠  Failed to get tab info for tab #%s: %s (ignoring)', page_id, page.url)
 				tab_info = TabInfo(page_id=page_id, url='about:blank', title='ignore this tab and do not use it')
+			else:
+				tab_info = TabInfo(page_id=page_id, url=page.url, title=title)
 			tabs_info.append(tab_info)
 
 		return tabs_info
 
+	def _track_tab_title(self, page: Page) -> None:
+		"""Cache the title of a tab for tabs that don't answer in time, refreshed when the tab navigates"""
+		if page in self._tab_titles:
+			return
+		self._tab_titles[page] = None
+
+		async def refresh_title(*_):
+			# Drop the old title right away, it is fetched again if needed before the refresh is done
+			if page not in self._tab_titles:
+				return
+			self._tab_titles[page] = None
+			try:
+				title = await asyncio.wait_for(page.title(), timeout=TAB_TITLE_TIMEOUT)
+			except Exception:
+				return
+			if page in self._tab_titles:
+				self._tab_titles[page] = title
+
+		async def on_frame_navigated(frame):
+			# Also covers same-document navigations (history API), which don't fire domcontentloaded
+			if frame == page.main_frame:
+				await refresh_title()
+
+		page.on('domcontentloaded', refresh_title)
+		page.on('framenavigated', on_frame_navigated)
+		page.on('close', lambda _: self._tab_titles.pop(page, None))
+
 	@time_execution_async('--switch_to_tab')
 	async def switch_to_tab(self, page_id: int) -> None:
 		"""Switch to a specific tab by its page_id"""
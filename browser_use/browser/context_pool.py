@@ -0,0 +1,175 @@
+"""
+Pool of initialized Playwright browser contexts, so a new BrowserContext doesn't wait for a cold start.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from collections import deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Optional
+from urllib.parse import urlparse
+
+from browser_use.browser.context import BrowserContext, BrowserContextConfig
+
+if TYPE_CHECKING:
+	from playwright.async_api import BrowserContext as PlaywrightBrowserContext
+	from playwright.async_api import Page, Request
+
+	from browser_use.browser.browser import Browser
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(eq=False)
+class WarmContext:
+	"""A Playwright context with an open blank page, ready to be used by a BrowserContext"""
+
+	context: 'PlaywrightBrowserContext'
+	page: 'Page'
+	# Origins of all documents loaded in the context, their storage is wiped when the context is released
+	origins: set[str] = field(default_factory=set)
+
+	def is_healthy(self) -> bool:
+		browser = self.context.browser
+		return not self.page.is_closed() and (browser is None or browser.is_connected())
+
+
+def can_pool(config: BrowserContextConfig) -> bool:
+	"""Whether contexts with this config can be reused, recordings and traces are written per context when it closes"""
+	return not (config.trace_path or config.save_recording_path or config.save_har_path)
+
+
+class BrowserContextPool:
+	"""
+	Keeps up to `size` Playwright contexts of one BrowserContextConfig initialized, with init scripts and
+	cookies loaded and a blank page open. Contexts are refilled in the background as they are acquired.
+
+	Released contexts have their pages closed and their cookies, permissions, HTTP cache and storage wiped
+	before they are reused. Contexts that can't be wiped, e.g. without the DevTools protocol, are closed instead.
+	"""
+
+	def __init__(self, browser: 'Browser', config: BrowserContextConfig, size: int):
+		self.browser = browser
+		self.config = config
+		self.size = size
+
+		# Creates the Playwright contexts exactly like a BrowserContext with this config would
+		self._factory = BrowserContext(browser=browser, config=config)
+		self._idle: deque[WarmContext] = deque()
+		self._refill_task: Optional[asyncio.Task] = None
+		self._available = asyncio.Condition()
+		self._closed = False
+
+	def matches(self, config: BrowserContextConfig) -> bool:
+		return config is self.config or config == self.config
+
+	def start(self) -> None:
+		"""Start filling the pool in the background"""
+		if not self._closed and (self._refill_task is None or self._refill_task.done()):
+			self._refill_task = asyncio.create_task(self._refill())
+
+	async def acquire(self) -> Optional[WarmContext]:
+		"""Take an initialized context, waiting for one being created. None if the pool is empty"""
+		async with self._available:
+			await self._available.wait_for(lambda: self._idle or self._refill_task is None or self._refill_task.done())
+			warm = None
+			while self._idle:
+				candidate = self._idle.popleft()
+				if candidate.is_healthy():
+					warm = candidate
+					break
+				await self._close_context(candidate)
+		self.start()
+		return warm
+
+	async def release(self, warm: WarmContext) -> None:
+		"""Wipe a context that is no longer used and return it to the pool, or close it if the pool is full"""
+		if self._closed or len(self._idle) >= self.size or not warm.is_healthy():
+			await self._close_context(warm)
+			return
+
+		try:
+			await self._reset(warm)
+		except Exception as e:
+			logger.debug(f'Could not wipe browser context, closing it instead of reusing it: {e}')
+			await self._close_context(warm)
+			self.start()
+			return
+
+		async with self._available:
+			self._idle.append(warm)
+			self._available.notify_all()
+
+	async def close(self) -> None:
+		self._closed = True
+		if self._refill_task is not None:
+			self._refill_task.cancel()
+			try:
+				await self._refill_task
+			except (asyncio.CancelledError, Exception):
+				pass
+			self._refill_task = None
+		while self._idle:
+			await self._close_context(self._idle.popleft())
+
+	async def _refill(self) -> None:
+		while not self._closed and len(self._idle) < self.size:
+			try:
+				warm = await self._create()
+			except Exception as e:
+				logger.warning(f'Failed to create a browser context for the pool: {e}')
+				break
+			async with self._available:
+				self._idle.append(warm)
+				self._available.notify_all()
+
+		# Wake up acquire calls waiting for a context that won't come
+		async with self._available:
+			self._available.notify_all()
+
+	async def _create(self) -> WarmContext:
+		playwright_browser = await self.browser.get_playwright_browser()
+		context = await self._factory._create_context(playwright_browser)
+		warm = WarmContext(context=context, page=await context.new_page())
+
+		def on_request(request: 'Request') -> None:
+			if request.resource_type == 'document':
+				url = urlparse(request.url)
+				if url.scheme in ('http', 'https'):
+					warm.origins.add(f'{url.scheme}://{url.netloc}')
+
+		context.on('request', on_request)
+		await warm.page.goto('about:blank')
+		return warm
+
+	async def _reset(self, warm: WarmContext) -> None:
+		"""Close all pages but a new blank one and wipe cookies, permissions, the HTTP cache and the storage of all visited origins"""
+		context = warm.context
+		page = await context.new_page()
+		for old_page in context.pages:
+			if old_page is not page:
+				await old_page.close()
+		warm.page = page
+
+		await context.clear_cookies()
+		await context.clear_permissions()
+		cdp_session = await context.new_cdp_session(page)
+		try:
+			await cdp_session.send('Network.clearBrowserCache')
+			for origin in warm.origins:
+				await cdp_session.send('Storage.clearDataForOrigin', {'origin': origin, 'storageTypes': 'all'})
+		finally:
+			await cdp_session.detach()
+		warm.origins.clear()
+
+		if self.config.cookies_file and os.path.exists(self.config.cookies_file):
+			with open(self.config.cookies_file, 'r') as f:
+				await context.add_cookies(json.load(f))
+
+	async def _close_context(self, warm: WarmContext) -> None:
+		try:
+			await warm.context.close()
+		except Exception as e:
+			logger.debug(f'Failed to close pooled browser context: {e}')
@@ -0,0 +1,114 @@
+"""
+Compiled matching of URLs against lists of domain patterns.
+"""
+
+import fnmatch
+import re
+from functools import lru_cache
+from typing import Iterable, Optional
+from urllib.parse import urlparse
+
+# Number of URLs whose result is remembered per matcher
+URL_CACHE_SIZE = 1024
+
+_GLOB_CHARS = frozenset('*?[')
+
+
+def get_url_host(url: str) -> Optional[str]:
+	"""Lowercased host of a URL without the port, None if the URL has no host"""
+	try:
+		domain = urlparse(url).netloc
+	except ValueError:
+		return None
+	if not domain:
+		return None
+
+	# Remove port if present
+	if ':' in domain:
+		domain = domain.split(':')[0]
+	return domain.lower()
+
+
+class _LabelNode:
+	"""Node of a trie over the labels of a host name, starting from the top level domain"""
+
+	__slots__ = ('children', 'any_subdomain')
+
+	def __init__(self):
+		self.children: dict[str, _LabelNode] = {}
+		# Hosts with at least one more label in front of the path to this node match
+		self.any_subdomain = False
+
+
+class DomainMatcher:
+	"""
+	Matches URLs against a fixed set of domain patterns in time independent of the number of patterns.
+
+	Plain hosts go into a hash set, `*.example.com` style patterns into a trie of reversed labels and
+	only the remaining glob patterns are matched one by one. Results are cached per URL.
+	"""
+
+	def __init__(self, exact_hosts: Iterable[str] = (), subdomains_of: Iterable[str] = (), globs: Iterable[str] = ()):
+		self._exact_hosts = {host.lower() for host in exact_hosts}
+		self._root = _LabelNode()
+		for domain in subdomains_of:
+			node = self._root
+			for label in reversed(domain.lower().split('.')):
+				node = node.children.setdefault(label, _LabelNode())
+			node.any_subdomain = True
+
+		globs = [pattern.lower() for pattern in globs]
+		self._globs = re.compile('|'.join(fnmatch.translate(pattern) for pattern in globs)) if globs else None
+		self._url_cache: dict[str, bool] = {}
+
+	@classmethod
+	def from_globs(cls, patterns: Iterable[str]) -> 'DomainMatcher':
+		"""Matcher with the semantics of fnmatch, e.g. ['*.google.com', 'www.bing.com', 'yahoo.*']"""
+		exact_hosts, subdomains_of, globs = [], [], []
+		for pattern in patterns:
+			if not _GLOB_CHARS.intersection(pattern):
+				exact_hosts.append(pattern)
+			elif pattern.startswith('*.') and not _GLOB_CHARS.intersection(pattern[2:]):
+				subdomains_of.append(pattern[2:])
+			else:
+				globs.append(pattern)
+		return cls(exact_hosts, subdomains_of, globs)
+
+	@classmethod
+	def from_allowed_domains(cls, domains: Iterable[str]) -> 'DomainMatcher':
+		"""Matcher for a whitelist where every domain allows itself and all of its subdomains"""
+		domains = list(domains)
+		return cls(exact_hosts=domains, subdomains_of=domains)
+
+	def matches(self, url: str) -> bool:
+		"""Whether the host of the URL matches any of the patterns"""
+		result = self._url_cache.get(url)
+		if result is None:
+			host = get_url_host(url)
+			result = host is not None and self.matches_host(host)
+			if len(self._url_cache) >= URL_CACHE_SIZE:
+				self._url_cache.clear()
+			self._url_cache[url] = result
+		return result
+
+	def matches_host(self, host: str) -> bool:
+		"""Whether a lowercased host without port matches any of the patterns"""
+		if host in self._exact_hosts:
+			return True
+
+		labels = host.split('.')
+		node = self._root
+		for remaining in range(len(labels) - 1, -1, -1):
+			node = node.children.get(labels[remaining])
+			if node is None:
+				break
+			if node.any_subdomain and remaining > 0:
+				return True
+
+		return self._globs is not None and self._globs.match(host) is not None
+
+
+@lru_cache(maxsize=256)
+def get_glob_domain_matcher(patterns: tuple[str, ...]) -> DomainMatcher:
+	"""Shared matcher for a list of glob domain patterns"""
+	return DomainMatcher.from_globs(patterns)
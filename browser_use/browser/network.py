@@ -0,0 +1,256 @@
+"""
+Event-driven network idle detection for pages.
+"""
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+	from playwright.async_api import Frame, Page, Request, Response
+
+logger = logging.getLogger(__name__)
+
+# Define relevant resource types and content types
+RELEVANT_RESOURCE_TYPES = {
+	'document',
+	'stylesheet',
+	'image',
+	'font',
+	'script',
+	'iframe',
+}
+
+RELEVANT_CONTENT_TYPES = {
+	'text/html',
+	'text/css',
+	'application/javascript',
+	'image/',
+	'font/',
+	'application/json',
+}
+
+# Content types of streaming or real-time responses
+STREAMING_CONTENT_TYPES = {
+	'streaming',
+	'video',
+	'audio',
+	'webm',
+	'mp4',
+	'event-stream',
+	'websocket',
+	'protobuf',
+}
+
+# Additional patterns to filter out
+IGNORED_URL_PATTERNS = {
+	# Analytics and tracking
+	'analytics',
+	'tracking',
+	'telemetry',
+	'beacon',
+	'metrics',
+	# Ad-related
+	'doubleclick',
+	'adsystem',
+	'adserver',
+	'advertising',
+	# Social media widgets
+	'facebook.com/plugins',
+	'platform.twitter',
+	'linkedin.com/embed',
+	# Live chat and support
+	'livechat',
+	'zendesk',
+	'intercom',
+	'crisp.chat',
+	'hotjar',
+	# Push notifications
+	'push-notifications',
+	'onesignal',
+	'pushwoosh',
+	# Background sync/heartbeat
+	'heartbeat',
+	'ping',
+	'alive',
+	# WebRTC and streaming
+	'webrtc',
+	'rtmp://',
+	'wss://',
+	# Common CDNs for dynamic content
+	'cloudfront.net',
+	'fastly.net',
+}
+
+
+class NetworkIdleTracker:
+	"""
+	Tracks the relevant in-flight requests of a page for as long as the page lives.
+
+	Waiters are resolved by a timer the moment the idle window is over instead of polling,
+	and failed or aborted requests stop counting as pending as soon as they fail. Requests of the
+	previous document are dropped when the main frame navigates, and requests that have been pending
+	for longer than the timeout of a wait are given up on, so a hanging request holds up one wait at most.
+	"""
+
+	def __init__(self, page: 'Page'):
+		self.page = page
+		# Pending request -> time it was sent
+		self.pending_requests: dict['Request', float] = {}
+		self.last_activity = asyncio.get_event_loop().time()
+
+		# Counters over the lifetime of the page
+		self.requests_started = 0
+		self.requests_finished = 0
+		self.requests_failed = 0
+		self.requests_ignored = 0
+		self.requests_abandoned = 0
+
+		# Waiter future -> (start of the wait, idle time, scheduled idle check)
+		self._waiters: dict[asyncio.Future, tuple[float, float, asyncio.TimerHandle | None]] = {}
+
+		page.on('request', self._on_request)
+		page.on('response', self._on_response)
+		page.on('requestfailed', self._on_request_failed)
+		page.on('framenavigated', self._on_frame_navigated)
+
+	def close(self) -> None:
+		"""Detach from the page and release anyone still waiting"""
+		self.page.remove_listener('request', self._on_request)
+		self.page.remove_listener('response', self._on_response)
+		self.page.remove_listener('requestfailed', self._on_request_failed)
+		self.page.remove_listener('framenavigated', self._on_frame_navigated)
+		for waiter in list(self._waiters):
+			self._resolve(waiter, False)
+
+	async def wait_for_idle(self, idle_time: float, timeout: float) -> bool:
+		"""
+		Wait until no relevant request has been pending for `idle_time` seconds, counted from
+		the last network activity or from the start of the wait, whichever is later. Requests pending
+		for longer than `timeout` seconds when the wait starts are no longer waited for.
+
+		Returns False if the network did not become idle within `timeout` seconds.
+		"""
+		loop = asyncio.get_event_loop()
+		waiter = loop.create_future()
+		# Requests that already hung for a whole wait are not waited for again
+		self._abandon_requests_sent_before(loop.time() - timeout)
+		self._waiters[waiter] = (loop.time(), idle_time, None)
+		self._check_idle(waiter)
+
+		try:
+			return await asyncio.wait_for(waiter, timeout)
+		except asyncio.TimeoutError:
+			logger.debug(
+				f'Network timeout after {timeout}s with {len(self.pending_requests)} '
+				f'pending requests: {[r.url for r in self.pending_requests]}'
+			)
+			return False
+		finally:
+			self._resolve(waiter, False)
+
+	def _check_idle(self, waiter: asyncio.Future) -> None:
+		if waiter not in self._waiters:
+			return
+
+		start, idle_time, handle = self._waiters[waiter]
+		if handle is not None:
+			handle.cancel()
+			handle = None
+
+		if not self.pending_requests:
+			loop = asyncio.get_event_loop()
+			idle_at = max(self.last_activity, start) + idle_time
+			if loop.time() >= idle_at:
+				self._resolve(waiter, True)
+				return
+			handle = loop.call_at(idle_at, self._check_idle, waiter)
+
+		self._waiters[waiter] = (start, idle_time, handle)
+
+	def _check_all_idle(self) -> None:
+		for waiter in list(self._waiters):
+			self._check_idle(waiter)
+
+	def _abandon_requests_sent_before(self, deadline: float) -> None:
+		abandoned = [request for request, sent_at in self.pending_requests.items() if sent_at <= deadline]
+		for request in abandoned:
+			del self.pending_requests[request]
+		if abandoned:
+			self.requests_abandoned += len(abandoned)
+			logger.debug(f'Not waiting any longer for {len(abandoned)} hanging requests: {[r.url for r in abandoned]}')
+
+	def _resolve(self, waiter: asyncio.Future, idle: bool) -> None:
+		entry = self._waiters.pop(waiter, None)
+		if entry is not None and entry[2] is not None:
+			entry[2].cancel()
+		if not waiter.done():
+			waiter.set_result(idle)
+
+	def _is_relevant(self, request: 'Request') -> bool:
+		# Filter by resource type
+		if request.resource_type not in RELEVANT_RESOURCE_TYPES:
+			return False
+
+		# Filter out by URL patterns
+		url = request.url.lower()
+		if any(pattern in url for pattern in IGNORED_URL_PATTERNS):
+			return False
+
+		# Filter out data URLs and blob URLs
+		if url.startswith(('data:', 'blob:')):
+			return False
+
+		# Filter out requests with certain headers
+		headers = request.headers
+		if headers.get('purpose') == 'prefetch' or headers.get('sec-fetch-dest') in ['video', 'audio']:
+			return False
+
+		return True
+
+	def _on_request(self, request: 'Request') -> None:
+		if not self._is_relevant(request):
+			self.requests_ignored += 1
+			return
+
+		self.requests_started += 1
+		self.last_activity = asyncio.get_event_loop().time()
+		self.pending_requests[request] = self.last_activity
+		self._check_all_idle()
+
+	def _on_response(self, response: 'Response') -> None:
+		request = response.request
+		if request not in self.pending_requests:
+			return
+
+		del self.pending_requests[request]
+		self.requests_finished += 1
+
+		# Streaming, irrelevant or very large responses (likely not essential for page load) don't count as activity
+		content_type = response.headers.get('content-type', '').lower()
+		content_length = response.headers.get('content-length')
+		if (
+			not any(t in content_type for t in STREAMING_CONTENT_TYPES)
+			and any(ct in content_type for ct in RELEVANT_CONTENT_TYPES)
+			and not (content_length and int(content_length) > 5 * 1024 * 1024)  # 5MB
+		):
+			self.last_activity = asyncio.get_event_loop().time()
+
+		self._check_all_idle()
+
+	def _on_request_failed(self, request: 'Request') -> None:
+		if request not in self.pending_requests:
+			return
+
+		del self.pending_requests[request]
+		self.requests_failed += 1
+		self._check_all_idle()
+
+	def _on_frame_navigated(self, frame: 'Frame') -> None:
+		if frame != self.page.main_frame:
+			return
+
+		# Requests of the previous document and its frames that are still pending are not waited for anymore
+		self.pending_requests.clear()
+		self.last_activity = asyncio.get_event_loop().time()
+		self._check_all_idle()
@@ -0,0 +1,329 @@
+"""
+Pool of browser processes that browser contexts are leased from, shared by many agents.
+"""
+
+import asyncio
+import logging
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import psutil
+from pydantic import BaseModel, ConfigDict, Field
+
+from browser_use.browser.browser import Browser, BrowserConfig
+from browser_use.browser.context import BrowserContext, BrowserContextConfig, BrowserContextState
+
+logger = logging.getLogger(__name__)
+
+# Switch added to the command line of pooled Chromium processes to find them among all processes
+POOL_ID_SWITCH = '--browser-use-pool-id'
+
+
+class BrowserPoolConfig(BaseModel):
+	r"""
+	Configuration for the BrowserPool.
+
+	Default values:
+		size: 2
+			Number of browser processes kept running
+
+		max_contexts_per_browser: 4
+			Browser contexts leased from one browser at the same time, further leases wait for a free slot
+
+		recycle_after_contexts: 100
+			Replace a browser after this many contexts were leased from it, None to never recycle by count
+
+		max_memory_mb: None
+			Replace a browser once its processes use more memory than this (resident set size in MB).
+			Only for Chromium
+
+		health_check_interval: 30
+			Seconds between checks for crashed and oversized browsers
+
+		browser_config: BrowserConfig()
+			Configuration of the browsers, must not connect to an existing browser
+	"""
+
+	model_config = ConfigDict(arbitrary_types_allowed=True, extra='ignore')
+
+	size: int = Field(default=2, ge=1)
+	max_contexts_per_browser: int = Field(default=4, ge=1)
+	recycle_after_contexts: int | None = 100
+	max_memory_mb: float | None = None
+	health_check_interval: float = 30.0
+	browser_config: BrowserConfig = Field(default_factory=BrowserConfig)
+
+
+class PooledBrowser:
+	"""A browser of the pool with its lease counters"""
+
+	def __init__(self, browser: Browser, pool_id: str):
+		self.browser = browser
+		self.pool_id = pool_id
+		self.active_contexts = 0
+		self.total_contexts = 0
+		# No new leases once retiring, the browser is replaced when its last context is closed
+		self.retiring = False
+		self._process: Optional[psutil.Process] = None
+
+	def is_healthy(self) -> bool:
+		playwright_browser = self.browser.playwright_browser
+		return playwright_browser is not None and playwright_browser.is_connected()
+
+	def memory_mb(self) -> Optional[float]:
+		"""Resident memory of the browser process and its children, None if the process is not known"""
+		try:
+			if self._process is None or not self._process.is_running():
+				self._process = self._find_process()
+			if self._process is None:
+				return None
+			processes = [self._process, *self._process.children(recursive=True)]
+			return sum(process.memory_info().rss for process in processes) / 2**20
+		except (psutil.NoSuchProcess, psutil.AccessDenied):
+			self._process = None
+			return None
+
+	def _find_process(self) -> Optional[psutil.Process]:
+		switch = f'{POOL_ID_SWITCH}={self.pool_id}'
+		for process in psutil.process_iter(['cmdline']):
+			if switch in (process.info['cmdline'] or []):
+				# The browser process, not one of its children that inherited the switch
+				parent = process.parent()
+				try:
+					if parent is None or switch not in parent.cmdline():
+						return process
+				except (psutil.NoSuchProcess, psutil.AccessDenied):
+					return process
+		return None
+
+
+class PooledBrowserContext(BrowserContext):
+	"""Browser context leased from a BrowserPool, closing it ends the lease"""
+
+	def __init__(
+		self,
+		browser: Browser,
+		pool: 'BrowserPool',
+		pooled_browser: PooledBrowser,
+		config: BrowserContextConfig | None = None,
+		state: Optional[BrowserContextState] = None,
+	):
+		super().__init__(browser=browser, config=config, state=state)
+		self._pool = pool
+		self._pooled_browser: PooledBrowser | None = pooled_browser
+
+	async def close(self):
+		try:
+			await super().close()
+		finally:
+			pooled_browser, self._pooled_browser = self._pooled_browser, None
+			if pooled_browser is not None:
+				await self._pool._release(pooled_browser)
+
+
+class BrowserPool:
+	"""
+	Keeps a fixed number of browsers running and leases browser contexts from them, to the browser with
+	the fewest open contexts. Browsers are replaced after a number of contexts, when they use too much
+	memory, or when they crashed.
+
+	Usage:
+		pool = BrowserPool(BrowserPoolConfig(size=4))
+		async with pool.lease() as context:
+			agent = Agent(task=task, llm=llm, browser_context=context)
+			await agent.run()
+	"""
+
+	def __init__(self, config: BrowserPoolConfig | None = None):
+		self.config = config or BrowserPoolConfig()
+		browser_config = self.config.browser_config
+		if browser_config.cdp_url or browser_config.wss_url or browser_config.browser_binary_path:
+			raise ValueError('BrowserPool launches its own browsers, cdp_url, wss_url and browser_binary_path are not supported')
+
+		self.browsers: list[PooledBrowser] = []
+		self._available = asyncio.Condition()
+		self._replacements: set[asyncio.Task] = set()
+		self._health_task: Optional[asyncio.Task] = None
+		self._start_task: Optional[asyncio.Task] = None
+		self._closed = False
+
+	async def start(self) -> None:
+		"""Launch the browsers, also done by the first lease. Raises if not a single browser could be launched"""
+		if self._start_task is None:
+			self._start_task = asyncio.create_task(self._start())
+		task = self._start_task
+		try:
+			await task
+		except Exception:
+			# Tried again by the next call
+			if self._start_task is task:
+				self._start_task = None
+			raise
+
+	async def _start(self) -> None:
+		results = await asyncio.gather(*(self._launch() for _ in range(self.config.size)), return_exceptions=True)
+		browsers = [result for result in results if isinstance(result, PooledBrowser)]
+		errors = [result for result in results if not isinstance(result, PooledBrowser)]
+
+		if self._closed:
+			for pooled_browser in browsers:
+				await self._close_browser(pooled_browser)
+			raise RuntimeError('BrowserPool is closed')
+		if not browsers:
+			raise errors[0]
+		if errors:
+			# The health check launches the missing browsers
+			logger.error(f'❌  Failed to launch {len(errors)} of {self.config.size} browsers for the pool: {errors[0]}')
+
+		async with self._available:
+			self.browsers = browsers
+			self._available.notify_all()
+		if self.config.health_check_interval > 0:
+			self._health_task = asyncio.create_task(self._health_loop())
+
+	async def new_context(self, config: BrowserContextConfig | None = None) -> BrowserContext:
+		"""Lease a browser context, waiting while all browsers have max_contexts_per_browser open. Close it when done"""
+		if self._closed:
+			raise RuntimeError('BrowserPool is closed')
+		await self.start()
+
+		async with self._available:
+			pooled_browser = None
+			while pooled_browser is None:
+				pooled_browser = self._pick_browser()
+				if pooled_browser is None:
+					await self._available.wait()
+					if self._closed:
+						raise RuntimeError('BrowserPool is closed')
+			pooled_browser.active_contexts += 1
+			pooled_browser.total_contexts += 1
+			if self.config.recycle_after_contexts and pooled_browser.total_contexts >= self.config.recycle_after_contexts:
+				pooled_browser.retiring = True
+
+		return PooledBrowserContext(
+			browser=pooled_browser.browser,
+			pool=self,
+			pooled_browser=pooled_browser,
+			config=config or self.config.browser_config.new_context_config,
+		)
+
+	@asynccontextmanager
+	async def lease(self, config: BrowserContextConfig | None = None) -> AsyncIterator[BrowserContext]:
+		"""Browser context that is closed, ending the lease, when the block exits"""
+		context = await self.new_context(config)
+		try:
+			yield context
+		finally:
+			await context.close()
+
+	def _pick_browser(self) -> Optional[PooledBrowser]:
+		candidates = [
+			pooled_browser
+			for pooled_browser in self.browsers
+			if not pooled_browser.retiring
+			and pooled_browser.active_contexts < self.config.max_contexts_per_browser
+			and pooled_browser.is_healthy()
+		]
+		return min(candidates, key=lambda pooled_browser: pooled_browser.active_contexts, default=None)
+
+	async def _release(self, pooled_browser: PooledBrowser) -> None:
+		async with self._available:
+			pooled_browser.active_contexts -= 1
+			if pooled_browser.retiring and pooled_browser.active_contexts == 0:
+				self._schedule_replacement(pooled_browser)
+			self._available.notify_all()
+
+	async def check_health(self) -> None:
+		"""Replace crashed browsers, retire the ones above max_memory_mb and launch missing ones"""
+		async with self._available:
+			# Browsers whose replacement failed to launch
+			for _ in range(self.config.size - len(self.browsers) - len(self._replacements)):
+				self._schedule_replacement(None)
+
+		for pooled_browser in list(self.browsers):
+			if not pooled_browser.is_healthy():
+				logger.warning('🩺  Pooled browser is not connected anymore, replacing it')
+				async with self._available:
+					self._schedule_replacement(pooled_browser)
+				continue
+
+			if self.config.max_memory_mb and not pooled_browser.retiring:
+				memory_mb = await asyncio.to_thread(pooled_browser.memory_mb)
+				if memory_mb is not None and memory_mb > self.config.max_memory_mb:
+					logger.info(f'♻️  Pooled browser uses {memory_mb:.0f} MB, replacing it once its contexts are closed')
+					async with self._available:
+						pooled_browser.retiring = True
+						if pooled_browser.active_contexts == 0:
+							self._schedule_replacement(pooled_browser)
+
+	async def _health_loop(self) -> None:
+		while not self._closed:
+			await asyncio.sleep(self.config.health_check_interval)
+			try:
+				await self.check_health()
+			except Exception as e:
+				logger.debug(f'Browser pool health check failed: {e}')
+
+	def _schedule_replacement(self, pooled_browser: Optional[PooledBrowser]) -> None:
+		"""Swap a browser for a new one in the background (or only launch one if None), with the lock held"""
+		if self._closed:
+			return
+		if pooled_browser is not None:
+			if pooled_browser not in self.browsers:
+				return
+			self.browsers.remove(pooled_browser)
+		task = asyncio.create_task(self._replace(pooled_browser))
+		self._replacements.add(task)
+		task.add_done_callback(self._replacements.discard)
+
+	async def _replace(self, pooled_browser: Optional[PooledBrowser]) -> None:
+		if pooled_browser is not None:
+			await self._close_browser(pooled_browser)
+		try:
+			replacement = await self._launch()
+		except Exception as e:
+			logger.error(f'❌  Failed to launch a browser for the pool: {e}')
+			replacement = None
+
+		async with self._available:
+			if replacement is not None:
+				if self._closed:
+					await self._close_browser(replacement)
+				else:
+					self.browsers.append(replacement)
+			self._available.notify_all()
+
+	async def _launch(self) -> PooledBrowser:
+		pool_id = uuid.uuid4().hex
+		browser_config = self.config.browser_config
+		if browser_config.browser_class == 'chromium':
+			browser_config = browser_config.model_copy(
+				update={'extra_browser_args': [*browser_config.extra_browser_args, f'{POOL_ID_SWITCH}={pool_id}']}
+			)
+		pooled_browser = PooledBrowser(Browser(config=browser_config), pool_id)
+		await pooled_browser.browser.get_playwright_browser()
+		return pooled_browser
+
+	async def _close_browser(self, pooled_browser: PooledBrowser) -> None:
+		try:
+			await pooled_browser.browser.close()
+		except Exception as e:
+			logger.debug(f'Failed to close pooled browser: {e}')
+
+	async def close(self) -> None:
+		"""Close all browsers, contexts still leased are closed with them"""
+		self._closed = True
+		if self._health_task is not None:
+			self._health_task.cancel()
+		for task in list(self._replacements):
+			try:
+				await task
+			except Exception:
+				pass
+
+		async with self._available:
+			browsers, self.browsers = self.browsers, []
+			self._available.notify_all()
+		for pooled_browser in browsers:
+			await self._close_browser(pooled_browser)
@@ -0,0 +1,166 @@
+"""
+Screenshots read from the DevTools screencast stream instead of being captured on demand.
+"""
+
+import asyncio
+import base64
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import TYPE_CHECKING, Literal, Optional
+
+if TYPE_CHECKING:
+	from playwright.async_api import CDPSession, Page
+
+logger = logging.getLogger(__name__)
+
+# Number of recent frames kept per page
+SCREENCAST_BUFFER_SIZE = 8
+
+# Seconds to wait for a frame that is newer than the last change to the page
+SCREENCAST_FRAME_TIMEOUT = 0.5
+
+
+@dataclass(eq=False)
+class ScreencastFrame:
+	"""One frame of the screencast, base64 encoded as received from the browser"""
+
+	data: str
+	# time.monotonic() when the frame was received
+	received_at: float
+	metadata: dict = field(default_factory=dict)
+
+	@cached_property
+	def image_bytes(self) -> bytes:
+		"""Decoded image, decoded once per frame"""
+		return base64.b64decode(self.data)
+
+
+class FrameRingBuffer:
+	"""The most recent frames of a screencast, oldest first"""
+
+	def __init__(self, capacity: int = SCREENCAST_BUFFER_SIZE):
+		self._frames: deque[ScreencastFrame] = deque(maxlen=capacity)
+
+	def __len__(self) -> int:
+		return len(self._frames)
+
+	def append(self, frame: ScreencastFrame) -> None:
+		self._frames.append(frame)
+
+	def latest(self) -> Optional[ScreencastFrame]:
+		return self._frames[-1] if self._frames else None
+
+	def find(self, data: str) -> Optional[ScreencastFrame]:
+		"""Buffered frame with the given base64 data, e.g. a screenshot stored in the history"""
+		for frame in reversed(self._frames):
+			if frame.data is data or frame.data == data:
+				return frame
+		return None
+
+	def clear(self) -> None:
+		self._frames.clear()
+
+
+class PageScreencast:
+	"""
+	Keeps a DevTools screencast of one page running and its latest frames in a ring buffer.
+
+	The browser only sends a frame when the page was repainted, so the latest frame is the current look
+	of the page and reading it doesn't block on a capture. Only for Chromium based browsers, and only for
+	the viewport.
+	"""
+
+	def __init__(
+		self,
+		page: 'Page',
+		format: Literal['jpeg', 'png'] = 'jpeg',
+		quality: int = 80,
+		max_dimension: Optional[int] = None,
+		buffer_size: int = SCREENCAST_BUFFER_SIZE,
+	):
+		self.page = page
+		self.format = format
+		self.quality = quality
+		self.max_dimension = max_dimension
+		self.frames = FrameRingBuffer(buffer_size)
+
+		self._cdp_session: Optional['CDPSession'] = None
+		self._new_frame = asyncio.Event()
+		# Acknowledgements in flight, the browser sends no more frames until the previous one is acknowledged
+		self._acks: set[asyncio.Task] = set()
+
+	@property
+	def is_running(self) -> bool:
+		return self._cdp_session is not None
+
+	async def start(self) -> None:
+		"""Start the screencast, raises if the browser doesn't support it"""
+		if self._cdp_session is not None:
+			return
+		session = await self.page.context.new_cdp_session(self.page)
+		session.on('Page.screencastFrame', self._on_frame)
+		params: dict = {'format': self.format, 'everyNthFrame': 1}
+		if self.format == 'jpeg':
+			params['quality'] = self.quality
+		if self.max_dimension:
+			params['maxWidth'] = params['maxHeight'] = self.max_dimension
+
+		# Set before starting, the first frame may arrive before the command returns and has to be acknowledged
+		self._cdp_session = session
+		try:
+			await session.send('Page.startScreencast', params)
+		except Exception:
+			self._cdp_session = None
+			raise
+
+	def _on_frame(self, event: dict) -> None:
+		self.frames.append(ScreencastFrame(data=event['data'], received_at=time.monotonic(), metadata=event.get('metadata', {})))
+		self._new_frame.set()
+
+		if self._cdp_session is not None:
+			ack = asyncio.ensure_future(self._cdp_session.send('Page.screencastFrameAck', {'sessionId': event['sessionId']}))
+			self._acks.add(ack)
+			ack.add_done_callback(self._ack_done)
+
+	def _ack_done(self, ack: asyncio.Future) -> None:
+		self._acks.discard(ack)
+		if not ack.cancelled() and ack.exception() is not None:
+			logger.debug(f'Failed to acknowledge screencast frame: {ack.exception()}')
+
+	async def latest_frame(
+		self, fresh_after: Optional[float] = None, timeout: float = SCREENCAST_FRAME_TIMEOUT
+	) -> Optional[ScreencastFrame]:
+		"""
+		Latest frame, waiting up to timeout for one received after fresh_after (a time.monotonic() value),
+		e.g. when the page was just changed and the repaint is still on its way. If no newer frame arrives
+		the page wasn't repainted and the latest frame is returned. None if no frame was received at all.
+		"""
+		deadline = time.monotonic() + timeout
+		while True:
+			frame = self.frames.latest()
+			if frame is not None and (fresh_after is None or frame.received_at >= fresh_after):
+				return frame
+
+			remaining = deadline - time.monotonic()
+			if remaining <= 0:
+				return frame
+			self._new_frame.clear()
+			try:
+				await asyncio.wait_for(self._new_frame.wait(), remaining)
+			except asyncio.TimeoutError:
+				return self.frames.latest()
+
+	async def stop(self) -> None:
+		session, self._cdp_session = self._cdp_session, None
+		for ack in self._acks:
+			ack.cancel()
+		self._acks.clear()
+		if session is not None:
+			try:
+				await session.send('Page.stopScreencast')
+				await session.detach()
+			except Exception:
+				pass
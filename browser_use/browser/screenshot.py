@@ -0,0 +1,276 @@
+"""
+Screenshots in a configurable format and size, with reuse of the previous screenshot while the page looks the same.
+"""
+
+import asyncio
+import base64
+import hashlib
+import io
+import logging
+from typing import TYPE_CHECKING, Hashable, Literal, Optional, Sequence
+
+if TYPE_CHECKING:
+	from playwright.async_api import CDPSession, Page
+
+	from browser_use.dom.views import HighlightBox
+
+logger = logging.getLogger(__name__)
+
+ScreenshotFormat = Literal['png', 'jpeg', 'webp']
+
+# Side of the thumbnail compared between steps to detect an unchanged page
+THUMBNAIL_SIZE = 64
+
+# Errors of browsers that can't take screenshots through the DevTools protocol at all, other errors only skip it once
+_CDP_UNSUPPORTED_ERRORS = ('only available in chromium', "wasn't found")
+
+# Base64 prefixes of the supported image formats
+_BASE64_MEDIA_TYPES = {
+	'iVBORw0KGgo': 'image/png',
+	'/9j/': 'image/jpeg',
+	'UklGR': 'image/webp',
+}
+
+
+def get_screenshot_media_type(screenshot_b64: str) -> str:
+	"""Media type of a base64 encoded screenshot, PNG if unknown"""
+	for prefix, media_type in _BASE64_MEDIA_TYPES.items():
+		if screenshot_b64.startswith(prefix):
+			return media_type
+	return 'image/png'
+
+
+def _thumbnail_hash(data: bytes) -> bytes:
+	"""
+	Hash of a small thumbnail, quantized to 16 gray levels if Pillow is available so that
+	rendering noise doesn't count as a change. Without Pillow the thumbnail bytes are hashed as is.
+	"""
+	try:
+		from PIL import Image
+	except ImportError:
+		return hashlib.blake2b(data, digest_size=16).digest()
+
+	with Image.open(io.BytesIO(data)) as image:
+		pixels = image.convert('L').tobytes()
+	return hashlib.blake2b(bytes(value >> 4 for value in pixels), digest_size=16).digest()
+
+
+def _reencode(data: bytes, format: ScreenshotFormat, quality: int, max_dimension: Optional[int]) -> bytes:
+	"""Downscale and re-encode a screenshot with Pillow"""
+	from PIL import Image
+
+	with Image.open(io.BytesIO(data)) as image:
+		if max_dimension and max(image.size) > max_dimension:
+			image.thumbnail((max_dimension, max_dimension))
+		if format == 'jpeg' and image.mode != 'RGB':
+			image = image.convert('RGB')
+		output = io.BytesIO()
+		image.save(output, format=format.upper(), **({} if format == 'png' else {'quality': quality}))
+	return output.getvalue()
+
+
+# Same palette as highlightElement in buildDomTree.js
+HIGHLIGHT_COLORS = (
+	'#FF0000',
+	'#00FF00',
+	'#0000FF',
+	'#FFA500',
+	'#800080',
+	'#008080',
+	'#FF69B4',
+	'#4B0082',
+	'#FF4500',
+	'#2E8B57',
+	'#DC143C',
+	'#4682B4',
+)
+
+
+def draw_highlights(data: bytes, boxes: Sequence['HighlightBox'], viewport_width: int, quality: int = 80) -> bytes:
+	"""
+	Draw the highlight boxes and index labels of buildDomTree.js onto a viewport screenshot with Pillow.
+
+	Boxes are in CSS pixels and are scaled to the screenshot, which may be taken at a higher device
+	pixel ratio or downscaled. The result is encoded in the format of the screenshot.
+	"""
+	from PIL import Image, ImageColor, ImageDraw, ImageFont
+
+	with Image.open(io.BytesIO(data)) as screenshot:
+		format = screenshot.format or 'PNG'
+		image = screenshot.convert('RGBA')
+
+	scale = image.width / viewport_width if viewport_width > 0 else 1.0
+	overlay = Image.new('RGBA', image.size, (0, 0, 0, 0))
+	draw = ImageDraw.Draw(overlay)
+	fonts: dict[int, ImageFont.ImageFont | ImageFont.FreeTypeFont] = {}
+
+	for box in boxes:
+		color = ImageColor.getrgb(HIGHLIGHT_COLORS[box.index % len(HIGHLIGHT_COLORS)])
+		left, top = box.x * scale, box.y * scale
+		right, bottom = (box.x + box.width) * scale, (box.y + box.height) * scale
+		if right <= left or bottom <= top:
+			continue
+		draw.rectangle((left, top, right, bottom), fill=(*color, 26), outline=(*color, 255), width=max(1, round(2 * scale)))
+
+		font_size = max(1, round(min(12, max(8, box.height / 2)) * scale))
+		font = fonts.get(font_size)
+		if font is None:
+			try:
+				font = ImageFont.load_default(size=font_size)
+			except TypeError:
+				# Pillow < 10.1 has a single bitmap font size
+				font = ImageFont.load_default()
+			fonts[font_size] = font
+
+		# Label in the top right corner of the box, above it if the box is too small, as in the page
+		label_width, label_height = 20 * scale, 16 * scale
+		label_top, label_left = top + 2 * scale, right - label_width - 2 * scale
+		if box.width < 24 or box.height < 20:
+			label_top, label_left = top - label_height - 2 * scale, right - label_width
+		text_left, text_top, text_right, text_bottom = draw.textbbox((0, 0), str(box.index), font=font)
+		padding = 2 * scale
+		draw.rounded_rectangle(
+			(
+				label_left,
+				label_top,
+				label_left + text_right - text_left + 4 * padding,
+				label_top + text_bottom - text_top + 2 * padding,
+			),
+			radius=4 * scale,
+			fill=(*color, 255),
+		)
+		draw.text((label_left + 2 * padding - text_left, label_top + padding - text_top), str(box.index), fill='white', font=font)
+
+	image = Image.alpha_composite(image, overlay)
+	if format == 'JPEG':
+		image = image.convert('RGB')
+	output = io.BytesIO()
+	image.save(output, format=format, **({} if format == 'PNG' else {'quality': quality}))
+	return output.getvalue()
+
+
+class PageScreenshotter:
+	"""
+	Takes the screenshots of one page through the DevTools protocol, which encodes JPEG and WebP,
+	downscales and returns base64 without any work in Python. Browsers without the DevTools
+	protocol get a Playwright screenshot, re-encoded with Pillow if needed and available.
+	"""
+
+	def __init__(
+		self,
+		page: 'Page',
+		format: ScreenshotFormat = 'png',
+		quality: int = 80,
+		max_dimension: Optional[int] = None,
+		skip_unchanged: bool = False,
+	):
+		self.page = page
+		self.format = format
+		self.quality = quality
+		self.max_dimension = max_dimension
+		self.skip_unchanged = skip_unchanged
+
+		self._cdp_session: Optional['CDPSession'] = None
+		# Set once the browser turned out not to support DevTools screenshots
+		self._cdp_unavailable = False
+		# Key of the page as it looked on the previous screenshot, and that screenshot
+		self._last_key: Optional[tuple] = None
+		self._last_screenshot: Optional[str] = None
+		self.reused_screenshots = 0
+
+	async def capture(self, full_page: bool = False, state_key: Hashable = None) -> str:
+		"""
+		Base64 encoded screenshot of the page.
+
+		With skip_unchanged, the previous screenshot is only reused if `state_key`, a digest of the page
+		content from the caller, is the same as well. Changes too small to show in the thumbnail, like a
+		few characters of text, then still give a new screenshot.
+		"""
+		if not self._cdp_unavailable:
+			try:
+				return await self._capture_cdp(full_page, state_key)
+			except Exception as e:
+				if any(error in str(e).lower() for error in _CDP_UNSUPPORTED_ERRORS):
+					logger.debug(f'DevTools screenshots are not supported, using Playwright screenshots for this page: {e}')
+					self._cdp_unavailable = True
+				else:
+					logger.debug(f'DevTools screenshot failed, using a Playwright screenshot this time: {e}')
+				self._cdp_session = None
+		return await self._capture_playwright(full_page)
+
+	async def _capture_cdp(self, full_page: bool, state_key: Hashable = None) -> str:
+		if self._cdp_session is None:
+			self._cdp_session = await self.page.context.new_cdp_session(self.page)
+		session = self._cdp_session
+
+		metrics = await session.send('Page.getLayoutMetrics')
+		viewport = metrics['cssVisualViewport']
+		# The layout viewport metrics without css prefix are in device pixels
+		device_pixel_ratio = metrics['layoutViewport']['clientWidth'] / max(1, metrics['cssLayoutViewport']['clientWidth'])
+		if full_page:
+			content = metrics['cssContentSize']
+			clip = {'x': 0, 'y': 0, 'width': content['width'], 'height': content['height']}
+		else:
+			clip = {
+				'x': viewport['pageX'],
+				'y': viewport['pageY'],
+				'width': viewport['clientWidth'],
+				'height': viewport['clientHeight'],
+			}
+		largest_side = max(clip['width'], clip['height']) * device_pixel_ratio
+
+		key = None
+		if self.skip_unchanged:
+			thumbnail = await session.send(
+				'Page.captureScreenshot',
+				{
+					'format': 'png',
+					'clip': {**clip, 'scale': THUMBNAIL_SIZE / max(1, largest_side)},
+					'captureBeyondViewport': full_page,
+				},
+			)
+			thumbnail_hash = await asyncio.to_thread(_thumbnail_hash, base64.b64decode(thumbnail['data']))
+			key = (self.page.url, full_page, tuple(clip.values()), state_key, thumbnail_hash)
+			if key == self._last_key and self._last_screenshot is not None:
+				self.reused_screenshots += 1
+				return self._last_screenshot
+
+		scale = 1.0
+		if self.max_dimension and largest_side > self.max_dimension:
+			scale = self.max_dimension / largest_side
+		params: dict = {
+			'format': self.format,
+			'clip': {**clip, 'scale': scale},
+			'captureBeyondViewport': full_page,
+		}
+		if self.format != 'png':
+			params['quality'] = self.quality
+		screenshot = (await session.send('Page.captureScreenshot', params))['data']
+
+		self._last_key = key
+		self._last_screenshot = screenshot
+		return screenshot
+
+	async def _capture_playwright(self, full_page: bool) -> str:
+		screenshot = await self.page.screenshot(
+			full_page=full_page,
+			animations='disabled',
+			type='jpeg' if self.format == 'jpeg' else 'png',
+			quality=self.quality if self.format == 'jpeg' else None,
+		)
+
+		if self.format == 'webp' or self.max_dimension:
+			try:
+				screenshot = await asyncio.to_thread(_reencode, screenshot, self.format, self.quality, self.max_dimension)
+			except ImportError:
+				logger.debug('Pillow is not installed, screenshots are not re-encoded')
+
+		return base64.b64encode(screenshot).decode('utf-8')
+
+	async def close(self) -> None:
+		if self._cdp_session is not None:
+			try:
+				await self._cdp_session.detach()
+			except Exception:
+				pass
+			self._cdp_session = None
@@ -36,6 +36,8 @@ class BrowserState(DOMState):
 	pixels_above: int = 0
 	pixels_below: int = 0
 	browser_errors: list[str] = field(default_factory=list)
+	# Seconds spent in each phase of capturing this state ('dom', 'tabs', 'screenshot', 'highlights', 'total')
+	timings: dict[str, float] = field(default_factory=dict)
 
 
 @dataclass
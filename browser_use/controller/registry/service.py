@@ -1,4 +1,5 @@
 import asyncio
+from collections import OrderedDict
 from inspect import iscoroutinefunction, signature
 from typing import Any, Callable, Dict, Generic, Optional, Type, TypeVar
 
@@ -7,10 +8,12 @@ from pydantic import BaseModel, Field, create_model
 
 from browser_use.browser.context import BrowserContext
 from browser_use.controller.registry.views import (
+	ActionDispatchPlan,
 	ActionModel,
 	ActionRegistry,
 	RegisteredAction,
 )
+from browser_use.sensitive_data import SensitiveDataRedactor
 from browser_use.telemetry.service import ProductTelemetry
 from browser_use.telemetry.views import (
 	ControllerRegisteredFunctionsTelemetryEvent,
@@ -20,6 +23,9 @@ from browser_use.utils import time_execution_async, time_execution_sync
 
 Context = TypeVar('Context')
 
+# Number of action models kept per registry, one per distinct set of applicable actions
+ACTION_MODEL_CACHE_SIZE = 32
+
 
 class Registry(Generic[Context]):
 	"""Service for registering and managing actions"""
@@ -28,6 +34,12 @@ class Registry(Generic[Context]):
 		self.registry = ActionRegistry()
 		self.telemetry = ProductTelemetry()
 		self.exclude_actions = exclude_actions if exclude_actions is not None else []
+		# Applicable action names -> action model, least recently used first
+		self._action_models: OrderedDict[frozenset[str], Type[ActionModel]] = OrderedDict()
+		# Action name -> (action the plan was made for, plan)
+		self._dispatch_plans: dict[str, tuple[RegisteredAction, ActionDispatchPlan]] = {}
+		# Reused as long as the agent passes the same sensitive data
+		self._redactor: Optional[SensitiveDataRedactor] = None
 
 	@time_execution_sync('--create_param_model')
 	def _create_param_model(self, function: Callable) -> Type[BaseModel]:
@@ -36,7 +48,10 @@ class Registry(Generic[Context]):
 		params = {
 			name: (param.annotation, ... if param.default == param.empty else param.default)
 			for name, param in sig.parameters.items()
-			if name != 'browser' and name != 'page_extraction_llm' and name != 'available_file_paths'
+			if name != 'browser'
+			and name != 'page_extraction_llm'
+			and name != 'available_file_paths'
+			and name != 'has_sensitive_data'
 		}
 		# TODO: make the types here work
 		return create_model(
@@ -85,6 +100,9 @@ class Registry(Generic[Context]):
 				page_filter=page_filter,
 			)
 			self.registry.actions[func.__name__] = action
+			self._dispatch_plans[func.__name__] = (action, ActionDispatchPlan.from_function(wrapped_func, actual_param_model))
+			# Models built before may hold an older version of the action
+			self._action_models.clear()
 			return func
 
 		return decorator
@@ -106,73 +124,49 @@ class Registry(Generic[Context]):
 			raise ValueError(f'Action {action_name} not found')
 
 		action = self.registry.actions[action_name]
+		plan = self._get_dispatch_plan(action)
 		try:
 			# Create the validated Pydantic model
 			validated_params = action.param_model(**params)
 
-			# Check if the first parameter is a Pydantic model
-			sig = signature(action.function)
-			parameters = list(sig.parameters.values())
-			is_pydantic = parameters and issubclass(parameters[0].annotation, BaseModel)
-			parameter_names = [param.name for param in parameters]
-
-			if sensitive_data:
+			if sensitive_data and plan.replaces_sensitive_data:
 				validated_params = self._replace_sensitive_data(validated_params, sensitive_data)
 
-			# Check if the action requires browser
-			if 'browser' in parameter_names and not browser:
-				raise ValueError(f'Action {action_name} requires browser but none provided.')
-			if 'page_extraction_llm' in parameter_names and not page_extraction_llm:
-				raise ValueError(f'Action {action_name} requires page_extraction_llm but none provided.')
-			if 'available_file_paths' in parameter_names and not available_file_paths:
-				raise ValueError(f'Action {action_name} requires available_file_paths but none provided.')
-
-			if 'context' in parameter_names and not context:
-				raise ValueError(f'Action {action_name} requires context but none provided.')
-
-			# Prepare arguments based on parameter type
+			# Prepare the arguments the action requires
+			available_args = {
+				'browser': browser,
+				'page_extraction_llm': page_extraction_llm,
+				'available_file_paths': available_file_paths,
+				'context': context,
+			}
 			extra_args = {}
-			if 'context' in parameter_names:
-				extra_args['context'] = context
-			if 'browser' in parameter_names:
-				extra_args['browser'] = browser
-			if 'page_extraction_llm' in parameter_names:
-				extra_args['page_extraction_llm'] = page_extraction_llm
-			if 'available_file_paths' in parameter_names:
-				extra_args['available_file_paths'] = available_file_paths
-			if action_name == 'input_text' and sensitive_data:
+			for name in plan.injectables:
+				if not available_args[name]:
+					raise ValueError(f'Action {action_name} requires {name} but none provided.')
+				extra_args[name] = available_args[name]
+			if plan.takes_sensitive_data_flag and sensitive_data:
 				extra_args['has_sensitive_data'] = True
-			if is_pydantic:
+			if plan.takes_param_model:
 				return await action.function(validated_params, **extra_args)
 			return await action.function(**validated_params.model_dump(), **extra_args)
 
 		except Exception as e:
 			raise RuntimeError(f'Error executing action {action_name}: {str(e)}') from e
 
+	def _get_dispatch_plan(self, action: RegisteredAction) -> ActionDispatchPlan:
+		"""Dispatch plan made at registration, or a new one if the action was put into the registry directly"""
+		entry = self._dispatch_plans.get(action.name)
+		if entry is None or entry[0] is not action:
+			entry = (action, ActionDispatchPlan.from_function(action.function, action.param_model))
+			self._dispatch_plans[action.name] = entry
+		return entry[1]
+
 	def _replace_sensitive_data(self, params: BaseModel, sensitive_data: Dict[str, str]) -> BaseModel:
 		"""Replaces the sensitive data in the params"""
 		# if there are any str with <secret>placeholder</secret> in the params, replace them with the actual value from sensitive_data
-
-		import re
-
-		secret_pattern = re.compile(r'<secret>(.*?)</secret>')
-
-		def replace_secrets(value):
-			if isinstance(value, str):
-				matches = secret_pattern.findall(value)
-				for placeholder in matches:
-					if placeholder in sensitive_data:
-						value = value.replace(f'<secret>{placeholder}</secret>', sensitive_data[placeholder])
-				return value
-			elif isinstance(value, dict):
-				return {k: replace_secrets(v) for k, v in value.items()}
-			elif isinstance(value, list):
-				return [replace_secrets(v) for v in value]
-			return value
-
-		for key, value in params.model_dump().items():
-			params.__dict__[key] = replace_secrets(value)
-		return params
+		if self._redactor is None or self._redactor.sensitive_data != sensitive_data:
+			self._redactor = SensitiveDataRedactor(sensitive_data)
+		return self._redactor.resolve_params(params)
 
 	@time_execution_sync('--create_action_model')
 	def create_action_model(self, include_actions: Optional[list[str]] = None, page=None) -> Type[ActionModel]:
@@ -194,13 +188,20 @@ class Registry(Generic[Context]):
 				continue
 
 			# Check page_filter if present
-			domain_is_allowed = self.registry._match_domains(action.domains, page.url)
+			domain_is_allowed = action.match_domains(page.url)
 			page_is_allowed = self.registry._match_page_filter(action.page_filter, page)
 
 			# Include action if both filters match (or if either is not present)
 			if domain_is_allowed and page_is_allowed:
 				available_actions[name] = action
 
+		# Most steps end up with the same actions as the previous one, reuse the model built for them
+		key = frozenset(available_actions)
+		cached = self._action_models.get(key)
+		if cached is not None:
+			self._action_models.move_to_end(key)
+			return cached
+
 		fields = {
 			name: (
 				Optional[action.param_model],
@@ -212,13 +213,16 @@ class Registry(Generic[Context]):
 		self.telemetry.capture(
 			ControllerRegisteredFunctionsTelemetryEvent(
 				registered_functions=[
-					RegisteredFunction(name=name, params=action.param_model.model_json_schema())
-					for name, action in available_actions.items()
+					RegisteredFunction(name=name, params=action.param_schema) for name, action in available_actions.items()
 				]
 			)
 		)
 
-		return create_model('ActionModel', __base__=ActionModel, **fields)  # type:ignore
+		model = create_model('ActionModel', __base__=ActionModel, **fields)  # type:ignore
+		self._action_models[key] = model
+		if len(self._action_models) > ACTION_MODEL_CACHE_SIZE:
+			self._action_models.popitem(last=False)
+		return model
 
 	def get_prompt_description(self, page=None) -> str:
 		"""Get a description of all actions for the prompt
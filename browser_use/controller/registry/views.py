@@ -1,7 +1,46 @@
-from typing import Callable, Dict, Type
+from collections import OrderedDict
+from dataclasses import dataclass
+from inspect import signature
+from typing import Any, Callable, Dict, Type
 
 from playwright.async_api import Page
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, PrivateAttr
+
+from browser_use.browser.domains import DomainMatcher, get_glob_domain_matcher
+
+# Number of prompt descriptions kept per registry, one per distinct set of actions
+PROMPT_DESCRIPTION_CACHE_SIZE = 32
+
+# Arguments provided by the registry instead of the LLM, in the order they are checked
+INJECTABLE_PARAMETERS = ('browser', 'page_extraction_llm', 'available_file_paths', 'context')
+
+
+@dataclass(frozen=True)
+class ActionDispatchPlan:
+	"""How to call an action, derived from its signature once at registration"""
+
+	# Whether the function takes the validated param model as its first argument instead of keyword arguments
+	takes_param_model: bool
+	# Injectable arguments the function declares, see INJECTABLE_PARAMETERS
+	injectables: tuple[str, ...]
+	# Whether the function wants to know that its params had secrets substituted, passed as has_sensitive_data
+	# unless the param model already has a field of that name
+	takes_sensitive_data_flag: bool
+	# Whether the params have any fields secrets could be substituted into
+	replaces_sensitive_data: bool
+
+	@classmethod
+	def from_function(cls, function: Callable, param_model: Type[BaseModel]) -> 'ActionDispatchPlan':
+		parameters = list(signature(function).parameters.values())
+		parameter_names = {param.name for param in parameters}
+		first_annotation = parameters[0].annotation if parameters else None
+		return cls(
+			takes_param_model=isinstance(first_annotation, type) and issubclass(first_annotation, BaseModel),
+			injectables=tuple(name for name in INJECTABLE_PARAMETERS if name in parameter_names),
+			takes_sensitive_data_flag='has_sensitive_data' in parameter_names
+			and 'has_sensitive_data' not in param_model.model_fields,
+			replaces_sensitive_data=bool(param_model.model_fields),
+		)
 
 
 class RegisteredAction(BaseModel):
@@ -18,19 +57,42 @@ class RegisteredAction(BaseModel):
 
 	model_config = ConfigDict(arbitrary_types_allowed=True)
 
-	def prompt_description(self) -> str:
-		"""Get a description of the action for the prompt"""
+	# Computed once at registration, the param model never changes afterwards
+	_param_schema: dict[str, Any] = PrivateAttr(default_factory=dict)
+	_prompt_description: str = PrivateAttr(default='')
+	_domain_matcher: DomainMatcher | None = PrivateAttr(default=None)
+
+	def model_post_init(self, __context: Any) -> None:
+		self._param_schema = self.param_model.model_json_schema()
+		if self.domains is not None:
+			self._domain_matcher = get_glob_domain_matcher(tuple(self.domains))
+
 		skip_keys = ['title']
 		s = f'{self.description}: \n'
 		s += '{' + str(self.name) + ': '
 		s += str(
 			{
 				k: {sub_k: sub_v for sub_k, sub_v in v.items() if sub_k not in skip_keys}
-				for k, v in self.param_model.model_json_schema()['properties'].items()
+				for k, v in self._param_schema['properties'].items()
 			}
 		)
 		s += '}'
-		return s
+		self._prompt_description = s
+
+	@property
+	def param_schema(self) -> dict[str, Any]:
+		"""JSON schema of the action parameters"""
+		return self._param_schema
+
+	def prompt_description(self) -> str:
+		"""Get a description of the action for the prompt"""
+		return self._prompt_description
+
+	def match_domains(self, url: str) -> bool:
+		"""Match the domains of the action against a URL, True if the action has no domains"""
+		if self._domain_matcher is None or not url:
+			return True
+		return self._domain_matcher.matches(url)
 
 
 class ActionModel(BaseModel):
@@ -65,11 +127,46 @@ class ActionModel(BaseModel):
 			action_params.index = index
 
 
+@dataclass
+class PromptDescriptionCacheStats:
+	"""Hits and misses of the prompt description cache of a registry"""
+
+	hits: int = 0
+	misses: int = 0
+
+
 class ActionRegistry(BaseModel):
 	"""Model representing the action registry"""
 
 	actions: Dict[str, RegisteredAction] = {}
 
+	# Identities of the described actions -> (the actions, kept alive so their ids stay unique, description)
+	_descriptions: OrderedDict[tuple[int, ...], tuple[tuple[RegisteredAction, ...], str]] = PrivateAttr(
+		default_factory=OrderedDict
+	)
+	_description_cache_stats: PromptDescriptionCacheStats = PrivateAttr(default_factory=PromptDescriptionCacheStats)
+
+	@property
+	def description_cache_stats(self) -> PromptDescriptionCacheStats:
+		"""Hit counters of the prompt description cache"""
+		return self._description_cache_stats
+
+	def _describe(self, actions: list[RegisteredAction]) -> str:
+		"""Concatenated prompt description of the given actions, memoized per set of actions"""
+		key = tuple(id(action) for action in actions)
+		cached = self._descriptions.get(key)
+		if cached is not None:
+			self._descriptions.move_to_end(key)
+			self._description_cache_stats.hits += 1
+			return cached[1]
+
+		self._description_cache_stats.misses += 1
+		description = '\n'.join(action.prompt_description() for action in actions)
+		self._descriptions[key] = (tuple(actions), description)
+		if len(self._descriptions) > PROMPT_DESCRIPTION_CACHE_SIZE:
+			self._descriptions.popitem(last=False)
+		return description
+
 	@staticmethod
 	def _match_domains(domains: list[str] | None, url: str) -> bool:
 		"""
@@ -86,26 +183,7 @@ class ActionRegistry(BaseModel):
 		if domains is None or not url:
 			return True
 
-		import fnmatch
-		from urllib.parse import urlparse
-
-		# Parse the URL to get the domain
-		try:
-			parsed_url = urlparse(url)
-			if not parsed_url.netloc:
-				return False
-
-			domain = parsed_url.netloc
-			# Remove port if present
-			if ':' in domain:
-				domain = domain.split(':')[0]
-
-			for domain_pattern in domains:
-				if fnmatch.fnmatch(domain, domain_pattern):  # Perform glob *.matching.*
-					return True
-			return False
-		except Exception:
-			return False
+		return get_glob_domain_matcher(tuple(domains)).matches(url)
 
 	@staticmethod
 	def _match_page_filter(page_filter: Callable[[Page], bool] | None, page: Page) -> bool:
@@ -127,10 +205,8 @@ class ActionRegistry(BaseModel):
 		"""
 		if page is None:
 			# For system prompt (no page provided), include only actions with no filters
-			return '\n'.join(
-				action.prompt_description()
-				for action in self.actions.values()
-				if action.page_filter is None and action.domains is None
+			return self._describe(
+				[action for action in self.actions.values() if action.page_filter is None and action.domains is None]
 			)
 
 		# only include filtered actions for the current page
@@ -140,10 +216,10 @@ class ActionRegistry(BaseModel):
 				# skip actions with no filters, they are already included in the system prompt
 				continue
 
-			domain_is_allowed = self._match_domains(action.domains, page.url)
+			domain_is_allowed = action.match_domains(page.url)
 			page_is_allowed = self._match_page_filter(action.page_filter, page)
 
 			if domain_is_allowed and page_is_allowed:
 				filtered_actions.append(action)
 
-		return '\n'.join(action.prompt_description() for action in filtered_actions)
+		return self._describe(filtered_actions)
@@ -4,9 +4,23 @@
     focusHighlightIndex: -1,
     viewportExpansion: 0,
     debugMode: false,
+    incremental: false,
+    baseGeneration: null,
+    compactPayload: false,
+    removeHighlights: false,
+    includePageInfo: false,
+    highlightBoxes: false,
   }
 ) => {
   const { doHighlightElements, focusHighlightIndex, viewportExpansion, debugMode } = args;
+  const incremental = args.incremental ?? false;
+  const baseGeneration = args.baseGeneration ?? null;
+  const compactPayload = args.compactPayload ?? false;
+  const removeHighlights = args.removeHighlights ?? false;
+  const includePageInfo = args.includePageInfo ?? false;
+  // Return the boxes of highlighted elements instead of drawing overlays into the page
+  const highlightBoxes = args.highlightBoxes ?? false;
+  const HIGHLIGHT_BOXES = [];
   let highlightIndex = 0; // Reset highlight index
 
   // Add timing stack to handle recursion
@@ -187,12 +201,211 @@
 
   const HIGHLIGHT_CONTAINER_ID = "playwright-highlight-container";
 
+  // Remove highlights of the previous extraction, saves a separate evaluation
+  if (removeHighlights) {
+    document.getElementById(HIGHLIGHT_CONTAINER_ID)?.remove();
+    document.querySelectorAll('[browser-user-highlight-id^="playwright-highlight-"]').forEach((el) => {
+      el.removeAttribute('browser-user-highlight-id');
+    });
+  }
+
+  /**
+   * Returns true for mutations caused by our own highlight overlays.
+   */
+  function isHighlightMutation(record) {
+    const target = record.target;
+    if (target.nodeType === Node.ELEMENT_NODE &&
+      (target.id === HIGHLIGHT_CONTAINER_ID || target.closest(`#${HIGHLIGHT_CONTAINER_ID}`))) {
+      return true;
+    }
+    if (record.type === "childList") {
+      const nodes = [...record.addedNodes, ...record.removedNodes];
+      return nodes.length > 0 && nodes.every((node) => node.id === HIGHLIGHT_CONTAINER_ID);
+    }
+    return false;
+  }
+
+  /**
+   * Persistent per-document agent used for incremental snapshots.
+   *
+   * It is installed once per document and survives between evaluations. It keeps
+   * stable node ids, the node data produced by the previous walk and the elements
+   * touched by mutations (or scrolled) since then.
+   */
+  function getDomAgent() {
+    if (window.__browserUseDomAgent) return window.__browserUseDomAgent;
+
+    const agent = {
+      // Random prefix so that a generation from another document never matches
+      documentId: Math.random().toString(36).slice(2),
+      counter: 0,
+      generation: null,
+      layoutKey: null,
+      nextId: 0,
+      ids: new WeakMap(),
+      cache: new WeakMap(),
+      live: new Set(),
+      dirty: new WeakSet(),
+      dirtyAncestors: new WeakSet(),
+    };
+
+    // Marks a node as changed. Deep changes (attributes, text, scrolling) invalidate the whole
+    // subtree, while child list changes only force the node itself to be recomputed.
+    agent.markDirty = (target, deep) => {
+      if (deep) agent.dirty.add(target);
+      let current = target;
+      while (current && !agent.dirtyAncestors.has(current)) {
+        agent.dirtyAncestors.add(current);
+        current = current.parentNode || current.host;
+      }
+    };
+
+    agent.processRecords = (records) => {
+      for (const record of records) {
+        if (!isHighlightMutation(record)) agent.markDirty(record.target, record.type !== "childList");
+      }
+    };
+
+    agent.observer = new MutationObserver(agent.processRecords);
+    agent.observer.observe(document, {
+      subtree: true,
+      childList: true,
+      attributes: true,
+      characterData: true,
+    });
+
+    // Scrolling a container moves its content without any mutation
+    document.addEventListener("scroll", (event) => {
+      if (event.target !== document) agent.markDirty(event.target, true);
+    }, { capture: true, passive: true });
+
+    window.__browserUseDomAgent = agent;
+    return agent;
+  }
+
+  const agent = incremental ? getDomAgent() : null;
+  const layoutKey = `${window.scrollX},${window.scrollY},${window.innerWidth},${window.innerHeight},${viewportExpansion}`;
+  if (agent) agent.processRecords(agent.observer.takeRecords());
+
+  // Only patch the previous snapshot if the caller holds it and the viewport did not move
+  const REUSE = !!agent && agent.generation !== null && agent.generation === baseGeneration && agent.layoutKey === layoutKey;
+  const LIVE_IDS = new Set();
+
+  function getNodeId(node) {
+    if (!agent) return `${ID.current++}`;
+
+    let id = agent.ids.get(node);
+    if (id === undefined) {
+      id = `${agent.nextId++}`;
+      agent.ids.set(node, id);
+    }
+    return id;
+  }
+
+  /**
+   * Records a freshly computed node. When patching, only nodes whose data changed are sent back.
+   */
+  function storeNode(node, id, nodeData, kids = [], opaque = false) {
+    if (!agent) {
+      DOM_HASH_MAP[id] = nodeData;
+      return;
+    }
+
+    const previous = agent.cache.get(node);
+    if (!REUSE || !previous || JSON.stringify(previous.data) !== JSON.stringify(nodeData)) {
+      DOM_HASH_MAP[id] = nodeData;
+    }
+
+    let rect = null;
+    if (node.nodeType === Node.ELEMENT_NODE) {
+      const { top, left, width, height } = getCachedBoundingRect(node);
+      rect = { top, left, width, height };
+    }
+    agent.cache.set(node, { id, data: nodeData, kids, opaque, rect });
+    LIVE_IDS.add(id);
+  }
+
+  function hasSameRect(node, entry) {
+    const rect = getCachedBoundingRect(node);
+    return !!rect && !!entry.rect && rect.top === entry.rect.top && rect.left === entry.rect.left &&
+      rect.width === entry.rect.width && rect.height === entry.rect.height;
+  }
+
+  function canReuse(node, entry) {
+    if (agent.dirty.has(node)) return false;
+    if (entry.data.type === "TEXT_NODE") return true;
+    if (entry.opaque || agent.dirtyAncestors.has(node) || !hasSameRect(node, entry)) return false;
+
+    // Whether an element is on top depends on everything painted above it, not only on its subtree
+    return !entry.data.isVisible || isTopElement(node) === !!entry.data.isTopElement;
+  }
+
+  /**
+   * Re-emits a subtree computed by a previous walk: highlight indexes are renumbered,
+   * highlights redrawn and only changed nodes are sent back.
+   */
+  function emitCachedNode(node, entry, parentIframe) {
+    const data = entry.data;
+    LIVE_IDS.add(entry.id);
+    if (data.type === "TEXT_NODE") return entry.id;
+
+    if (data.highlightIndex !== undefined) {
+      const index = highlightIndex++;
+      if (data.highlightIndex !== index) {
+        data.highlightIndex = index;
+        DOM_HASH_MAP[entry.id] = data;
+      }
+
+      if (doHighlightElements && (focusHighlightIndex < 0 || focusHighlightIndex === index)) {
+        highlightElement(node, index, parentIframe);
+      }
+    }
+
+    const children = [];
+    const kids = [];
+    for (const kid of entry.kids) {
+      const kidEntry = agent.cache.get(kid);
+      const kidId = kidEntry && canReuse(kid, kidEntry)
+        ? emitCachedNode(kid, kidEntry, parentIframe)
+        : buildDomTree(kid, parentIframe, false);
+      if (kidId) {
+        children.push(kidId);
+        kids.push(kid);
+      }
+    }
+
+    if (children.length !== data.children.length || children.some((id, i) => id !== data.children[i])) {
+      data.children = children;
+      entry.kids = kids;
+      DOM_HASH_MAP[entry.id] = data;
+    }
+    return entry.id;
+  }
+
   /**
    * Highlights an element in the DOM and returns the index of the next element.
    */
   function highlightElement(element, index, parentIframe = null) {
     if (!element) return index;
 
+    if (highlightBoxes) {
+      const rect = measureDomOperation(
+        () => element.getBoundingClientRect(),
+        'getBoundingClientRect'
+      );
+      if (!rect) return index;
+
+      const iframeRect = parentIframe ? parentIframe.getBoundingClientRect() : null;
+      HIGHLIGHT_BOXES.push({
+        index,
+        x: rect.left + (iframeRect ? iframeRect.left : 0),
+        y: rect.top + (iframeRect ? iframeRect.top : 0),
+        width: rect.width,
+        height: rect.height,
+      });
+      return index + 1;
+    }
+
     try {
       // Create or get highlight container
       let container = document.getElementById(HIGHLIGHT_CONTAINER_ID);
@@ -808,8 +1021,11 @@
 
   /**
    * Creates a node data object for a given node and its descendants.
+   *
+   * When patching a previous snapshot, subtrees untouched since the last walk are re-emitted
+   * from the agent cache instead of being recomputed.
    */
-  function buildDomTree(node, parentIframe = null) {
+  function buildDomTree(node, parentIframe = null, allowReuse = REUSE) {
     if (debugMode) PERF_METRICS.nodeMetrics.totalNodes++;
 
     if (!node || node.id === HIGHLIGHT_CONTAINER_ID) {
@@ -817,6 +1033,17 @@
       return null;
     }
 
+    let childReuse = false;
+    if (allowReuse) {
+      const entry = agent.cache.get(node);
+      if (entry && canReuse(node, entry)) {
+        if (debugMode) PERF_METRICS.nodeMetrics.processedNodes++;
+        return emitCachedNode(node, entry, parentIframe);
+      }
+      // Children of a node whose own content did not change and that did not move can still be reused
+      childReuse = !!entry && entry.data.type !== "TEXT_NODE" && !agent.dirty.has(node) && hasSameRect(node, entry);
+    }
+
     // Special handling for root node (body)
     if (node === document.body) {
       const nodeData = {
@@ -825,15 +1052,19 @@
         xpath: '/body',
         children: [],
       };
+      const kids = [];
 
       // Process children of body
       for (const child of node.childNodes) {
-        const domElement = buildDomTree(child, parentIframe);
-        if (domElement) nodeData.children.push(domElement);
+        const domElement = buildDomTree(child, parentIframe, allowReuse);
+        if (domElement) {
+          nodeData.children.push(domElement);
+          kids.push(child);
+        }
       }
 
-      const id = `${ID.current++}`;
-      DOM_HASH_MAP[id] = nodeData;
+      const id = getNodeId(node);
+      storeNode(node, id, nodeData, kids, kids.some((kid) => agent?.cache.get(kid)?.opaque));
       if (debugMode) PERF_METRICS.nodeMetrics.processedNodes++;
       return id;
     }
@@ -859,12 +1090,12 @@
         return null;
       }
 
-      const id = `${ID.current++}`;
-      DOM_HASH_MAP[id] = {
+      const id = getNodeId(node);
+      storeNode(node, id, {
         type: "TEXT_NODE",
         text: textContent,
         isVisible: isTextNodeVisible(node),
-      };
+      });
       if (debugMode) PERF_METRICS.nodeMetrics.processedNodes++;
       return id;
     }
@@ -904,6 +1135,8 @@
       xpath: getXPathTree(node, true),
       children: [],
     };
+    const kids = [];
+    let opaque = false;
 
     // Get attributes for interactive elements or potential text containers
     if (isInteractiveCandidate(node) || node.tagName.toLowerCase() === 'iframe' || node.tagName.toLowerCase() === 'body') {
@@ -946,12 +1179,17 @@
 
       // Handle iframes
       if (tagName === "iframe") {
+        // Frames are not covered by the mutation observer, so they are always recomputed
+        opaque = true;
         try {
           const iframeDoc = node.contentDocument || node.contentWindow?.document;
           if (iframeDoc) {
             for (const child of iframeDoc.childNodes) {
-              const domElement = buildDomTree(child, node);
-              if (domElement) nodeData.children.push(domElement);
+              const domElement = buildDomTree(child, node, false);
+              if (domElement) {
+                nodeData.children.push(domElement);
+                kids.push(child);
+              }
             }
           }
         } catch (e) {
@@ -968,23 +1206,34 @@
       ) {
         // Process all child nodes to capture formatted text
         for (const child of node.childNodes) {
-          const domElement = buildDomTree(child, parentIframe);
-          if (domElement) nodeData.children.push(domElement);
+          const domElement = buildDomTree(child, parentIframe, childReuse);
+          if (domElement) {
+            nodeData.children.push(domElement);
+            kids.push(child);
+          }
         }
       }
       else {
         // Handle shadow DOM
         if (node.shadowRoot) {
           nodeData.shadowRoot = true;
+          // Shadow trees are not covered by the mutation observer either
+          opaque = true;
           for (const child of node.shadowRoot.childNodes) {
-            const domElement = buildDomTree(child, parentIframe);
-            if (domElement) nodeData.children.push(domElement);
+            const domElement = buildDomTree(child, parentIframe, false);
+            if (domElement) {
+              nodeData.children.push(domElement);
+              kids.push(child);
+            }
           }
         }
         // Handle regular elements
         for (const child of node.childNodes) {
-          const domElement = buildDomTree(child, parentIframe);
-          if (domElement) nodeData.children.push(domElement);
+          const domElement = buildDomTree(child, parentIframe, childReuse);
+          if (domElement) {
+            nodeData.children.push(domElement);
+            kids.push(child);
+          }
         }
       }
     }
@@ -995,12 +1244,99 @@
       return null;
     }
 
-    const id = `${ID.current++}`;
-    DOM_HASH_MAP[id] = nodeData;
+    const id = getNodeId(node);
+    storeNode(node, id, nodeData, kids, opaque || kids.some((kid) => agent?.cache.get(kid)?.opaque));
     if (debugMode) PERF_METRICS.nodeMetrics.processedNodes++;
     return id;
   }
 
+  // Bits of the `flags` column of the columnar payload
+  const COLUMN_FLAGS = {
+    visible: 1,
+    topElement: 2,
+    interactive: 4,
+    inViewport: 8,
+    shadowRoot: 16,
+    text: 32,
+  };
+
+  /**
+   * Encodes the node map as parallel arrays plus a shared string table.
+   *
+   * Nodes are listed in pre-order starting at the root, so every parent comes before its
+   * children and siblings keep their order. Repeated keys, tag names, attribute names and
+   * values are sent once instead of once per node.
+   */
+  function encodeColumnar(map, rootId) {
+    const strings = [];
+    const stringIndex = new Map();
+    const intern = (value) => {
+      let index = stringIndex.get(value);
+      if (index === undefined) {
+        index = strings.length;
+        strings.push(value);
+        stringIndex.set(value, index);
+      }
+      return index;
+    };
+
+    const columns = {
+      strings,
+      flags: [],
+      parent: [],
+      tag: [],
+      xpath: [],
+      text: [],
+      highlight: [],
+      attrOffsets: [0],
+      attrNames: [],
+      attrValues: [],
+    };
+
+    const stack = rootId == null ? [] : [[`${rootId}`, -1]];
+    while (stack.length > 0) {
+      const [id, parentIndex] = stack.pop();
+      const data = map[id];
+      if (!data) continue;
+
+      const index = columns.flags.length;
+      columns.parent.push(parentIndex);
+
+      if (data.type === "TEXT_NODE") {
+        columns.flags.push(COLUMN_FLAGS.text | (data.isVisible ? COLUMN_FLAGS.visible : 0));
+        columns.tag.push(-1);
+        columns.xpath.push(-1);
+        columns.text.push(intern(data.text));
+        columns.highlight.push(-1);
+      } else {
+        columns.flags.push(
+          (data.isVisible ? COLUMN_FLAGS.visible : 0) |
+          (data.isTopElement ? COLUMN_FLAGS.topElement : 0) |
+          (data.isInteractive ? COLUMN_FLAGS.interactive : 0) |
+          (data.isInViewport ? COLUMN_FLAGS.inViewport : 0) |
+          (data.shadowRoot ? COLUMN_FLAGS.shadowRoot : 0)
+        );
+        columns.tag.push(intern(data.tagName));
+        columns.xpath.push(intern(data.xpath));
+        columns.text.push(-1);
+        columns.highlight.push(data.highlightIndex ?? -1);
+
+        for (const [name, value] of Object.entries(data.attributes)) {
+          columns.attrNames.push(intern(name));
+          columns.attrValues.push(intern(value));
+        }
+
+        // Pushed in reverse so that children are popped in document order
+        for (let i = data.children.length - 1; i >= 0; i--) {
+          stack.push([data.children[i], index]);
+        }
+      }
+      columns.attrOffsets.push(columns.attrNames.length);
+    }
+
+    return columns;
+  }
+
   // After all functions are defined, wrap them with performance measurement
   // Remove buildDomTree from here as we measure it separately
   highlightElement = measureTime(highlightElement);
@@ -1066,7 +1402,36 @@
     }
   }
 
-  return debugMode ?
-    { rootId, map: DOM_HASH_MAP, perfMetrics: PERF_METRICS } :
-    { rootId, map: DOM_HASH_MAP };
+  // Patches are merged by id on the Python side, so they always use the keyed map
+  const result = compactPayload && !agent
+    ? { rootId, columns: encodeColumnar(DOM_HASH_MAP, rootId) }
+    : { rootId, map: DOM_HASH_MAP };
+
+  if (agent) {
+    // Nodes seen by the previous walk but not by this one are gone
+    result.removedIds = REUSE ? [...agent.live].filter((id) => !LIVE_IDS.has(id)) : [];
+    result.isPatch = REUSE;
+
+    agent.live = LIVE_IDS;
+    agent.dirty = new WeakSet();
+    agent.dirtyAncestors = new WeakSet();
+    agent.layoutKey = layoutKey;
+    agent.generation = `${agent.documentId}:${agent.counter++}`;
+    result.generation = agent.generation;
+  }
+
+  if (includePageInfo) {
+    result.pageInfo = {
+      title: document.title,
+      scrollY: window.scrollY,
+      viewportWidth: window.innerWidth,
+      viewportHeight: window.innerHeight,
+      scrollHeight: document.documentElement.scrollHeight,
+    };
+  }
+
+  if (highlightBoxes) result.highlights = HIGHLIGHT_BOXES;
+
+  if (debugMode) result.perfMetrics = PERF_METRICS;
+  return result;
 };
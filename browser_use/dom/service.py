@@ -1,7 +1,8 @@
-import gc
 import json
 import logging
+import sys
 from dataclasses import dataclass
+from functools import cache
 from importlib import resources
 from typing import TYPE_CHECKING, Optional
 from urllib.parse import urlparse
@@ -10,16 +11,47 @@ if TYPE_CHECKING:
 	from playwright.async_api import Page
 
 from browser_use.dom.views import (
+	EMPTY_ATTRIBUTES,
 	DOMBaseNode,
 	DOMElementNode,
 	DOMState,
 	DOMTextNode,
+	HighlightBox,
+	PageInfo,
 	SelectorMap,
 )
 from browser_use.utils import time_execution_async
 
 logger = logging.getLogger(__name__)
 
+# Bits of the `flags` column of the columnar payload, see encodeColumnar in buildDomTree.js
+COLUMN_FLAG_VISIBLE = 1
+COLUMN_FLAG_TOP_ELEMENT = 2
+COLUMN_FLAG_INTERACTIVE = 4
+COLUMN_FLAG_IN_VIEWPORT = 8
+COLUMN_FLAG_SHADOW_ROOT = 16
+COLUMN_FLAG_TEXT = 32
+
+# Name of the window function the extractor is installed as
+BUILD_DOM_TREE_FUNCTION = '__browserUseBuildDomTree'
+CALL_BUILD_DOM_TREE_JS = f'args => window.{BUILD_DOM_TREE_FUNCTION} ? window.{BUILD_DOM_TREE_FUNCTION}(args) : null'
+
+
+@cache
+def get_build_dom_tree_js() -> str:
+	"""Source of buildDomTree.js, read once per process"""
+	return resources.files('browser_use.dom').joinpath('buildDomTree.js').read_text()
+
+
+@cache
+def get_build_dom_tree_install_js() -> str:
+	"""Script defining the extractor as a window function in the top frame, usable with add_init_script.
+
+	Once installed the extractor is called by name, so the script is not sent and compiled again on every step.
+	"""
+	function_code = get_build_dom_tree_js().strip().rstrip(';')
+	return f'if (window === window.top) {{ window.{BUILD_DOM_TREE_FUNCTION} = {function_code}; }}'
+
 
 @dataclass
 class ViewportInfo:
@@ -32,7 +64,11 @@ class DomService:
 		self.page = page
 		self.xpath_cache = {}
 
-		self.js_code = resources.files('browser_use.dom').joinpath('buildDomTree.js').read_text()
+		# Raw node map of the last snapshot, patched in place by incremental snapshots
+		self._js_node_map: dict[str, dict] = {}
+		self._generation: Optional[str] = None
+
+		self.js_code = get_build_dom_tree_js()
 
 	# region - Clickable elements
 	@time_execution_async('--get_clickable_elements')
@@ -41,8 +77,12 @@ class DomService:
 		highlight_elements: bool = True,
 		focus_element: int = -1,
 		viewport_expansion: int = 0,
+		incremental: bool = False,
+		compact_payload: bool = False,
 	) -> DOMState:
-		element_tree, selector_map = await self._build_dom_tree(highlight_elements, focus_element, viewport_expansion)
+		element_tree, selector_map = await self._build_dom_tree(
+			highlight_elements, focus_element, viewport_expansion, incremental, compact_payload
+		)
 		return DOMState(element_tree=element_tree, selector_map=selector_map)
 
 	@time_execution_async('--get_cross_origin_iframes')
@@ -63,16 +103,65 @@ class DomService:
 			and not is_ad_url(frame.url)  # exclude most common ad network tracker frame URLs
 		]
 
+	@time_execution_async('--capture_page_state')
+	async def capture_page_state(
+		self,
+		highlight_elements: bool = True,
+		focus_element: int = -1,
+		viewport_expansion: int = 0,
+		incremental: bool = False,
+		compact_payload: bool = False,
+		highlight_boxes: bool = False,
+	) -> tuple[DOMState, PageInfo]:
+		"""Extract the DOM together with the page title and scroll metrics in a single evaluation.
+
+		Highlights of the previous extraction are removed by the same call. There is no separate
+		check that the page can evaluate javascript, a dead page makes the evaluation raise.
+		With highlight_boxes the page is left untouched and the boxes of the highlighted elements
+		are returned in the DOMState, to be drawn onto the screenshot.
+		"""
+		element_tree, selector_map, page_info, boxes = await self._extract_dom_tree(
+			highlight_elements,
+			focus_element,
+			viewport_expansion,
+			incremental,
+			compact_payload,
+			remove_highlights=True,
+			include_page_info=True,
+			highlight_boxes=highlight_boxes,
+		)
+		if page_info is None:
+			raise ValueError('The DOM extraction did not return the page info')
+		return DOMState(element_tree=element_tree, selector_map=selector_map, highlight_boxes=boxes), page_info
+
 	@time_execution_async('--build_dom_tree')
 	async def _build_dom_tree(
 		self,
 		highlight_elements: bool,
 		focus_element: int,
 		viewport_expansion: int,
+		incremental: bool = False,
+		compact_payload: bool = False,
 	) -> tuple[DOMElementNode, SelectorMap]:
 		if await self.page.evaluate('1+1') != 2:
 			raise ValueError('The page cannot evaluate javascript code properly')
 
+		element_tree, selector_map, _, _ = await self._extract_dom_tree(
+			highlight_elements, focus_element, viewport_expansion, incremental, compact_payload
+		)
+		return element_tree, selector_map
+
+	async def _extract_dom_tree(
+		self,
+		highlight_elements: bool,
+		focus_element: int,
+		viewport_expansion: int,
+		incremental: bool,
+		compact_payload: bool,
+		remove_highlights: bool = False,
+		include_page_info: bool = False,
+		highlight_boxes: bool = False,
+	) -> tuple[DOMElementNode, SelectorMap, Optional[PageInfo], list[HighlightBox]]:
 		if self.page.url == 'about:blank':
 			# short-circuit if the page is a new empty tab for speed, no need to inject buildDomTree.js
 			return (
@@ -85,6 +174,8 @@ class DomService:
 					parent=None,
 				),
 				{},
+				PageInfo(title='', scroll_y=0, viewport_height=0, scroll_height=0) if include_page_info else None,
+				[],
 			)
 
 		# NOTE: We execute JS code in the browser to extract important DOM information.
@@ -96,14 +187,27 @@ class DomService:
 			'focusHighlightIndex': focus_element,
 			'viewportExpansion': viewport_expansion,
 			'debugMode': debug_mode,
+			'incremental': incremental,
+			'baseGeneration': self._generation if incremental else None,
+			'compactPayload': compact_payload,
+			'removeHighlights': remove_highlights,
+			'includePageInfo': include_page_info,
+			'highlightBoxes': highlight_boxes,
 		}
 
 		try:
-			eval_page: dict = await self.page.evaluate(self.js_code, args)
+			eval_page: dict | None = await self.page.evaluate(CALL_BUILD_DOM_TREE_JS, args)
+			if eval_page is None:
+				# Document loaded before the init script was registered (or DomService used on its own)
+				await self.page.evaluate(f'() => {{ {get_build_dom_tree_install_js()} }}')
+				eval_page = await self.page.evaluate(CALL_BUILD_DOM_TREE_JS, args)
 		except Exception as e:
 			logger.error('Error evaluating JavaScript: %s', e)
 			raise
 
+		if not isinstance(eval_page, dict):
+			raise ValueError('The page cannot evaluate javascript code properly')
+
 		# Only log performance metrics in debug mode
 		if debug_mode and 'perfMetrics' in eval_page:
 			logger.debug(
@@ -112,18 +216,61 @@ class DomService:
 				json.dumps(eval_page['perfMetrics'], indent=2),
 			)
 
-		return await self._construct_dom_tree(eval_page)
+		page_info = None
+		if include_page_info:
+			js_page_info = eval_page['pageInfo']
+			page_info = PageInfo(
+				title=js_page_info['title'],
+				scroll_y=js_page_info['scrollY'],
+				viewport_height=js_page_info['viewportHeight'],
+				scroll_height=js_page_info['scrollHeight'],
+				viewport_width=js_page_info.get('viewportWidth', 0),
+			)
+
+		boxes = [
+			HighlightBox(index=box['index'], x=box['x'], y=box['y'], width=box['width'], height=box['height'])
+			for box in eval_page.get('highlights', [])
+		]
+
+		if incremental:
+			eval_page = self._apply_incremental_snapshot(eval_page)
+
+		element_tree, selector_map = await self._construct_dom_tree(eval_page)
+		return element_tree, selector_map, page_info, boxes
+
+	def _apply_incremental_snapshot(self, eval_page: dict) -> dict:
+		"""Merge a (possibly partial) snapshot into the node map kept from previous calls.
+
+		A patch only contains the nodes that changed since the generation we sent as base,
+		plus the ids of nodes that disappeared. A full snapshot replaces the stored map.
+		"""
+		if eval_page.get('isPatch'):
+			node_map = self._js_node_map
+			for node_id in eval_page.get('removedIds', []):
+				node_map.pop(node_id, None)
+			node_map.update(eval_page['map'])
+		else:
+			node_map = dict(eval_page['map'])
+
+		self._js_node_map = node_map
+		self._generation = eval_page.get('generation')
+
+		return {**eval_page, 'map': node_map}
 
 	@time_execution_async('--construct_dom_tree')
 	async def _construct_dom_tree(
 		self,
 		eval_page: dict,
 	) -> tuple[DOMElementNode, SelectorMap]:
+		if 'columns' in eval_page:
+			return self._construct_columnar_dom_tree(eval_page['columns'])
+
 		js_node_map = eval_page['map']
 		js_root_id = eval_page['rootId']
 
 		selector_map = {}
 		node_map = {}
+		children_map = {}
 
 		for id, node_data in js_node_map.items():
 			node, children_ids = self._parse_node(node_data)
@@ -131,35 +278,100 @@ class DomService:
 				continue
 
 			node_map[id] = node
+			children_map[id] = children_ids
 
 			if isinstance(node, DOMElementNode) and node.highlight_index is not None:
 				selector_map[node.highlight_index] = node
 
-			# NOTE: We know that we are building the tree bottom up
-			#       and all children are already processed.
-			if isinstance(node, DOMElementNode):
-				for child_id in children_ids:
-					if child_id not in node_map:
-						continue
+		# NOTE: Ids are only post-ordered for full snapshots, incremental ones keep
+		#       stable ids across calls, so children are linked in a second pass.
+		for id, children_ids in children_map.items():
+			node = node_map[id]
+			if not isinstance(node, DOMElementNode):
+				continue
 
-					child_node = node_map[child_id]
+			for child_id in children_ids:
+				if child_id not in node_map:
+					continue
 
-					child_node.parent = node
-					node.children.append(child_node)
+				child_node = node_map[child_id]
 
-		html_to_dict = node_map[str(js_root_id)]
+				child_node.parent = node
+				node.children.append(child_node)
 
-		del node_map
-		del js_node_map
-		del js_root_id
+		html_to_dict = node_map[str(js_root_id)]
 
-		gc.collect()
+		# Parents are weak references (see DOMBaseNode), so the previous tree is freed by
+		# reference counting once its state is dropped, no collection pass is needed here.
 
 		if html_to_dict is None or not isinstance(html_to_dict, DOMElementNode):
 			raise ValueError('Failed to parse HTML to dictionary')
 
 		return html_to_dict, selector_map
 
+	def _construct_columnar_dom_tree(self, columns: dict) -> tuple[DOMElementNode, SelectorMap]:
+		"""Build the tree from the columnar payload.
+
+		Nodes come in pre-order, so each parent is created before its children and
+		no intermediate per-node dicts are needed.
+		"""
+		strings = columns['strings']
+		parents = columns['parent']
+		tags = columns['tag']
+		xpaths = columns['xpath']
+		texts = columns['text']
+		highlights = columns['highlight']
+		attr_offsets = columns['attrOffsets']
+		attr_names = columns['attrNames']
+		attr_values = columns['attrValues']
+
+		# Tag names and attribute names repeat across pages and snapshots, share one copy of each
+		for index in {*tags, *attr_names}:
+			if index >= 0:
+				strings[index] = sys.intern(strings[index])
+
+		nodes: list[DOMBaseNode] = []
+		selector_map: SelectorMap = {}
+
+		for i, flags in enumerate(columns['flags']):
+			parent = nodes[parents[i]] if parents[i] >= 0 else None
+
+			if flags & COLUMN_FLAG_TEXT:
+				node = DOMTextNode(
+					text=strings[texts[i]],
+					is_visible=bool(flags & COLUMN_FLAG_VISIBLE),
+					parent=parent,
+				)
+			else:
+				highlight_index = highlights[i] if highlights[i] >= 0 else None
+				attr_range = range(attr_offsets[i], attr_offsets[i + 1])
+				node = DOMElementNode(
+					tag_name=strings[tags[i]],
+					xpath=strings[xpaths[i]],
+					attributes={strings[attr_names[j]]: strings[attr_values[j]] for j in attr_range}
+					if attr_range
+					else EMPTY_ATTRIBUTES,
+					children=[],
+					is_visible=bool(flags & COLUMN_FLAG_VISIBLE),
+					is_interactive=bool(flags & COLUMN_FLAG_INTERACTIVE),
+					is_top_element=bool(flags & COLUMN_FLAG_TOP_ELEMENT),
+					is_in_viewport=bool(flags & COLUMN_FLAG_IN_VIEWPORT),
+					highlight_index=highlight_index,
+					shadow_root=bool(flags & COLUMN_FLAG_SHADOW_ROOT),
+					parent=parent,
+				)
+				if highlight_index is not None:
+					selector_map[highlight_index] = node
+
+			if parent is not None:
+				parent.children.append(node)
+			nodes.append(node)
+
+		if not nodes or not isinstance(nodes[0], DOMElementNode):
+			raise ValueError('Failed to parse HTML to dictionary')
+
+		return nodes[0], selector_map
+
 	def _parse_node(
 		self,
 		node_data: dict,
@@ -186,10 +398,12 @@ class DomService:
 				height=node_data['viewport']['height'],
 			)
 
+		attributes = node_data.get('attributes')
+
 		element_node = DOMElementNode(
-			tag_name=node_data['tagName'],
+			tag_name=sys.intern(node_data['tagName']),
 			xpath=node_data['xpath'],
-			attributes=node_data.get('attributes', {}),
+			attributes={sys.intern(key): value for key, value in attributes.items()} if attributes else EMPTY_ATTRIBUTES,
 			children=[],
 			is_visible=node_data.get('isVisible', False),
 			is_interactive=node_data.get('isInteractive', False),
@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from functools import cached_property
+import weakref
+from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, Dict, List, Optional
 
 from browser_use.dom.history_tree_processor.view import CoordinateSet, HashedDomElement, ViewportInfo
@@ -9,15 +9,40 @@ from browser_use.utils import time_execution_sync
 if TYPE_CHECKING:
 	from .views import DOMElementNode
 
+# Shared by all elements without attributes, never mutate it
+EMPTY_ATTRIBUTES: Dict[str, str] = {}
 
-@dataclass(frozen=False)
+
+def _weak_parent(cls):
+	"""Store the `parent` field of a slotted dataclass as a weak reference.
+
+	Parents own their children but children don't own their parents, so a tree has no
+	reference cycles and is freed by reference counting as soon as its root is dropped.
+	"""
+	slot = cls.parent
+
+	def get_parent(self) -> Optional['DOMElementNode']:
+		ref = slot.__get__(self, cls)
+		return ref() if ref is not None else None
+
+	def set_parent(self, value: Optional['DOMElementNode']) -> None:
+		slot.__set__(self, weakref.ref(value) if value is not None else None)
+
+	cls.parent = property(get_parent, set_parent)
+	return cls
+
+
+# Nodes are slotted: a page easily has thousands of them and every agent keeps
+# several trees around in its history, so they should not carry a __dict__ each.
+@_weak_parent
+@dataclass(frozen=False, slots=True, weakref_slot=True)
 class DOMBaseNode:
 	is_visible: bool
-	# Use None as default and set parent later to avoid circular reference issues
+	# Weak reference, the tree stays connected as long as its root is referenced (see _weak_parent)
 	parent: Optional['DOMElementNode']
 
 
-@dataclass(frozen=False)
+@dataclass(frozen=False, slots=True)
 class DOMTextNode(DOMBaseNode):
 	text: str
 	type: str = 'TEXT_NODE'
@@ -43,7 +68,7 @@ class DOMTextNode(DOMBaseNode):
 		return self.parent.is_top_element
 
 
-@dataclass(frozen=False)
+@dataclass(frozen=False, slots=True)
 class DOMElementNode(DOMBaseNode):
 	"""
 	xpath: the xpath of the element from the last root node (shadow root or iframe OR document if no shadow root or iframe).
@@ -62,6 +87,7 @@ class DOMElementNode(DOMBaseNode):
 	viewport_coordinates: Optional[CoordinateSet] = None
 	page_coordinates: Optional[CoordinateSet] = None
 	viewport_info: Optional[ViewportInfo] = None
+	_hash: Optional[HashedDomElement] = field(default=None, init=False, repr=False, compare=False)
 
 	def __repr__(self) -> str:
 		tag_str = f'<{self.tag_name}'
@@ -89,13 +115,15 @@ class DOMElementNode(DOMBaseNode):
 
 		return tag_str
 
-	@cached_property
+	@property
 	def hash(self) -> HashedDomElement:
-		from browser_use.dom.history_tree_processor.service import (
-			HistoryTreeProcessor,
-		)
+		if self._hash is None:
+			from browser_use.dom.history_tree_processor.service import (
+				HistoryTreeProcessor,
+			)
 
-		return HistoryTreeProcessor._hash_dom_element(self)
+			self._hash = HistoryTreeProcessor._hash_dom_element(self)
+		return self._hash
 
 	def get_all_text_till_next_clickable_element(self, max_depth: int = -1) -> str:
 		text_parts = []
@@ -105,7 +133,7 @@ class DOMElementNode(DOMBaseNode):
 				return
 
 			# Skip this branch if we hit a highlighted element (except for the current node)
-			if isinstance(node, DOMElementNode) and node != self and node.highlight_index is not None:
+			if isinstance(node, DOMElementNode) and node is not self and node.highlight_index is not None:
 				return
 
 			if isinstance(node, DOMTextNode):
@@ -119,51 +147,78 @@ class DOMElementNode(DOMBaseNode):
 
 	@time_execution_sync('--clickable_elements_to_string')
 	def clickable_elements_to_string(self, include_attributes: list[str] | None = None) -> str:
-		"""Convert the processed DOM content to HTML."""
-		formatted_text = []
-
-		def process_node(node: DOMBaseNode, depth: int) -> None:
-			if isinstance(node, DOMElementNode):
-				# Add element with highlight_index
-				if node.highlight_index is not None:
-					attributes_str = ''
-					text = node.get_all_text_till_next_clickable_element()
-					if include_attributes:
-						attributes = list(
-							set(
-								[
-									str(value)
-									for key, value in node.attributes.items()
-									if key in include_attributes and value != node.tag_name
-								]
-							)
-						)
-						if text in attributes:
-							attributes.remove(text)
-						attributes_str = ';'.join(attributes)
-					line = f'[{node.highlight_index}]<{node.tag_name} '
-					if attributes_str:
-						line += f'{attributes_str}'
-					if text:
-						if attributes_str:
-							line += f'>{text}'
-						else:
-							line += f'{text}'
-					line += '/>'
-					formatted_text.append(line)
-
-				# Process children regardless
-				for child in node.children:
-					process_node(child, depth + 1)
+		"""Convert the processed DOM content to HTML.
+
+		Single pass over the tree: text nodes are added either to the output or to the text of
+		their closest highlighted ancestor, whose line is completed once its subtree is done.
+		"""
+		formatted_text: list[str] = []
+
+		# Text of nodes above self is never visited, but a highlighted ancestor still hides it
+		inside_highlight = False
+		ancestor = self.parent
+		while ancestor is not None:
+			if ancestor.highlight_index is not None:
+				inside_highlight = True
+				break
+			ancestor = ancestor.parent
+
+		# Highlighted elements get a placeholder line, built once the text of their subtree is collected
+		pending_lines: list[tuple[int, DOMElementNode, list[str]]] = []
+
+		# Entries are (node, text parts of the closest highlighted ancestor, inside a highlighted ancestor)
+		stack: list[tuple[DOMBaseNode, Optional[list[str]], bool]] = [(self, None, inside_highlight)]
+		while stack:
+			node, text_parts, inside_highlight = stack.pop()
+
+			if isinstance(node, DOMTextNode):
+				if text_parts is not None:
+					text_parts.append(node.text)
+				elif not inside_highlight and node.is_visible:
+					formatted_text.append(node.text)
+				continue
 
-			elif isinstance(node, DOMTextNode):
-				# Add text only if it doesn't have a highlighted parent
-				if not node.has_parent_with_highlight_index() and node.is_visible:  # and node.is_parent_top_element()
-					formatted_text.append(f'{node.text}')
+			if not isinstance(node, DOMElementNode):
+				continue
+
+			if node.highlight_index is not None:
+				text_parts = []
+				inside_highlight = True
+				pending_lines.append((len(formatted_text), node, text_parts))
+				formatted_text.append('')
+
+			for child in reversed(node.children):
+				stack.append((child, text_parts, inside_highlight))
+
+		for line_index, node, text_parts in pending_lines:
+			formatted_text[line_index] = self._format_clickable_line(node, text_parts, include_attributes)
 
-		process_node(self, 0)
 		return '\n'.join(formatted_text)
 
+	@staticmethod
+	def _format_clickable_line(node: 'DOMElementNode', text_parts: list[str], include_attributes: list[str] | None) -> str:
+		attributes_str = ''
+		text = '\n'.join(text_parts).strip()
+		if include_attributes:
+			attributes = list(
+				set(
+					[str(value) for key, value in node.attributes.items() if key in include_attributes and value != node.tag_name]
+				)
+			)
+			if text in attributes:
+				attributes.remove(text)
+			attributes_str = ';'.join(attributes)
+		line = f'[{node.highlight_index}]<{node.tag_name} '
+		if attributes_str:
+			line += f'{attributes_str}'
+		if text:
+			if attributes_str:
+				line += f'>{text}'
+			else:
+				line += f'{text}'
+		line += '/>'
+		return line
+
 	def get_file_upload_element(self, check_siblings: bool = True) -> Optional['DOMElementNode']:
 		# Check if current element is a file input
 		if self.tag_name == 'input' and self.attributes.get('type') == 'file':
@@ -190,7 +245,39 @@ class DOMElementNode(DOMBaseNode):
 SelectorMap = dict[int, DOMElementNode]
 
 
+@dataclass
+class HighlightBox:
+	"""Bounding box of a highlighted element in CSS pixels, relative to the top left of the viewport"""
+
+	index: int
+	x: float
+	y: float
+	width: float
+	height: float
+
+
 @dataclass
 class DOMState:
 	element_tree: DOMElementNode
 	selector_map: SelectorMap
+	# Only filled when highlights are drawn onto the screenshot instead of into the page
+	highlight_boxes: list[HighlightBox] = field(default_factory=list, kw_only=True)
+
+
+@dataclass
+class PageInfo:
+	"""Title and scroll metrics of a page, captured together with its DOM"""
+
+	title: str
+	scroll_y: int
+	viewport_height: int
+	scroll_height: int
+	viewport_width: int = 0
+
+	@property
+	def pixels_above(self) -> int:
+		return self.scroll_y
+
+	@property
+	def pixels_below(self) -> int:
+		return self.scroll_height - (self.scroll_y + self.viewport_height)
@@ -0,0 +1,113 @@
+"""
+Redaction of secret values in text sent to the LLM and resolution of the placeholders it writes back.
+"""
+
+import re
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+
+SECRET_PLACEHOLDER_PATTERN = re.compile(r'<secret>(.*?)</secret>')
+
+
+# Deepest nesting of groups in the trie regex, the regex parser recurses per group. Deeper tries, from
+# hundreds of secrets that are prefixes of each other, are matched by a plain alternation instead
+MAX_TRIE_GROUP_DEPTH = 100
+
+
+def _compile_literals(literals: list[str]) -> re.Pattern[str]:
+	"""
+	Compile literals into one regex shaped like a trie of the literals, so the regex engine follows a
+	single path per position (as an Aho-Corasick automaton would) instead of trying every literal.
+	At each position the longest literal wins.
+	"""
+	trie: dict = {}
+	for literal in literals:
+		node = trie
+		for char in literal:
+			node = node.setdefault(char, {})
+		node[''] = {}
+
+	# Built bottom up with an explicit stack, node id -> (pattern, depth of nested groups)
+	patterns: dict[int, tuple[str, int]] = {}
+	stack: list[tuple[dict, bool]] = [(trie, False)]
+	while stack:
+		node, children_done = stack.pop()
+		if not children_done:
+			stack.append((node, True))
+			stack.extend((child, False) for char, child in node.items() if char != '')
+			continue
+
+		alternatives = []
+		depth = 0
+		for char, child in node.items():
+			if char != '':
+				child_pattern, child_depth = patterns.pop(id(child))
+				alternatives.append(re.escape(char) + child_pattern)
+				depth = max(depth, child_depth)
+		body = '|'.join(alternatives)
+		if len(alternatives) > 1:
+			body = '(?:' + body + ')'
+			depth += 1
+		if '' in node and alternatives:
+			# Greedy, so a longer literal is preferred over one that ends here
+			body = '(?:' + body + ')?'
+			depth += 1
+		if depth > MAX_TRIE_GROUP_DEPTH:
+			return re.compile('|'.join(re.escape(literal) for literal in sorted(literals, key=len, reverse=True)))
+		patterns[id(node)] = (body, depth)
+
+	return re.compile(patterns[id(trie)][0])
+
+
+class SensitiveDataRedactor:
+	"""
+	Replaces secret values with <secret>placeholder</secret> tags and back.
+
+	All secret values are compiled into one matcher when the redactor is created, so redacting a
+	message is a single pass over it regardless of the number of secrets.
+	"""
+
+	def __init__(self, sensitive_data: Dict[str, str]):
+		self.sensitive_data = sensitive_data
+
+		# Secret value -> placeholder, the first placeholder wins if several share a value
+		self._placeholders: dict[str, str] = {}
+		for key, value in sensitive_data.items():
+			if value:
+				self._placeholders.setdefault(value, key)
+		self._pattern: Optional[re.Pattern[str]] = _compile_literals(list(self._placeholders)) if self._placeholders else None
+
+	def redact(self, text: str) -> str:
+		"""Replace all secret values in the text with their placeholder tags"""
+		if self._pattern is None:
+			return text
+		return self._pattern.sub(lambda match: f'<secret>{self._placeholders[match.group()]}</secret>', text)
+
+	def resolve(self, text: str) -> str:
+		"""Replace the placeholder tags of known secrets in the text with the secret values"""
+		if '<secret>' not in text:
+			return text
+
+		def replace(match: re.Match[str]) -> str:
+			value = self.sensitive_data.get(match.group(1))
+			return value if value is not None else match.group()
+
+		return SECRET_PLACEHOLDER_PATTERN.sub(replace, text)
+
+	def resolve_params(self, params: BaseModel) -> BaseModel:
+		"""Resolve the placeholder tags in all string values of the params, in place"""
+		for key, value in params.__dict__.items():
+			params.__dict__[key] = self._resolve_value(value)
+		return params
+
+	def _resolve_value(self, value: Any) -> Any:
+		if isinstance(value, str):
+			return self.resolve(value)
+		elif isinstance(value, BaseModel):
+			return self.resolve_params(value)
+		elif isinstance(value, dict):
+			return {k: self._resolve_value(v) for k, v in value.items()}
+		elif isinstance(value, list):
+			return [self._resolve_value(v) for v in value]
+		return value
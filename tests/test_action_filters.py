@@ -4,6 +4,7 @@ import pytest
 from playwright.async_api import Page
 from pydantic import BaseModel
 
+from browser_use.agent.views import AgentOutput
 from browser_use.controller.registry.service import Registry
 from browser_use.controller.registry.views import ActionRegistry, RegisteredAction
 
@@ -303,3 +304,64 @@ class TestActionFilters:
 		assert 'domain_filter_action' in non_matching_page_model.model_fields
 		assert 'page_filter_action' not in non_matching_page_model.model_fields
 		assert 'both_filters_action' not in non_matching_page_model.model_fields
+
+	def test_create_action_model_is_cached_per_action_set(self):
+		"""Test that the same set of applicable actions reuses the same model"""
+		registry = Registry()
+
+		@registry.action(description='No filter action')
+		def no_filter_action():
+			pass
+
+		@registry.action(description='Domain filter action', domains=['example.com'])
+		def domain_filter_action():
+			pass
+
+		mock_page = MagicMock(spec=Page)
+		mock_page.url = 'https://example.com/'
+		page_model = registry.create_action_model(page=mock_page)
+		assert registry.create_action_model(page=mock_page) is page_model
+
+		# A different page with the same applicable actions shares the model
+		mock_page.url = 'https://example.com/other'
+		assert registry.create_action_model(page=mock_page) is page_model
+
+		# A different set of actions gets its own model
+		mock_page.url = 'https://other.com/'
+		other_model = registry.create_action_model(page=mock_page)
+		assert other_model is not page_model
+		assert other_model is registry.create_action_model()
+		assert AgentOutput.type_with_custom_actions(other_model) is AgentOutput.type_with_custom_actions(other_model)
+
+		# Registering an action invalidates the models built so far
+		@registry.action(description='Late action')
+		def late_action():
+			pass
+
+		assert 'late_action' in registry.create_action_model().model_fields
+
+	def test_prompt_description_is_memoized_per_action_set(self):
+		"""Test that descriptions are precomputed and the concatenation is reused"""
+		registry = ActionRegistry()
+		action = RegisteredAction(
+			name='no_filter_action',
+			description='Action with no filters',
+			function=lambda: None,
+			param_model=EmptyParamModel,
+		)
+		assert action.param_schema == EmptyParamModel.model_json_schema()
+		registry.actions['no_filter_action'] = action
+
+		description = registry.get_prompt_description()
+		assert registry.get_prompt_description() == description
+		assert (registry.description_cache_stats.hits, registry.description_cache_stats.misses) == (1, 1)
+
+		# Replacing an action under the same name is not served from the cache
+		registry.actions['no_filter_action'] = RegisteredAction(
+			name='no_filter_action',
+			description='Replaced action',
+			function=lambda: None,
+			param_model=EmptyParamModel,
+		)
+		assert 'Replaced action' in registry.get_prompt_description()
+		assert registry.description_cache_stats.misses == 2
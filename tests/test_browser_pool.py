@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+
+from browser_use.browser.browser import Browser, BrowserConfig
+from browser_use.browser.pool import POOL_ID_SWITCH, BrowserPool, BrowserPoolConfig
+
+
+class FakePlaywrightBrowser:
+	def __init__(self, config):
+		self.config = config
+		self.connected = True
+
+	def is_connected(self):
+		return self.connected
+
+
+@pytest.fixture
+def launched(monkeypatch):
+	"""Playwright browsers launched by pooled Browser instances, in launch order"""
+	browsers = []
+
+	async def init(self):
+		self.playwright_browser = FakePlaywrightBrowser(self.config)
+		browsers.append(self.playwright_browser)
+		return self.playwright_browser
+
+	async def close(self):
+		self.playwright_browser.connected = False
+
+	monkeypatch.setattr(Browser, '_init', init)
+	monkeypatch.setattr(Browser, 'close', close)
+	return browsers
+
+
+async def settle(pool):
+	"""Wait for the browsers being replaced in the background"""
+	while pool._replacements:
+		await asyncio.gather(*pool._replacements)
+
+
+class TestBrowserPool:
+	def test_rejects_existing_browsers(self):
+		with pytest.raises(ValueError):
+			BrowserPool(BrowserPoolConfig(browser_config=BrowserConfig(cdp_url='http://localhost:9222')))
+
+	@pytest.mark.asyncio
+	async def test_leases_contexts_from_the_least_busy_browser(self, launched):
+		pool = BrowserPool(BrowserPoolConfig(size=2, max_contexts_per_browser=1, health_check_interval=0))
+
+		first = await pool.new_context()
+		second = await pool.new_context()
+		assert len(launched) == 2
+		assert {first.browser.playwright_browser, second.browser.playwright_browser} == set(launched)
+		# Each browser is tagged so its processes can be found for the memory check
+		assert any(arg.startswith(POOL_ID_SWITCH) for arg in launched[0].config.extra_browser_args)
+
+		# Both browsers are at their limit until a context is closed
+		waiting = asyncio.create_task(pool.new_context())
+		await asyncio.sleep(0.01)
+		assert not waiting.done()
+		await first.close()
+		third = await asyncio.wait_for(waiting, 1)
+		assert third.browser is first.browser
+
+		await pool.close()
+		with pytest.raises(RuntimeError):
+			await pool.new_context()
+
+	@pytest.mark.asyncio
+	async def test_recycles_browsers_after_a_number_of_contexts(self, launched):
+		pool = BrowserPool(BrowserPoolConfig(size=1, recycle_after_contexts=2, health_check_interval=0))
+
+		async with pool.lease():
+			pass
+		async with pool.lease() as context:
+			await settle(pool)
+			# Retiring, but not replaced while in use
+			assert len(launched) == 1 and pool.browsers[0].retiring
+		await settle(pool)
+
+		assert len(launched) == 2 and not launched[0].connected
+		assert pool.browsers[0].browser.playwright_browser is launched[1]
+		assert context.browser.playwright_browser is launched[0]
+		await pool.close()
+
+	@pytest.mark.asyncio
+	async def test_replaces_crashed_and_oversized_browsers(self, launched):
+		pool = BrowserPool(BrowserPoolConfig(size=2, max_memory_mb=500, health_check_interval=0))
+		await pool.start()
+		crashed, oversized = pool.browsers
+		crashed.browser.playwright_browser.connected = False
+		oversized.memory_mb = lambda: 800.0
+
+		await pool.check_health()
+		await settle(pool)
+
+		assert crashed not in pool.browsers and oversized not in pool.browsers
+		assert len(pool.browsers) == 2 and len(launched) == 4
+		await pool.close()
+
+	@pytest.mark.asyncio
+	async def test_keeps_the_browsers_that_launched_when_others_fail(self, launched, monkeypatch):
+		launch = Browser._init
+		failures = []
+
+		async def flaky_init(self):
+			if failures:
+				raise RuntimeError(failures.pop())
+			return await launch(self)
+
+		monkeypatch.setattr(Browser, '_init', flaky_init)
+		pool = BrowserPool(BrowserPoolConfig(size=2, health_check_interval=0))
+
+		# Nothing launched: the start fails and is tried again by the next lease
+		failures[:] = ['no browser', 'no browser']
+		with pytest.raises(RuntimeError):
+			await pool.start()
+		assert not launched
+
+		failures[:] = ['no browser']
+		context = await pool.new_context()
+		assert len(pool.browsers) == 1 and context.browser.playwright_browser is launched[0]
+
+		# The health check launches the missing browser
+		await pool.check_health()
+		await settle(pool)
+		assert len(pool.browsers) == 2 and len(launched) == 2
+		await pool.close()
@@ -1,5 +1,6 @@
+import asyncio
 import base64
-from unittest.mock import Mock
+from unittest.mock import AsyncMock, Mock
 
 import pytest
 
@@ -44,6 +45,23 @@ def test_is_url_allowed():
 	assert context2._is_url_allowed('notaurl') is False
 
 
+def test_is_url_allowed_follows_changed_allowed_domains():
+	"""
+	Test that changes to config.allowed_domains after the first check are picked up.
+	"""
+	dummy_browser = Mock()
+	dummy_browser.config = Mock()
+	context = BrowserContext(browser=dummy_browser, config=BrowserContextConfig(allowed_domains=['example.com']))
+	assert context._is_url_allowed('https://example.com') is True
+	assert context._is_url_allowed('https://mysite.org') is False
+
+	context.config.allowed_domains.append('mysite.org')
+	assert context._is_url_allowed('https://mysite.org') is True
+
+	context.config.allowed_domains = ['mysite.org']
+	assert context._is_url_allowed('https://example.com') is False
+
+
 def test_convert_simple_xpath_to_css_selector():
 	"""
 	Test the _convert_simple_xpath_to_css_selector method of BrowserContext.
@@ -360,3 +378,227 @@ async def test_remove_highlights_failure():
 		await context.remove_highlights()
 	except Exception as e:
 		pytest.fail(f'remove_highlights raised an exception: {e}')
+
+
+@pytest.mark.asyncio
+async def test_update_state_concurrent_capture():
+	"""
+	Test that in concurrent mode tab info is collected while the page is captured, the screenshot
+	is only taken once the DOM (and its highlights) is done, and timings are reported per phase.
+	"""
+	import asyncio
+
+	from browser_use.dom.views import DOMState, PageInfo
+
+	events = []
+
+	async def capture_page_state(page, focus_element=-1):
+		events.append('dom start')
+		await asyncio.sleep(0.05)
+		events.append('dom end')
+		root = DOMElementNode(tag_name='body', xpath='', attributes={}, children=[], is_visible=True, parent=None)
+		return DOMState(element_tree=root, selector_map={}), PageInfo(
+			title='Test', scroll_y=0, viewport_height=800, scroll_height=1000
+		)
+
+	async def get_tabs_info():
+		events.append('tabs start')
+		await asyncio.sleep(0.05)
+		events.append('tabs end')
+		return []
+
+	async def take_screenshot():
+		events.append('screenshot')
+		return 'c2NyZWVu'
+
+	async def get_current_page():
+		return Mock(url='https://example.com')
+
+	dummy_browser = Mock()
+	dummy_browser.config = Mock()
+	context = BrowserContext(browser=dummy_browser, config=BrowserContextConfig(concurrent_state_capture=True))
+	context.session = Mock()
+	context.get_current_page = get_current_page
+	context._capture_page_state = capture_page_state
+	context.get_tabs_info = get_tabs_info
+	context.take_screenshot = take_screenshot
+
+	state = await context._update_state()
+
+	assert events.index('tabs start') < events.index('dom end')
+	assert events.index('screenshot') > events.index('dom end')
+	assert state.title == 'Test' and state.pixels_below == 200
+	assert set(state.timings) == {'dom', 'tabs', 'screenshot', 'total'}
+	assert state.timings['total'] < state.timings['dom'] + state.timings['tabs']
+	context.session = None
+
+
+@pytest.mark.asyncio
+async def test_update_state_retries_failed_capture_on_same_page():
+	"""
+	Test that a failed extraction on a page that is still open is retried on that page instead of
+	switching to another tab.
+	"""
+	from browser_use.dom.views import DOMState, PageInfo
+
+	page = Mock(url='https://example.com')
+	page.is_closed.return_value = False
+	captured_pages = []
+
+	async def capture_page_state(captured_page, focus_element=-1):
+		captured_pages.append(captured_page)
+		if len(captured_pages) == 1:
+			raise TimeoutError('buildDomTree timed out')
+		root = DOMElementNode(tag_name='body', xpath='', attributes={}, children=[], is_visible=True, parent=None)
+		return DOMState(element_tree=root, selector_map={}), PageInfo(
+			title='Test', scroll_y=0, viewport_height=800, scroll_height=800
+		)
+
+	async def get_current_page():
+		return page
+
+	async def switch_page(session):
+		raise AssertionError('switched tabs although the page is still open')
+
+	async def get_tabs_info():
+		return []
+
+	async def take_screenshot():
+		return 'c2NyZWVu'
+
+	dummy_browser = Mock()
+	dummy_browser.config = Mock()
+	context = BrowserContext(browser=dummy_browser, config=BrowserContextConfig())
+	context.session = Mock()
+	context.state.target_id = 'target'
+	context.get_current_page = get_current_page
+	context._get_current_page = switch_page
+	context._capture_page_state = capture_page_state
+	context.get_tabs_info = get_tabs_info
+	context.take_screenshot = take_screenshot
+
+	state = await context._update_state()
+
+	assert captured_pages == [page, page]
+	assert state.title == 'Test'
+	assert context.state.target_id == 'target'
+	context.session = None
+
+
+@pytest.mark.asyncio
+async def test_screencast_frame_of_the_highlight_repaint_is_fresh():
+	"""
+	Test that a screencast frame of the repaint caused by drawing the highlights, which can arrive
+	while the capture is still running, is used without waiting for another frame.
+	"""
+	import time
+
+	from browser_use.browser.screencast import SCREENCAST_FRAME_TIMEOUT, PageScreencast, ScreencastFrame
+	from browser_use.dom.views import DOMState, PageInfo
+
+	page = Mock(url='https://example.com', bring_to_front=AsyncMock(), wait_for_load_state=AsyncMock())
+	page.is_closed.return_value = False
+	screencast = PageScreencast(page)
+	screencast.frames.append(ScreencastFrame(data='before', received_at=time.monotonic()))
+
+	async def capture_page_state(captured_page, focus_element=-1):
+		await asyncio.sleep(0.01)
+		screencast.frames.append(ScreencastFrame(data='repaint', received_at=time.monotonic()))
+		await asyncio.sleep(0.01)
+		button = DOMElementNode(tag_name='button', xpath='button', attributes={}, children=[], is_visible=True, parent=None)
+		root = DOMElementNode(tag_name='body', xpath='', attributes={}, children=[button], is_visible=True, parent=None)
+		return DOMState(element_tree=root, selector_map={0: button}), PageInfo(
+			title='Test', scroll_y=0, viewport_height=800, scroll_height=800
+		)
+
+	async def get_current_page():
+		return page
+
+	async def get_screencast(screencast_page):
+		return screencast
+
+	async def get_tabs_info():
+		return []
+
+	dummy_browser = Mock()
+	dummy_browser.config = Mock()
+	context = BrowserContext(browser=dummy_browser, config=BrowserContextConfig(screenshot_source='screencast'))
+	context.session = Mock()
+	# The page was already shown in an earlier step
+	context._screencast_page = page
+	context.get_current_page = get_current_page
+	context._get_screencast = get_screencast
+	context._capture_page_state = capture_page_state
+	context.get_tabs_info = get_tabs_info
+
+	start = time.perf_counter()
+	state = await context._update_state()
+
+	assert state.screenshot == 'repaint'
+	assert time.perf_counter() - start < SCREENCAST_FRAME_TIMEOUT
+	context.session = None
+
+
+@pytest.mark.asyncio
+async def test_get_tabs_info_concurrent_with_cached_titles(monkeypatch):
+	"""
+	Test that tab titles are fetched concurrently under one shared deadline, follow title changes
+	without navigation, and fall back to the cached title when a tab stops answering.
+	"""
+	import asyncio
+	import time
+
+	import browser_use.browser.context as context_module
+
+	monkeypatch.setattr(context_module, 'TAB_TITLE_TIMEOUT', 0.2)
+
+	class DummyPage:
+		def __init__(self, url, title, hangs=False):
+			self.url = url
+			self._title = title
+			self.hangs = hangs
+			self.title_calls = 0
+			self.handlers = {}
+			self.main_frame = object()
+
+		async def title(self):
+			self.title_calls += 1
+			if self.hangs:
+				await asyncio.sleep(10)
+			return self._title
+
+		def on(self, event, handler):
+			self.handlers[event] = handler
+
+	pages = [DummyPage(f'https://site{i}.com', f'Site {i}', hangs=i in (1, 2)) for i in range(4)]
+	dummy_browser = Mock()
+	dummy_browser.config = Mock()
+	context = BrowserContext(browser=dummy_browser, config=BrowserContextConfig())
+	context.session = Mock()
+	context.session.context.pages = pages
+
+	start = time.perf_counter()
+	tabs = await context.get_tabs_info()
+	assert time.perf_counter() - start < 0.4, 'hung tabs should share one deadline'
+	assert [tab.title for tab in tabs] == [
+		'Site 0',
+		'ignore this tab and do not use it',
+		'ignore this tab and do not use it',
+		'Site 3',
+	]
+
+	# document.title changed by a single page app, without a navigation
+	pages[0]._title = 'Site 0 - 3 unread'
+	tabs = await context.get_tabs_info()
+	assert tabs[0].title == 'Site 0 - 3 unread'
+
+	# A tab that stops answering keeps its last known title
+	pages[3].hangs = True
+	tabs = await context.get_tabs_info()
+	assert tabs[3].title == 'Site 3'
+
+	# Unless it navigated since
+	await pages[3].handlers['framenavigated'](pages[3].main_frame)
+	tabs = await context.get_tabs_info()
+	assert tabs[3].title == 'ignore this tab and do not use it'
+	context.session = None
@@ -0,0 +1,162 @@
+import pytest
+
+from browser_use.browser import browser as browser_module
+from browser_use.browser.browser import Browser, BrowserConfig
+from browser_use.browser.context import BrowserContext, BrowserContextConfig
+from browser_use.browser.context_pool import BrowserContextPool
+
+
+class FakeRequest:
+	def __init__(self, url, resource_type='document'):
+		self.url = url
+		self.resource_type = resource_type
+
+
+class FakePage:
+	def __init__(self, context):
+		self.context = context
+		self.url = 'about:blank'
+		self.closed = False
+
+	def is_closed(self):
+		return self.closed
+
+	async def close(self):
+		self.closed = True
+		self.context.pages.remove(self)
+
+	async def goto(self, url):
+		self.url = url
+
+	async def bring_to_front(self):
+		pass
+
+	async def wait_for_load_state(self, state='load'):
+		pass
+
+
+class FakeCDPSession:
+	def __init__(self, sent):
+		self.sent = sent
+
+	async def send(self, method, params=None):
+		self.sent.append((method, params))
+
+	async def detach(self):
+		pass
+
+
+class FakePlaywrightContext:
+	browser = None
+
+	def __init__(self):
+		self.pages = []
+		self.handlers = {}
+		self.cdp_commands = []
+		self.cookies_cleared = False
+		self.permissions_cleared = False
+		self.closed = False
+
+	async def new_page(self):
+		page = FakePage(self)
+		self.pages.append(page)
+		return page
+
+	def on(self, event, handler):
+		self.handlers[event] = handler
+
+	async def add_init_script(self, script):
+		pass
+
+	async def clear_cookies(self):
+		self.cookies_cleared = True
+
+	async def clear_permissions(self):
+		self.permissions_cleared = True
+
+	async def new_cdp_session(self, page):
+		return FakeCDPSession(self.cdp_commands)
+
+	async def close(self):
+		self.closed = True
+
+
+class FakePlaywrightBrowser:
+	def __init__(self):
+		self.contexts = []
+
+	async def new_context(self, **kwargs):
+		context = FakePlaywrightContext()
+		self.contexts.append(context)
+		return context
+
+	async def close(self):
+		pass
+
+
+@pytest.fixture
+def fake_playwright(monkeypatch):
+	playwright_browser = FakePlaywrightBrowser()
+
+	class FakePlaywright:
+		async def start(self):
+			return self
+
+		async def stop(self):
+			pass
+
+	async def setup_browser(self, playwright):
+		return playwright_browser
+
+	monkeypatch.setattr(browser_module, 'async_playwright', FakePlaywright)
+	monkeypatch.setattr(Browser, '_setup_browser', setup_browser)
+	return playwright_browser
+
+
+class TestBrowserContextPool:
+	@pytest.mark.asyncio
+	async def test_release_wipes_the_context_for_reuse(self, fake_playwright):
+		browser = Browser(BrowserConfig())
+		await browser.get_playwright_browser()
+		pool = BrowserContextPool(browser, BrowserContextConfig(), size=1)
+
+		warm = await pool._create()
+		first_page = warm.page
+		warm.context.handlers['request'](FakeRequest('https://example.com/login'))
+		warm.context.handlers['request'](FakeRequest('https://cdn.example.net/app.js', resource_type='script'))
+
+		await pool.release(warm)
+
+		assert first_page.closed and warm.context.pages == [warm.page]
+		assert warm.context.cookies_cleared and warm.context.permissions_cleared
+		assert warm.context.cdp_commands == [
+			('Network.clearBrowserCache', None),
+			('Storage.clearDataForOrigin', {'origin': 'https://example.com', 'storageTypes': 'all'}),
+		]
+		assert not warm.origins
+		assert await pool.acquire() is warm
+		await pool.close()
+
+	@pytest.mark.asyncio
+	async def test_browser_contexts_take_pooled_contexts(self, fake_playwright):
+		browser = Browser(BrowserConfig(context_pool_size=1))
+		context = await browser.new_context()
+
+		session = await context.get_session()
+
+		# The context was created by the pool, which is refilled in the background
+		assert session.context is fake_playwright.contexts[0]
+		assert context.active_tab is session.context.pages[0]
+		await browser._context_pool._refill_task
+		assert len(fake_playwright.contexts) == 2
+
+		# The pool is full again, so the returned context is closed instead of kept
+		await context.close()
+		assert fake_playwright.contexts[0].closed
+
+		# Other configs create their own context
+		other = BrowserContext(browser=browser, config=BrowserContextConfig(user_agent='other'))
+		assert (await other.get_session()).context is fake_playwright.contexts[2]
+
+		await browser.close()
+		assert fake_playwright.contexts[1].closed
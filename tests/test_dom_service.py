@@ -0,0 +1,420 @@
+import asyncio
+import gc
+import time
+import weakref
+from unittest.mock import MagicMock
+
+import pytest
+
+from browser_use.dom.service import BUILD_DOM_TREE_FUNCTION, CALL_BUILD_DOM_TREE_JS, DomService
+from browser_use.dom.views import EMPTY_ATTRIBUTES, DOMElementNode, DOMTextNode, HighlightBox
+
+
+def full_snapshot():
+	return {
+		'rootId': '0',
+		'generation': 'doc:0',
+		'isPatch': False,
+		'removedIds': [],
+		'map': {
+			'0': {'tagName': 'body', 'attributes': {}, 'xpath': '/body', 'children': ['1', '3']},
+			'1': {
+				'tagName': 'button',
+				'attributes': {'id': 'ok'},
+				'xpath': 'html/body/button',
+				'children': ['2'],
+				'isVisible': True,
+				'isTopElement': True,
+				'isInteractive': True,
+				'isInViewport': True,
+				'highlightIndex': 0,
+			},
+			'2': {'type': 'TEXT_NODE', 'text': 'OK', 'isVisible': True},
+			'3': {
+				'tagName': 'a',
+				'attributes': {'href': '/next'},
+				'xpath': 'html/body/a',
+				'children': [],
+				'isVisible': True,
+				'isTopElement': True,
+				'isInteractive': True,
+				'isInViewport': True,
+				'highlightIndex': 1,
+			},
+		},
+	}
+
+
+class TestIncrementalSnapshots:
+	@pytest.fixture
+	def dom_service(self):
+		return DomService(MagicMock())
+
+	@pytest.mark.asyncio
+	async def test_full_snapshot_with_non_post_ordered_ids(self, dom_service):
+		"""Stable ids are not post-ordered, children must still be linked"""
+		root, selector_map = await dom_service._construct_dom_tree(dom_service._apply_incremental_snapshot(full_snapshot()))
+
+		assert root.tag_name == 'body'
+		assert [child.tag_name for child in root.children] == ['button', 'a']
+		assert isinstance(root.children[0].children[0], DOMTextNode)
+		assert root.children[0].parent is root
+		assert sorted(selector_map) == [0, 1]
+		assert dom_service._generation == 'doc:0'
+
+	@pytest.mark.asyncio
+	async def test_patch_replaces_changed_and_removed_nodes(self, dom_service):
+		dom_service._apply_incremental_snapshot(full_snapshot())
+		patch = {
+			'rootId': '0',
+			'generation': 'doc:1',
+			'isPatch': True,
+			'removedIds': ['1', '2'],
+			'map': {
+				'0': {'tagName': 'body', 'attributes': {}, 'xpath': '/body', 'children': ['3', '4']},
+				'3': {**full_snapshot()['map']['3'], 'highlightIndex': 0},
+				'4': {'type': 'TEXT_NODE', 'text': 'Done', 'isVisible': True},
+			},
+		}
+
+		root, selector_map = await dom_service._construct_dom_tree(dom_service._apply_incremental_snapshot(patch))
+
+		assert [type(child) for child in root.children] == [DOMElementNode, DOMTextNode]
+		assert list(selector_map) == [0]
+		assert selector_map[0].attributes == {'href': '/next'}
+		assert set(dom_service._js_node_map) == {'0', '3', '4'}
+		assert dom_service._generation == 'doc:1'
+
+	@pytest.mark.asyncio
+	async def test_full_snapshot_resets_stored_map(self, dom_service):
+		dom_service._js_node_map = {'42': {'type': 'TEXT_NODE', 'text': 'stale', 'isVisible': True}}
+
+		dom_service._apply_incremental_snapshot(full_snapshot())
+
+		assert '42' not in dom_service._js_node_map
+
+
+class TestColumnarPayload:
+	# Output of encodeColumnar in buildDomTree.js for the keyed map used below
+	COLUMNS = {
+		'strings': ['body', '/body', 'button', 'html/body/button', 'id', 'ok', 'OK', 'a', 'html/body/a', 'href', '/x'],
+		'flags': [0, 15, 33, 1],
+		'parent': [-1, 0, 1, 0],
+		'tag': [0, 2, -1, 7],
+		'xpath': [1, 3, -1, 8],
+		'text': [-1, -1, 6, -1],
+		'highlight': [-1, 0, -1, -1],
+		'attrOffsets': [0, 0, 1, 1, 3],
+		'attrNames': [4, 9, 4],
+		'attrValues': [5, 10, 5],
+	}
+	MAP = {
+		'0': {'type': 'TEXT_NODE', 'text': 'OK', 'isVisible': True},
+		'1': {
+			'tagName': 'button',
+			'attributes': {'id': 'ok'},
+			'xpath': 'html/body/button',
+			'children': ['0'],
+			'isVisible': True,
+			'isTopElement': True,
+			'isInteractive': True,
+			'isInViewport': True,
+			'highlightIndex': 0,
+		},
+		'2': {
+			'tagName': 'a',
+			'attributes': {'href': '/x', 'id': 'ok'},
+			'xpath': 'html/body/a',
+			'children': [],
+			'isVisible': True,
+		},
+		'3': {'tagName': 'body', 'attributes': {}, 'xpath': '/body', 'children': ['1', '2']},
+	}
+
+	@pytest.mark.asyncio
+	async def test_columnar_matches_keyed_map(self):
+		dom_service = DomService(MagicMock())
+
+		columnar_root, columnar_map = await dom_service._construct_dom_tree({'rootId': '3', 'columns': self.COLUMNS})
+		keyed_root, keyed_map = await dom_service._construct_dom_tree({'rootId': '3', 'map': self.MAP})
+
+		assert columnar_root.clickable_elements_to_string() == keyed_root.clickable_elements_to_string()
+		assert [child.tag_name for child in columnar_root.children] == ['button', 'a']
+		assert columnar_root.children[1].attributes == {'href': '/x', 'id': 'ok'}
+		assert columnar_root.children[0].children[0].parent is columnar_root.children[0]
+		assert columnar_map[0].hash == keyed_map[0].hash
+		assert columnar_map[0].is_top_element and columnar_map[0].is_in_viewport
+
+
+class TestCompactNodes:
+	@pytest.mark.asyncio
+	async def test_nodes_are_slotted_and_share_empty_attributes(self):
+		dom_service = DomService(MagicMock())
+		root, selector_map = await dom_service._construct_dom_tree(dom_service._apply_incremental_snapshot(full_snapshot()))
+
+		assert not hasattr(root, '__dict__')
+		assert not hasattr(root.children[0].children[0], '__dict__')
+		assert root.attributes is EMPTY_ATTRIBUTES
+		assert selector_map[0].hash is selector_map[0].hash
+
+
+def synthetic_page(depth: int, breadth: int) -> dict:
+	"""Keyed payload of a page where every element has `breadth` children, nested `depth` levels"""
+	node_map = {}
+
+	def add(level: int, xpath: str) -> str:
+		if level == depth:
+			children = []
+			node_id = str(len(node_map))
+			node_map[node_id] = {'type': 'TEXT_NODE', 'text': f'text {node_id}', 'isVisible': True}
+			children.append(node_id)
+		else:
+			children = [add(level + 1, f'{xpath}/div[{i + 1}]') for i in range(breadth)]
+
+		node_id = str(len(node_map))
+		node_map[node_id] = {
+			'tagName': 'div',
+			'attributes': {'class': 'item'} if level % 2 else {},
+			'xpath': xpath,
+			'children': children,
+			'isVisible': True,
+			'isTopElement': True,
+			'isInteractive': level == depth,
+		}
+		return node_id
+
+	root_id = add(0, 'html/body')
+	highlight_index = 0
+	for node_data in node_map.values():
+		if node_data.get('isInteractive'):
+			node_data['highlightIndex'] = highlight_index
+			highlight_index += 1
+	return {'rootId': root_id, 'map': node_map}
+
+
+class TestTreeLifecycle:
+	@pytest.mark.asyncio
+	async def test_dropped_tree_is_freed_without_gc(self):
+		dom_service = DomService(MagicMock())
+		gc.disable()
+		try:
+			root, selector_map = await dom_service._construct_dom_tree(synthetic_page(depth=3, breadth=3))
+			leaf = weakref.ref(selector_map[0].children[0])
+			assert leaf().parent is selector_map[0]
+
+			del root, selector_map
+			assert leaf() is None
+		finally:
+			gc.enable()
+
+	@pytest.mark.asyncio
+	async def test_many_agents_rebuild_trees_without_forced_gc(self, monkeypatch):
+		"""30 agents in one process each rebuild their tree every step and drop the previous one"""
+		page = synthetic_page(depth=5, breadth=4)
+		forced_collections = []
+		monkeypatch.setattr(gc, 'collect', lambda *args: forced_collections.append(args) or 0)
+
+		async def agent():
+			dom_service = DomService(MagicMock())
+			state = previous_leaf = None
+			for _ in range(3):
+				state = await dom_service._construct_dom_tree(page)
+				# The tree of the previous step is freed as soon as it is replaced
+				assert previous_leaf is None or previous_leaf() is None
+				previous_leaf = weakref.ref(state[1][0].children[0])
+				await asyncio.sleep(0)
+			return state
+
+		states = await asyncio.gather(*(agent() for _ in range(30)))
+
+		assert not forced_collections
+		assert len(states) == 30
+		assert all(len(selector_map) == 4**5 for _, selector_map in states)
+
+
+def legacy_clickable_elements_to_string(root: DOMElementNode, include_attributes: list[str] | None = None) -> str:
+	"""The previous implementation: one upward walk per text node and one subtree walk per highlighted element"""
+	formatted_text = []
+
+	def process_node(node, depth: int) -> None:
+		if isinstance(node, DOMElementNode):
+			if node.highlight_index is not None:
+				attributes_str = ''
+				text = node.get_all_text_till_next_clickable_element()
+				if include_attributes:
+					attributes = list(
+						set(
+							[
+								str(value)
+								for key, value in node.attributes.items()
+								if key in include_attributes and value != node.tag_name
+							]
+						)
+					)
+					if text in attributes:
+						attributes.remove(text)
+					attributes_str = ';'.join(attributes)
+				line = f'[{node.highlight_index}]<{node.tag_name} '
+				if attributes_str:
+					line += f'{attributes_str}'
+				if text:
+					if attributes_str:
+						line += f'>{text}'
+					else:
+						line += f'{text}'
+				line += '/>'
+				formatted_text.append(line)
+
+			for child in node.children:
+				process_node(child, depth + 1)
+
+		elif isinstance(node, DOMTextNode):
+			if not node.has_parent_with_highlight_index() and node.is_visible:
+				formatted_text.append(f'{node.text}')
+
+	process_node(root, 0)
+	return '\n'.join(formatted_text)
+
+
+def deep_page(depth: int, breadth: int, clickable_every: int = 5) -> DOMElementNode:
+	"""A chain of `depth` nested sections, each with `breadth` buttons and loose text, every `clickable_every` section clickable"""
+	root = DOMElementNode(is_visible=True, parent=None, tag_name='body', xpath='/body', attributes={}, children=[])
+	highlight_index = 0
+	current = root
+	for level in range(depth):
+		section = DOMElementNode(
+			is_visible=True,
+			parent=current,
+			tag_name='section',
+			xpath=f'{current.xpath}/section',
+			attributes={'role': 'region', 'title': f'section {level}'},
+			children=[],
+			highlight_index=highlight_index if level % clickable_every == 0 else None,
+		)
+		if section.highlight_index is not None:
+			highlight_index += 1
+		current.children.append(section)
+		section.children.append(DOMTextNode(is_visible=level % 7 != 0, parent=section, text=f'text {level}'))
+		for i in range(breadth):
+			button = DOMElementNode(
+				is_visible=True,
+				parent=section,
+				tag_name='button',
+				xpath=f'{section.xpath}/button[{i + 1}]',
+				attributes={'type': 'button', 'aria-label': f'button {level}.{i}'},
+				children=[],
+				highlight_index=highlight_index,
+			)
+			highlight_index += 1
+			button.children.append(DOMTextNode(is_visible=True, parent=button, text=f'click {level}.{i}'))
+			section.children.append(button)
+		current = section
+	return root
+
+
+class TestClickableElementsToString:
+	@pytest.mark.parametrize('include_attributes', [None, ['title', 'type', 'aria-label']])
+	def test_matches_previous_implementation(self, include_attributes):
+		root = deep_page(depth=60, breadth=3)
+
+		assert root.clickable_elements_to_string(include_attributes) == legacy_clickable_elements_to_string(
+			root, include_attributes
+		)
+		# Starting below a highlighted element hides loose text just like before
+		subtree = root.children[0].children[1]
+		assert subtree.clickable_elements_to_string() == legacy_clickable_elements_to_string(subtree)
+
+	def test_matches_previous_implementation_on_deep_page(self):
+		# Only the outermost section is clickable, so every text node used to walk up to it
+		root = deep_page(depth=400, breadth=5, clickable_every=400)
+		include_attributes = ['title', 'type', 'aria-label']
+
+		assert root.clickable_elements_to_string(include_attributes) == legacy_clickable_elements_to_string(
+			root, include_attributes
+		)
+
+	@pytest.mark.slow
+	def test_benchmark_deep_page_is_not_slower(self):
+		root = deep_page(depth=400, breadth=5, clickable_every=400)
+		include_attributes = ['title', 'type', 'aria-label']
+
+		def best_time(function) -> float:
+			timings = []
+			for _ in range(3):
+				start = time.perf_counter()
+				function()
+				timings.append(time.perf_counter() - start)
+			return min(timings)
+
+		legacy_time = best_time(lambda: legacy_clickable_elements_to_string(root, include_attributes))
+		current_time = best_time(lambda: root.clickable_elements_to_string(include_attributes))
+
+		# The previous implementation walks up to the clickable ancestor from every text node
+		assert current_time <= legacy_time
+
+
+class TestInstalledExtractor:
+	@pytest.mark.asyncio
+	async def test_extractor_is_called_by_name_and_installed_once(self):
+		installed = False
+		sent_scripts = []
+
+		async def evaluate(script, args=None):
+			nonlocal installed
+			sent_scripts.append(script)
+			if script == '1+1':
+				return 2
+			if script == CALL_BUILD_DOM_TREE_JS:
+				return full_snapshot() if installed else None
+			installed = True
+
+		page = MagicMock(url='https://example.com')
+		page.evaluate = evaluate
+		dom_service = DomService(page)
+
+		await dom_service.get_clickable_elements()
+		await dom_service.get_clickable_elements()
+
+		assert sum(BUILD_DOM_TREE_FUNCTION + ' =' in script for script in sent_scripts) == 1
+		assert dom_service.js_code not in sent_scripts
+		assert sent_scripts[-1] == CALL_BUILD_DOM_TREE_JS
+
+	@pytest.mark.asyncio
+	async def test_capture_page_state_is_a_single_evaluation(self):
+		calls = []
+
+		async def evaluate(script, args=None):
+			calls.append((script, args))
+			page_info = {'title': 'Example', 'scrollY': 100, 'viewportHeight': 800, 'scrollHeight': 2000}
+			return {**full_snapshot(), 'pageInfo': page_info}
+
+		page = MagicMock(url='https://example.com')
+		page.evaluate = evaluate
+		dom_service = DomService(page)
+
+		dom_state, page_info = await dom_service.capture_page_state()
+
+		assert len(calls) == 1
+		assert calls[0][1]['removeHighlights'] and calls[0][1]['includePageInfo']
+		assert len(dom_state.selector_map) == 2
+		assert (page_info.title, page_info.pixels_above, page_info.pixels_below) == ('Example', 100, 1100)
+
+	@pytest.mark.asyncio
+	async def test_capture_page_state_returns_highlight_boxes(self):
+		calls = []
+
+		async def evaluate(script, args=None):
+			calls.append(args)
+			page_info = {'title': '', 'scrollY': 0, 'viewportWidth': 1280, 'viewportHeight': 800, 'scrollHeight': 800}
+			highlights = [{'index': 0, 'x': 1.5, 'y': 2, 'width': 30, 'height': 10}]
+			return {**full_snapshot(), 'pageInfo': page_info, 'highlights': highlights}
+
+		page = MagicMock(url='https://example.com')
+		page.evaluate = evaluate
+		dom_service = DomService(page)
+
+		dom_state, page_info = await dom_service.capture_page_state(highlight_boxes=True)
+
+		assert calls[0]['highlightBoxes']
+		assert dom_state.highlight_boxes == [HighlightBox(index=0, x=1.5, y=2, width=30, height=10)]
+		assert page_info.viewport_width == 1280
@@ -0,0 +1,48 @@
+import fnmatch
+
+from browser_use.browser.domains import DomainMatcher
+
+HOSTS = [
+	'google.com',
+	'www.google.com',
+	'mail.eu.google.com',
+	'notgoogle.com',
+	'www.bing.com',
+	'bing.com',
+	'yahoo.co.uk',
+	'yahoo.com',
+	'search.yahoo.com',
+	'example.org',
+]
+
+PATTERNS = ['*.google.com', 'www.bing.com', 'yahoo.*', 'ex?mple.org']
+
+
+class TestDomainMatcher:
+	def test_globs_match_like_fnmatch(self):
+		matcher = DomainMatcher.from_globs(PATTERNS)
+		for host in HOSTS:
+			expected = any(fnmatch.fnmatch(host, pattern) for pattern in PATTERNS)
+			assert matcher.matches(f'https://{host}:443/path') is expected, host
+
+	def test_allowed_domains_include_subdomains(self):
+		matcher = DomainMatcher.from_allowed_domains(['Example.com', 'mysite.org'])
+		assert matcher.matches('http://example.com')
+		assert matcher.matches('http://deep.sub.example.com/path')
+		assert matcher.matches('https://MYSITE.org:8080/page')
+		assert not matcher.matches('http://notexample.com')
+		assert not matcher.matches('http://com')
+		assert not matcher.matches('notaurl')
+
+	def test_results_are_cached_per_url(self):
+		matcher = DomainMatcher.from_globs(['*.google.com'])
+		assert matcher.matches('https://www.google.com/')
+		# Cached results survive even if the patterns are gone
+		matcher._root.children.clear()
+		assert matcher.matches('https://www.google.com/')
+		assert not matcher.matches('https://www.google.com/other')
+
+	def test_many_patterns(self):
+		matcher = DomainMatcher.from_allowed_domains(f'tenant{i}.example.com' for i in range(5000))
+		assert matcher.matches('https://app.tenant4999.example.com/')
+		assert not matcher.matches('https://tenant5000.example.com/')
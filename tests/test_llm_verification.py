@@ -0,0 +1,61 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from pydantic import SecretStr
+
+from browser_use.agent.llm_verification import LLMVerificationCache, get_llm_verification_key
+
+
+class FakeChatModel:
+	def __init__(self, model_name='gpt-4o', api_key='sk-one', base_url=None):
+		self.model_name = model_name
+		self.openai_api_key = SecretStr(api_key)
+		self.openai_api_base = base_url
+
+
+class TestLLMVerificationCache:
+	def test_key_fingerprints_api_key(self):
+		key = get_llm_verification_key(FakeChatModel())
+		assert key == get_llm_verification_key(FakeChatModel())
+		assert 'sk-one' not in ''.join(key)
+		assert key != get_llm_verification_key(FakeChatModel(api_key='sk-two'))
+		assert key != get_llm_verification_key(FakeChatModel(model_name='gpt-4o-mini'))
+		assert key != get_llm_verification_key(FakeChatModel(base_url='http://localhost:8000/v1'))
+
+	@pytest.mark.asyncio
+	async def test_concurrent_verifications_share_one_probe(self):
+		cache = LLMVerificationCache(ttl=60)
+		key = get_llm_verification_key(FakeChatModel())
+
+		async def slow_probe():
+			await asyncio.sleep(0.05)
+			return True
+
+		probe = AsyncMock(side_effect=slow_probe)
+		results = await asyncio.gather(*(cache.verify(key, probe) for _ in range(50)))
+		assert all(results)
+		assert probe.await_count == 1
+
+		# Cached afterwards
+		assert await cache.verify(key, probe)
+		assert probe.await_count == 1
+
+	@pytest.mark.asyncio
+	async def test_failures_are_not_cached_and_entries_expire(self):
+		cache = LLMVerificationCache(ttl=60)
+		key = get_llm_verification_key(FakeChatModel())
+
+		failing = AsyncMock(side_effect=Exception('LLM API connection test failed'))
+		with pytest.raises(Exception, match='connection test failed'):
+			await cache.verify(key, failing)
+		assert not cache.is_verified(key)
+
+		cache.mark_verified(key)
+		assert cache.is_verified(key)
+		cache.ttl = 0
+		await asyncio.sleep(0.01)
+		assert not cache.is_verified(key)
+		probe = MagicMock(return_value=asyncio.sleep(0, result=True))
+		assert await cache.verify(key, probe)
+		probe.assert_called_once()
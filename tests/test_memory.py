@@ -0,0 +1,140 @@
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from browser_use.agent.memory.service import Memory, MemorySettings
+from browser_use.agent.message_manager.service import MessageManager, MessageManagerSettings
+from browser_use.agent.message_manager.token_counter import HeuristicTokenCounter
+from browser_use.agent.message_manager.views import MessageManagerState
+
+
+def make_memory() -> Memory:
+	message_manager = MessageManager(
+		task='task',
+		system_message=SystemMessage(content='system'),
+		settings=MessageManagerSettings(token_counter=HeuristicTokenCounter()),
+		state=MessageManagerState(),
+	)
+	return Memory(message_manager=message_manager, llm=MagicMock(), settings=MemorySettings(agent_id='agent'))
+
+
+class TestProceduralMemory:
+	@pytest.mark.asyncio
+	async def test_background_memory_does_not_block_and_keeps_new_messages(self):
+		memory = make_memory()
+		manager = memory.message_manager
+		manager._add_message_with_tokens(HumanMessage(content='step 1 state'))
+		manager._add_message_with_tokens(AIMessage(content='step 1 output'))
+
+		def slow_create(messages, current_step):
+			time.sleep(0.2)
+			return f'summary at step {current_step}'
+
+		memory._create = slow_create
+		task = memory.schedule_procedural_memory(current_step=10)
+		assert task is not None
+		assert memory.schedule_procedural_memory(current_step=11) is None
+
+		# The event loop keeps running while the summary is created
+		start = time.perf_counter()
+		await asyncio.sleep(0.01)
+		assert time.perf_counter() - start < 0.1
+
+		manager._add_message_with_tokens(HumanMessage(content='step 2 state'))
+		await task
+
+		history = manager.state.history
+		contents = [m.message.content for m in history.messages[-2:]]
+		assert contents == ['summary at step 10', 'step 2 state']
+		assert history.messages[-2].metadata.message_type == 'memory'
+		assert 'step 1 output' not in [m.message.content for m in history.messages]
+		assert history.current_tokens == sum(m.metadata.tokens for m in history.messages)
+
+	@pytest.mark.asyncio
+	async def test_state_message_of_the_step_is_not_summarized(self):
+		memory = make_memory()
+		manager = memory.message_manager
+		manager._add_message_with_tokens(HumanMessage(content='step 1 state'))
+		manager._add_message_with_tokens(AIMessage(content='step 1 output'))
+		memory._create = lambda messages, current_step: f'summary of {[m.content for m in messages]}'
+
+		# Order of Agent.step: schedule, add the state message, ask the LLM, remove the state message
+		task = memory.schedule_procedural_memory(current_step=10)
+		manager._add_message_with_tokens(HumanMessage(content='step 2 state'))
+		await task
+		manager._remove_last_state_message()
+
+		history = manager.state.history
+		assert [m.metadata.message_type for m in history.messages][-1] == 'memory'
+		summary = history.messages[-1].message.content
+		assert 'step 1 output' in summary and 'step 2 state' not in summary
+		assert history.current_tokens == sum(m.metadata.tokens for m in history.messages)
+
+	@pytest.mark.asyncio
+	async def test_close_cancels_pending_memory(self):
+		memory = make_memory()
+		manager = memory.message_manager
+		manager._add_message_with_tokens(HumanMessage(content='step 1 state'))
+		manager._add_message_with_tokens(AIMessage(content='step 1 output'))
+		messages = list(manager.state.history.messages)
+
+		memory._create = lambda messages, current_step: time.sleep(0.1) or 'summary'
+		task = memory.schedule_procedural_memory(current_step=10)
+		await memory.close()
+
+		assert task.cancelled()
+		assert manager.state.history.messages == messages
+
+	def test_backend_is_created_lazily_and_shared(self):
+		with patch('browser_use.agent.memory.service._create_backend', side_effect=lambda config: MagicMock()) as create:
+			memory = make_memory()
+			assert create.call_count == 0
+
+			config = {'vector_store': {'provider': 'faiss', 'config': {'path': '/tmp/shared-memory-test'}}}
+			shared = [
+				Memory(
+					message_manager=memory.message_manager,
+					llm=MagicMock(),
+					settings=MemorySettings(agent_id=f'agent-{i}', config=config, shared=True),
+				)
+				for i in range(3)
+			]
+			assert shared[0].mem0 is shared[1].mem0 is shared[2].mem0
+			assert memory.mem0 is not shared[0].mem0
+			assert create.call_count == 2
+
+	@pytest.mark.asyncio
+	async def test_shared_backend_is_used_by_one_agent_at_a_time(self):
+		class FakeBackend:
+			def __init__(self):
+				self.active = 0
+				self.max_active = 0
+
+			def add(self, messages, agent_id, **kwargs):
+				self.active += 1
+				self.max_active = max(self.max_active, self.active)
+				time.sleep(0.02)
+				self.active -= 1
+				return {'results': [{'memory': f'summary of {agent_id}'}]}
+
+		backend = FakeBackend()
+		config = {'vector_store': {'provider': 'faiss', 'config': {'path': '/tmp/concurrent-memory-test'}}}
+		with patch('browser_use.agent.memory.service._create_backend', return_value=backend):
+			memories = []
+			for i in range(4):
+				memory = make_memory()
+				memory.settings = MemorySettings(agent_id=f'agent-{i}', config=config, shared=True)
+				memory._memory_config = config
+				memory.message_manager._add_message_with_tokens(HumanMessage(content='state'))
+				memory.message_manager._add_message_with_tokens(AIMessage(content='output'))
+				memories.append(memory)
+
+			await asyncio.gather(*(memory.schedule_procedural_memory(current_step=10) for memory in memories))
+
+		assert backend.max_active == 1
+		assert [m.message_manager.state.history.messages[-1].message.content for m in memories] == [
+			f'summary of agent-{i}' for i in range(4)
+		]
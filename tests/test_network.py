@@ -0,0 +1,116 @@
+import asyncio
+import time
+
+import pytest
+
+from browser_use.browser.network import NetworkIdleTracker
+
+
+class DummyPage:
+	def __init__(self):
+		self.handlers = {}
+		self.main_frame = object()
+
+	def on(self, event, handler):
+		self.handlers[event] = handler
+
+	def remove_listener(self, event, handler):
+		self.handlers.pop(event, None)
+
+	def emit(self, event, payload):
+		self.handlers[event](payload)
+
+
+class DummyRequest:
+	def __init__(self, url, resource_type='script'):
+		self.url = url
+		self.resource_type = resource_type
+		self.headers = {}
+
+
+class DummyResponse:
+	def __init__(self, request, content_type='application/javascript'):
+		self.request = request
+		self.headers = {'content-type': content_type}
+
+
+class TestNetworkIdleTracker:
+	@pytest.mark.asyncio
+	async def test_resolves_when_idle_window_passes(self):
+		page = DummyPage()
+		tracker = NetworkIdleTracker(page)
+		request = DummyRequest('https://example.com/app.js')
+
+		async def load():
+			page.emit('request', request)
+			await asyncio.sleep(0.05)
+			page.emit('response', DummyResponse(request))
+
+		start = time.perf_counter()
+		loading = asyncio.create_task(load())
+		assert await tracker.wait_for_idle(idle_time=0.1, timeout=2)
+		elapsed = time.perf_counter() - start
+		await loading
+
+		# Idle 0.1s after the response arrived at ~0.05s, without a polling interval on top
+		assert 0.14 <= elapsed < 0.25
+		assert (tracker.requests_started, tracker.requests_finished) == (1, 1)
+
+	@pytest.mark.asyncio
+	async def test_failed_requests_stop_being_pending(self):
+		page = DummyPage()
+		tracker = NetworkIdleTracker(page)
+		request = DummyRequest('https://example.com/logo.png', resource_type='image')
+		page.emit('request', request)
+
+		waiting = asyncio.create_task(tracker.wait_for_idle(idle_time=0.05, timeout=2))
+		await asyncio.sleep(0.05)
+		assert not waiting.done()
+
+		page.emit('requestfailed', request)
+		assert await waiting
+		assert tracker.requests_failed == 1
+		assert not tracker.pending_requests
+
+	@pytest.mark.asyncio
+	async def test_times_out_and_ignores_irrelevant_requests(self):
+		page = DummyPage()
+		tracker = NetworkIdleTracker(page)
+		page.emit('request', DummyRequest('https://example.com/analytics.js'))
+		page.emit('request', DummyRequest('https://example.com/stream', resource_type='websocket'))
+		page.emit('request', DummyRequest('https://example.com/slow.css', resource_type='stylesheet'))
+
+		assert not await tracker.wait_for_idle(idle_time=0.05, timeout=0.1)
+		assert tracker.requests_ignored == 2
+		assert len(tracker.pending_requests) == 1
+
+		tracker.close()
+		assert not page.handlers
+
+	@pytest.mark.asyncio
+	async def test_main_frame_navigation_drops_pending_requests(self):
+		page = DummyPage()
+		tracker = NetworkIdleTracker(page)
+		page.emit('request', DummyRequest('https://example.com/old.js'))
+
+		# Navigations of child frames keep the requests of the page
+		page.emit('framenavigated', object())
+		assert len(tracker.pending_requests) == 1
+
+		page.emit('framenavigated', page.main_frame)
+		assert not tracker.pending_requests
+		assert await tracker.wait_for_idle(idle_time=0.05, timeout=1)
+
+	@pytest.mark.asyncio
+	async def test_hanging_requests_hold_up_one_wait_at_most(self):
+		page = DummyPage()
+		tracker = NetworkIdleTracker(page)
+		page.emit('request', DummyRequest('https://example.com/long-poll.js'))
+
+		assert not await tracker.wait_for_idle(idle_time=0.05, timeout=0.1)
+
+		# The request has been pending for longer than the timeout when the next wait starts
+		start = time.perf_counter()
+		assert await tracker.wait_for_idle(idle_time=0.05, timeout=0.1)
+		assert time.perf_counter() - start < 0.09
+		assert tracker.requests_abandoned == 1 and not tracker.pending_requests
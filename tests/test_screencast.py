@@ -0,0 +1,89 @@
+import asyncio
+import time
+
+import pytest
+
+from browser_use.browser.screencast import FrameRingBuffer, PageScreencast, ScreencastFrame
+
+
+class FakeCDPSession:
+	def __init__(self):
+		self.handlers = {}
+		self.sent = []
+
+	def on(self, event, handler):
+		self.handlers[event] = handler
+
+	async def send(self, method, params=None):
+		self.sent.append((method, params))
+		if method == 'Page.startScreencast':
+			# The browser sends the first frame right away
+			self.emit('first')
+
+	def emit(self, data):
+		self.handlers['Page.screencastFrame']({'data': data, 'sessionId': len(self.sent), 'metadata': {}})
+
+	async def detach(self):
+		pass
+
+
+class FakeContext:
+	def __init__(self):
+		self.session = FakeCDPSession()
+
+	async def new_cdp_session(self, page):
+		return self.session
+
+
+class FakePage:
+	def __init__(self):
+		self.context = FakeContext()
+
+
+class TestFrameRingBuffer:
+	def test_keeps_the_latest_frames(self):
+		buffer = FrameRingBuffer(capacity=2)
+		assert buffer.latest() is None
+
+		for data in ('YQ==', 'Yg==', 'Yw=='):
+			buffer.append(ScreencastFrame(data=data, received_at=time.monotonic()))
+
+		assert len(buffer) == 2
+		assert buffer.latest().data == 'Yw=='
+		assert buffer.find('YQ==') is None
+		assert buffer.find('Yg==').image_bytes == b'b'
+
+
+class TestPageScreencast:
+	@pytest.mark.asyncio
+	async def test_buffers_and_acknowledges_frames(self):
+		page = FakePage()
+		screencast = PageScreencast(page, format='jpeg', quality=50, max_dimension=1024)
+
+		await screencast.start()
+		session = page.context.session
+		await asyncio.sleep(0)
+
+		method, params = session.sent[0]
+		assert method == 'Page.startScreencast'
+		assert params == {'format': 'jpeg', 'everyNthFrame': 1, 'quality': 50, 'maxWidth': 1024, 'maxHeight': 1024}
+		# The frame that arrived while starting was acknowledged
+		assert session.sent[1][0] == 'Page.screencastFrameAck'
+		assert (await screencast.latest_frame()).data == 'first'
+
+		await screencast.stop()
+		assert not screencast.is_running
+
+	@pytest.mark.asyncio
+	async def test_waits_for_a_frame_after_a_change(self):
+		page = FakePage()
+		screencast = PageScreencast(page)
+		await screencast.start()
+		session = page.context.session
+
+		changed_at = time.monotonic()
+		asyncio.get_running_loop().call_later(0.01, session.emit, 'repainted')
+		assert (await screencast.latest_frame(fresh_after=changed_at, timeout=1)).data == 'repainted'
+
+		# Without a repaint the latest frame is still returned
+		assert (await screencast.latest_frame(fresh_after=time.monotonic(), timeout=0.01)).data == 'repainted'
@@ -0,0 +1,140 @@
+import base64
+import io
+
+import pytest
+
+from browser_use.browser.screenshot import PageScreenshotter, draw_highlights, get_screenshot_media_type
+from browser_use.dom.views import HighlightBox
+
+
+def png_b64(color: tuple[int, int, int], size=(64, 55)) -> str:
+	from PIL import Image
+
+	output = io.BytesIO()
+	Image.new('RGB', size, color).save(output, format='PNG')
+	return base64.b64encode(output.getvalue()).decode()
+
+
+class FakeCDPSession:
+	def __init__(self, page):
+		self.page = page
+		self.captures = []
+
+	async def send(self, method, params=None):
+		if self.page.cdp_errors:
+			raise Exception(self.page.cdp_errors.pop(0))
+		if method == 'Page.getLayoutMetrics':
+			return {
+				'cssVisualViewport': {'pageX': 0, 'pageY': 0, 'clientWidth': 1280, 'clientHeight': 1100},
+				'cssLayoutViewport': {'clientWidth': 1280, 'clientHeight': 1100},
+				'layoutViewport': {'clientWidth': 2560, 'clientHeight': 2200},
+				'cssContentSize': {'width': 1280, 'height': 4000},
+			}
+		assert method == 'Page.captureScreenshot'
+		self.captures.append(params)
+		if params['format'] == 'png':
+			return {'data': png_b64(self.page.color)}
+		return {'data': '/9j/' + str(len(self.captures))}
+
+
+class FakeContext:
+	def __init__(self):
+		self.sessions = []
+
+	async def new_cdp_session(self, page):
+		session = FakeCDPSession(page)
+		self.sessions.append(session)
+		return session
+
+
+class FakePage:
+	def __init__(self):
+		self.url = 'https://example.com'
+		self.color = (255, 255, 255)
+		self.context = FakeContext()
+		self.cdp_errors = []
+		self.playwright_screenshots = 0
+
+	async def screenshot(self, **kwargs):
+		self.playwright_screenshots += 1
+		return base64.b64decode(png_b64(self.color))
+
+
+class TestPageScreenshotter:
+	def test_media_type_from_base64(self):
+		assert get_screenshot_media_type('iVBORw0KGgoAAAANSUhEUg') == 'image/png'
+		assert get_screenshot_media_type('/9j/4AAQSkZJRg') == 'image/jpeg'
+		assert get_screenshot_media_type('UklGRiQAAABXRUJQ') == 'image/webp'
+
+	@pytest.mark.asyncio
+	async def test_encodes_downscales_and_reuses_unchanged_screenshots(self):
+		pytest.importorskip('PIL')
+		page = FakePage()
+		screenshotter = PageScreenshotter(page, format='jpeg', quality=60, max_dimension=1024, skip_unchanged=True)
+
+		first = await screenshotter.capture()
+		session = page.context.sessions[0]
+		thumbnail, full = session.captures
+		# 2560 device pixels wide, downscaled to 1024
+		assert full['format'] == 'jpeg' and full['quality'] == 60
+		assert full['clip']['scale'] == pytest.approx(1024 / 2560)
+		assert thumbnail['clip']['scale'] == pytest.approx(64 / 2560)
+
+		# Same page: only the thumbnail is captured again
+		assert await screenshotter.capture() == first
+		assert len(session.captures) == 3
+		assert screenshotter.reused_screenshots == 1
+
+		# Changed page: a new screenshot
+		page.color = (0, 0, 0)
+		assert await screenshotter.capture() != first
+		assert len(session.captures) == 5
+
+	@pytest.mark.asyncio
+	async def test_changed_dom_is_not_hidden_by_an_identical_thumbnail(self):
+		pytest.importorskip('PIL')
+		page = FakePage()
+		screenshotter = PageScreenshotter(page, format='jpeg', skip_unchanged=True)
+
+		first = await screenshotter.capture(state_key=b'dom-1')
+		assert await screenshotter.capture(state_key=b'dom-1') == first
+		# A few characters changed: same thumbnail, different DOM
+		assert await screenshotter.capture(state_key=b'dom-2') != first
+		assert screenshotter.reused_screenshots == 1
+
+	@pytest.mark.asyncio
+	async def test_only_unsupported_devtools_screenshots_disable_them(self):
+		pytest.importorskip('PIL')
+		page = FakePage()
+		screenshotter = PageScreenshotter(page, format='jpeg')
+
+		# A transient error falls back to Playwright once
+		page.cdp_errors = ['Target page, context or browser has been closed']
+		await screenshotter.capture()
+		assert page.playwright_screenshots == 1
+		assert (await screenshotter.capture()).startswith('/9j/')
+		assert page.playwright_screenshots == 1
+
+		page.cdp_errors = ["Protocol error (Page.getLayoutMetrics): 'Page.getLayoutMetrics' wasn't found"]
+		await screenshotter.capture()
+		await screenshotter.capture()
+		assert page.playwright_screenshots == 3
+
+	def test_draws_highlights_scaled_to_the_screenshot(self):
+		pytest.importorskip('PIL')
+		from PIL import Image
+
+		# 200x100 CSS pixel viewport captured at a device pixel ratio of 2
+		screenshot = base64.b64decode(png_b64((255, 255, 255), size=(400, 200)))
+		boxes = [HighlightBox(index=2, x=10, y=20, width=50, height=40)]
+
+		annotated = draw_highlights(screenshot, boxes, viewport_width=200)
+
+		with Image.open(io.BytesIO(annotated)) as image:
+			assert image.format == 'PNG' and image.size == (400, 200)
+			# Border in the color of index 2 at device pixels, the rest of the page untouched
+			assert image.getpixel((20, 60))[:3] == (0, 0, 255)
+			assert image.getpixel((300, 150))[:3] == (255, 255, 255)
+			# Translucent fill inside the box
+			inside = image.getpixel((40, 100))[:3]
+			assert inside != (255, 255, 255) and inside[2] == 255
@@ -0,0 +1,58 @@
+import random
+import string
+
+from pydantic import BaseModel
+
+from browser_use.sensitive_data import SensitiveDataRedactor
+
+
+class Credentials(BaseModel):
+	username: str
+	password: str
+
+
+class LoginParams(BaseModel):
+	url: str
+	credentials: Credentials
+	extra: list[str] = []
+
+
+class TestSensitiveDataRedactor:
+	def test_redacts_all_secrets_in_one_pass(self):
+		redactor = SensitiveDataRedactor({'user': 'alice', 'password': 'alice123', 'token': 'ab+c*', 'empty': ''})
+		text = 'login alice with alice123, token ab+c* and alicealice'
+		assert redactor.redact(text) == (
+			'login <secret>user</secret> with <secret>password</secret>, token <secret>token</secret> '
+			'and <secret>user</secret><secret>user</secret>'
+		)
+
+	def test_matches_naive_replacement_for_many_secrets(self):
+		rng = random.Random(0)
+		secrets = {f'key_{i}': ''.join(rng.choices(string.ascii_letters, k=12)) for i in range(300)}
+		words = [rng.choice(list(secrets.values())) if i % 10 == 0 else 'lorem' for i in range(3000)]
+		text = ' '.join(words)
+
+		expected = text
+		for key, value in secrets.items():
+			expected = expected.replace(value, f'<secret>{key}</secret>')
+		assert SensitiveDataRedactor(secrets).redact(text) == expected
+
+	def test_secrets_that_are_prefixes_of_each_other(self):
+		# Nested deeper than the regex parser can recurse as a trie
+		secrets = {f'key_{i}': 'x' * i for i in range(1, 800)}
+		redactor = SensitiveDataRedactor(secrets)
+		assert redactor.redact('a' + 'x' * 799 + ' b ' + 'x' * 803) == (
+			'a<secret>key_799</secret> b <secret>key_799</secret><secret>key_4</secret>'
+		)
+
+	def test_resolves_placeholders_in_nested_params(self):
+		redactor = SensitiveDataRedactor({'user': 'alice', 'password': 'hunter2'})
+		params = LoginParams(
+			url='https://example.com',
+			credentials=Credentials(username='<secret>user</secret>', password='<secret>password</secret>'),
+			extra=['<secret>unknown</secret>', 'pw: <secret>password</secret>'],
+		)
+		resolved = redactor.resolve_params(params)
+		assert resolved.credentials == Credentials(username='alice', password='hunter2')
+		assert resolved.extra == ['<secret>unknown</secret>', 'pw: hunter2']
+		assert resolved.url == 'https://example.com'
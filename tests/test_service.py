@@ -218,3 +218,79 @@ class TestRegistry:
 			param1='test_value', browser=mock_browser
 		)
 		registry.registry.actions['test_action_without_browser'].function.assert_called_once_with(param1='test_value')
+
+	@pytest.mark.asyncio
+	async def test_execute_action_uses_dispatch_plan_from_registration(self):
+		"""
+		Test that the signature of an action is inspected once at registration and not on every call.
+		"""
+		registry = Registry()
+
+		class SecretActionModel(BaseModel):
+			text: str
+
+		@registry.action(description='Action with a param model', param_model=SecretActionModel)
+		async def secret_action(params: SecretActionModel, browser, has_sensitive_data: bool = False):
+			return params.text, has_sensitive_data
+
+		plan = registry._dispatch_plans['secret_action'][1]
+		assert plan.takes_param_model
+		assert plan.injectables == ('browser',)
+		assert plan.takes_sensitive_data_flag
+
+		with patch('browser_use.controller.registry.views.signature', side_effect=AssertionError('signature inspected')):
+			result = await registry.execute_action(
+				'secret_action',
+				{'text': '<secret>password</secret>'},
+				browser=MagicMock(),
+				sensitive_data={'password': 'hunter2'},
+			)
+		assert result == ('hunter2', True)
+
+	@pytest.mark.asyncio
+	async def test_sensitive_data_flag_is_not_an_llm_param(self):
+		"""
+		Test that has_sensitive_data is left out of the param model built from the signature, so it is
+		passed to the action once and not asked from the LLM.
+		"""
+		registry = Registry()
+
+		@registry.action(description='Greet someone')
+		async def greet(name: str, has_sensitive_data: bool = False):
+			return f'Hello {name}', has_sensitive_data
+
+		assert 'has_sensitive_data' not in registry.registry.actions['greet'].param_model.model_fields
+
+		result = await registry.execute_action('greet', {'name': '<secret>user</secret>'}, sensitive_data={'user': 'Alice'})
+		assert result == ('Hello Alice', True)
+		assert await registry.execute_action('greet', {'name': 'Bob'}) == ('Hello Bob', False)
+
+
+class TestController:
+	@pytest.mark.asyncio
+	async def test_extract_content_invokes_llm_asynchronously(self):
+		"""
+		Test that extract_content awaits the LLM instead of blocking the event loop with a sync call.
+		"""
+		controller = Controller()
+
+		page = MagicMock()
+		page.url = 'https://example.com'
+		page.frames = []
+		page.content = AsyncMock(return_value='<html><body><h1>Title</h1></body></html>')
+		browser = MagicMock()
+		browser.get_current_page = AsyncMock(return_value=page)
+
+		llm = MagicMock(spec=BaseChatModel)
+		llm.invoke.side_effect = AssertionError('sync invoke blocks the event loop')
+		llm.ainvoke = AsyncMock(return_value=MagicMock(content='{"title": "Title"}'))
+
+		result = await controller.registry.execute_action(
+			'extract_content',
+			{'goal': 'title', 'should_strip_link_urls': True},
+			browser=browser,
+			page_extraction_llm=llm,
+		)
+
+		assert '{"title": "Title"}' in result.extracted_content
+		assert 'Title' in llm.ainvoke.call_args.args[0]
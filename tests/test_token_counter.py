@@ -0,0 +1,114 @@
+import base64
+import struct
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from browser_use.agent.message_manager import token_counter
+from browser_use.agent.message_manager.service import MessageManager, MessageManagerSettings
+from browser_use.agent.message_manager.token_counter import (
+	BPETokenCounter,
+	HeuristicTokenCounter,
+	TokenCounter,
+	get_image_size,
+	get_image_url_size,
+)
+
+
+def png_header(width: int, height: int) -> bytes:
+	return b'\x89PNG\r\n\x1a\n' + b'\x00\x00\x00\rIHDR' + struct.pack('>II', width, height) + b'\x08\x02\x00\x00\x00'
+
+
+def jpeg_header(width: int, height: int) -> bytes:
+	app0 = b'\xff\xe0' + struct.pack('>H', 16) + b'JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00'
+	sof0 = b'\xff\xc0' + struct.pack('>HBHH', 17, 8, height, width) + b'\x03' + b'\x00' * 9
+	return b'\xff\xd8' + app0 + sof0
+
+
+class CountingCounter(HeuristicTokenCounter):
+	def __init__(self):
+		super().__init__(characters_per_token=4)
+		self.calls = 0
+
+	def _count_text_tokens(self, text: str) -> int:
+		self.calls += 1
+		return super()._count_text_tokens(text)
+
+
+class TestTokenCounter:
+	def test_text_counts_are_memoized(self):
+		counter = CountingCounter()
+		assert counter.count_text('a' * 40) == 10
+		assert counter.count_text('a' * 40) == 10
+		assert counter.count_text('b' * 40) == 10
+		assert counter.calls == 2
+
+	def test_bpe_counter_falls_back_to_heuristic(self, monkeypatch):
+		monkeypatch.setitem(token_counter._encodings, 'unavailable', None)
+		counter = BPETokenCounter('unavailable', fallback=HeuristicTokenCounter(characters_per_token=5))
+		assert counter.count_text('x' * 50) == 10
+
+	def test_message_manager_estimates_tokens_by_default(self):
+		with pytest.raises(TypeError):
+			TokenCounter()
+
+		manager = MessageManager(
+			task='task',
+			system_message=SystemMessage(content='system'),
+			settings=MessageManagerSettings(estimated_characters_per_token=4),
+		)
+		assert type(manager.token_counter) is HeuristicTokenCounter
+		assert manager.token_counter.characters_per_token == 4
+
+	def test_image_size_from_headers(self):
+		assert get_image_size(png_header(1280, 1100)) == (1280, 1100)
+		assert get_image_size(jpeg_header(800, 600)) == (800, 600)
+		assert get_image_size(b'not an image') is None
+
+		jpeg_url = 'data:image/jpeg;base64,' + base64.b64encode(jpeg_header(800, 600) + b'\x00' * 100).decode()
+		assert get_image_url_size(jpeg_url) == (800, 600)
+		assert get_image_url_size('https://example.com/image.png') is None
+
+	def test_image_tokens_follow_dimensions_for_bpe_counter(self):
+		counter = BPETokenCounter()
+		# Scaled to 894x768: 2x2 tiles
+		assert counter.count_image(1280, 1100) == 765
+		assert counter.count_image(512, 512) == 255
+		# Other counters leave images to image_tokens
+		assert HeuristicTokenCounter().count_image(1280, 1100) is None
+
+	def test_message_manager_counts_screenshots_with_image_tokens_by_default(self):
+		manager = MessageManager(
+			task='task',
+			system_message=SystemMessage(content='system'),
+			settings=MessageManagerSettings(token_counter=CountingCounter(), image_tokens=1900),
+		)
+		before = manager.state.history.current_tokens
+		screenshot = base64.b64encode(png_header(1280, 1100)).decode()
+		message = HumanMessage(
+			content=[
+				{'type': 'text', 'text': 'a' * 400},
+				{'type': 'image_url', 'image_url': {'url': f'data:image/png;base64,{screenshot}'}},
+			]
+		)
+		manager._add_message_with_tokens(message)
+		assert manager.state.history.current_tokens - before == 100 + 1900
+
+	def test_message_manager_counts_screenshots_by_size_with_bpe_counter(self, monkeypatch):
+		monkeypatch.setitem(token_counter._encodings, 'unavailable', None)
+		counter = BPETokenCounter('unavailable', fallback=HeuristicTokenCounter(characters_per_token=4))
+		manager = MessageManager(
+			task='task',
+			system_message=SystemMessage(content='system'),
+			settings=MessageManagerSettings(token_counter=counter, image_tokens=800),
+		)
+		before = manager.state.history.current_tokens
+		screenshot = base64.b64encode(png_header(1280, 1100)).decode()
+		message = HumanMessage(
+			content=[
+				{'type': 'text', 'text': 'a' * 400},
+				{'type': 'image_url', 'image_url': {'url': f'data:image/png;base64,{screenshot}'}},
+			]
+		)
+		manager._add_message_with_tokens(message)
+		assert manager.state.history.current_tokens - before == 100 + 765